@@ -2,9 +2,6 @@ import logging
 import sys
 from typing import Any, Dict, Optional
 
-from mapchete.log import all_mapchete_packages
-from uvicorn.config import LOGGING_CONFIG
-
 from mapchete_hub.settings import LogLevels, mhub_settings
 
 
@@ -24,6 +21,8 @@ def setup_logger(
     # determine which package loggers to set up
     mapchete_packages = ["mapchete_hub"]
     if add_mapchete_logger:
+        from mapchete.log import all_mapchete_packages
+
         mapchete_packages.extend(all_mapchete_packages)
 
     # add stream handler & set log levels on package loggers
@@ -40,6 +39,8 @@ def uvicorn_log_config(
     log_level = log_level or mhub_settings.log_level
     add_mapchete_logger = add_mapchete_logger or mhub_settings.add_mapchete_logger
 
+    from uvicorn.config import LOGGING_CONFIG
+
     # setup log config
     log_config = LOGGING_CONFIG.copy()
     for formatter in ["access", "default"]:
@@ -49,6 +50,8 @@ def uvicorn_log_config(
     # determine which package loggers to set up
     mapchete_packages = ["mapchete_hub"]
     if add_mapchete_logger:
+        from mapchete.log import all_mapchete_packages
+
         mapchete_packages.extend(all_mapchete_packages)
 
     # add package loggers & their configuration
@@ -0,0 +1,145 @@
+"""
+Admission control for job submissions.
+
+New jobs are rejected while too many jobs are waiting in the queue, i.e. have
+the status pending. Limits can be set on the number of queued jobs, on their
+total area and on the number of queued jobs per client. Areas are approximated
+by the bounding boxes of the jobs in the CRS of the backend database.
+
+Rejected clients are told when to retry, based on the rate at which jobs have
+finished recently.
+
+Limits are approximate: checks and inserts are serialized within one server
+process only, so concurrent submissions to several processes can exceed them
+slightly.
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from mapchete.enums import Status
+from shapely.geometry import box
+
+from mapchete_hub.db.base import AsyncBaseStatusHandler
+from mapchete_hub.settings import MHubSettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_AFTER = 60
+
+
+class AdmissionRejected(Exception):
+    """Raised if a job submission exceeds an admission limit."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def limits_enabled(settings: MHubSettings) -> bool:
+    return any(
+        limit is not None
+        for limit in [
+            settings.admission_max_queued_jobs,
+            settings.admission_max_queued_area,
+            settings.admission_max_queued_jobs_per_client,
+        ]
+    )
+
+
+def bounds_area(bounds: Optional[List[float]]) -> float:
+    return box(*bounds).area if bounds else 0.0
+
+
+async def check_admission(
+    backend_db: AsyncBaseStatusHandler,
+    settings: MHubSettings,
+    areas: List[float],
+    client_id: Optional[str] = None,
+) -> None:
+    """
+    Raise AdmissionRejected if the new jobs would exceed an admission limit.
+
+    areas contains the bounding box area of each job to be submitted.
+    """
+    if not limits_enabled(settings):
+        return
+    pending = [Status.pending]
+    # bounds are only read if the queued area is limited
+    queued_areas = None
+    if settings.admission_max_queued_area is not None:
+        queued_areas = [
+            bounds_area(job.bounds)
+            for job in await backend_db.jobs(status=pending, fields=["bounds"])
+        ]
+        queued_count = len(queued_areas)
+    else:
+        queued_count = await backend_db.count(status=pending)
+
+    # number of queued jobs which have to leave the queue first
+    excess = 0
+    reasons = []
+    if settings.admission_max_queued_jobs is not None:
+        jobs_excess = queued_count + len(areas) - settings.admission_max_queued_jobs
+        if jobs_excess > 0:
+            excess = max(excess, jobs_excess)
+            reasons.append(
+                f"{queued_count} jobs queued (limit {settings.admission_max_queued_jobs})"
+            )
+    if queued_areas is not None and settings.admission_max_queued_area is not None:
+        area_excess = (
+            sum(queued_areas) + sum(areas) - settings.admission_max_queued_area
+        )
+        if area_excess > 0:
+            mean_area = sum(queued_areas) / len(queued_areas) if queued_areas else 0.0
+            excess = max(excess, math.ceil(area_excess / mean_area) if mean_area else 1)
+            reasons.append(
+                f"queued area {sum(queued_areas):g} "
+                f"(limit {settings.admission_max_queued_area:g})"
+            )
+    if settings.admission_max_queued_jobs_per_client is not None and client_id:
+        client_queued = await backend_db.count(status=pending, client_id=client_id)
+        client_excess = (
+            client_queued + len(areas) - settings.admission_max_queued_jobs_per_client
+        )
+        if client_excess > 0:
+            # other jobs in the queue are not necessarily processed first
+            excess = max(excess, client_excess)
+            reasons.append(
+                f"{client_queued} jobs of client {client_id} queued "
+                f"(limit {settings.admission_max_queued_jobs_per_client})"
+            )
+    if not reasons:
+        return
+
+    retry_after = await estimate_retry_after(backend_db, settings, excess)
+    logger.debug(
+        "rejecting submission, retry after %ss: %s", retry_after, ", ".join(reasons)
+    )
+    raise AdmissionRejected(
+        f"too many queued jobs: {', '.join(reasons)}", retry_after=retry_after
+    )
+
+
+async def estimate_retry_after(
+    backend_db: AsyncBaseStatusHandler, settings: MHubSettings, excess: int
+) -> int:
+    """
+    Estimate seconds until excess jobs have left the queue.
+
+    The queue drain rate is the number of jobs finished within the last
+    admission_drain_rate_window seconds.
+    """
+    window = settings.admission_drain_rate_window
+    finished = await backend_db.count(
+        status=[Status.done, Status.failed, Status.cancelled],
+        from_date=datetime.now(timezone.utc) - timedelta(seconds=window),
+    )
+    if not finished:
+        return min(DEFAULT_RETRY_AFTER, settings.admission_max_retry_after)
+    drain_rate = finished / window
+    return max(
+        1, min(math.ceil(excess / drain_rate), settings.admission_max_retry_after)
+    )
@@ -9,6 +9,12 @@ GET /versions.json
 ------------------
 Show remote package versions.
 
+GET /metrics
+------------
+Prometheus metrics, e.g. request and database call durations, queued and
+running jobs. Set PROMETHEUS_MULTIPROC_DIR to aggregate metrics of multiple
+worker processes.
+
 GET /jobs
 ---------
 Return submitted jobs. Jobs can be filtered by using the following parameters:
@@ -26,19 +32,109 @@ Return submitted jobs. Jobs can be filtered by using the following parameters:
         Filter by earliest date.
     to_date : str
         Filter by latest date.
+    limit : int
+        Maximum number of jobs per page.
+    sort : str
+        Sort by "updated" or "submitted", prefix with "-" for descending order.
+    next : str
+        Opaque cursor taken from the "next" link of the previous page.
+    fields : str
+        Comma-separated job properties to return, "summary" being a shortcut for
+        a compact summary. Other properties are not read from the database.
+    stream : bool
+        Stream the FeatureCollection in chunks while jobs are read from the
+        database. "numberReturned" and "links" are written after the features.
+
+If the "Accept" header contains "application/x-ndjson", jobs are streamed as
+newline-delimited GeoJSON features instead.
+
+GET /jobs/stats
+---------------
+Return job counts per status, the number of queued (pending) jobs and runtime
+and queue wait percentiles per process and per time bucket. Accepts the filters
+of GET /jobs. Statistics are aggregated by the database. Queue wait only covers
+jobs which have started.
+    bucket_size : int
+        Length of time buckets in seconds (default 3600), by submission time.
+
+GET /jobs/tiles/{z}/{x}/{y}.mvt
+------------------------------
+Return footprints of jobs intersecting a web mercator tile as Mapbox Vector
+Tile with job_id, job_name, status and progress attributes. Geometries are
+clipped to the tile and simplified to its resolution. Accepts the filters of
+GET /jobs except bounds.
+
+GET /jobs.fgb
+-------------
+Export footprints of jobs matching the filters of GET /jobs as FlatGeobuf.
 
 GET /jobs/{job_id}
 ------------------
-Return job metadata.
+Return job metadata. Accepts the fields parameter like GET /jobs.
+    wait : str
+        Hold the request open up to this duration (e.g. "30s") until the job
+        status or progress changes. Alternatively use the "Prefer: wait=30" header.
+    status_not : str
+        Together with wait, return as soon as the job status is none of these
+        comma-separated statuses.
+
+Conditional requests
+--------------------
+GET /jobs (unless streamed), GET /jobs/{job_id} and GET /jobs/{job_id}/results
+send "ETag" and "Last-Modified" headers derived from the "updated" timestamps of
+the jobs. If the "If-None-Match" or "If-Modified-Since" request headers match,
+only "updated" is read from the database and 304 Not Modified is returned.
 
 DELETE/jobs/{job_id}
 --------------------
 Cancels a running job.
 
+POST /jobs:lookup
+-----------------
+Return multiple jobs by providing {"job_ids": [...], "fields": ...} with fields
+accepting the same values as in GET /jobs.
+
+POST /jobs:cancel
+-----------------
+Cancel all pending and running jobs matching {"job_ids": [...]} and/or any of
+the filters of GET /jobs (e.g. {"job_name": "foo", "bounds": [0, 1, 2, 3]}).
+Returns the cancelled jobs.
+
 GET /jobs/{job_id}/results
 --------------------------
 Return job result.
 
+GET /jobs/{job_id}/trace
+------------------------
+Return the spans of a job ordered by start time, i.e. the durations of the
+submission stages (process area, database, kubernetes job creation) and of job
+execution (cluster provisioning, cluster adapt, parsing and processing). Spans
+are kept in memory of the API process and appended to MHUB_TRACE_FILE if set.
+Workers running in other processes (e.g. kubernetes jobs) continue the trace of
+the submission but only their spans written to a shared MHUB_TRACE_FILE can be
+returned.
+
+GET /jobs/{job_id}/events
+-------------------------
+Stream status, progress, dask dashboard link and result updates of a job as
+Server-Sent Events. The stream starts with the current state of the job and
+ends after the job has finished.
+
+GET /events
+-----------
+Stream updates of all jobs as Server-Sent Events. Can be limited by using the
+job_id parameter with comma-separated job IDs.
+
+Events of a slow client are merged per job, so only the latest state is sent.
+
+Compression
+-----------
+Responses larger than MHUB_COMPRESSION_MINIMUM_SIZE bytes are compressed using
+zstd (if the zstandard package is installed) or gzip, depending on the
+"Accept-Encoding" request header. This includes streamed job listings.
+ETags of compressed responses carry the content encoding as suffix, e.g.
+"<hash>-gzip".
+
 GET /processes
 --------------
 Return available processes.
@@ -47,6 +143,14 @@ GET /processes/{process_id}
 ---------------------------
 Return detailed information on process.
 
+The process catalogue is built once at startup. Set MHUB_PROCESS_CATALOGUE_TTL
+to rebuild it periodically or call POST /processes:refresh after installing new
+processes. Responses carry an ETag and support If-None-Match.
+
+POST /processes:refresh
+-----------------------
+Rebuild the process catalogue and return available processes.
+
 POST /processes/{process_id}
 -------------------------------------
 Submit a custom process with a given ID.
@@ -54,23 +158,126 @@ Submit a custom process with a given ID.
 POST /processes/{process_id}/execution
 -------------------------------------
 Trigger a job using a given process_id. This returns a job ID.
+
+Calculating the process area and submitting the job run in a bounded thread pool
+(MHUB_SUBMISSION_THREADS). The "Server-Timing" response header contains the
+duration of each stage.
+
+If an "Idempotency-Key" header is sent, a retried request with the same key and
+job configuration returns the job created by the first request instead of
+submitting another one. Keys expire after MHUB_IDEMPOTENCY_KEY_TTL seconds.
+
+Submissions are rejected with "429 Too Many Requests" and a "Retry-After" header
+if they exceed MHUB_ADMISSION_MAX_QUEUED_JOBS, MHUB_ADMISSION_MAX_QUEUED_AREA or
+MHUB_ADMISSION_MAX_QUEUED_JOBS_PER_CLIENT. Clients are identified by the header
+configured in MHUB_ADMISSION_CLIENT_HEADER or by their address.
+
+POST /processes/{process_id}/execution:batch
+--------------------------------------------
+Trigger multiple jobs at once by providing a list of job configurations. This
+returns a FeatureCollection of all new jobs in the same order.
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+import time
+import traceback
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from contextvars import copy_context
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+    Union,
+)
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Response
+from fastapi import (
+    BackgroundTasks,
+    FastAPI,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from mapchete.config.models import DaskSettings
 from mapchete.enums import Status
 from mapchete.log import all_mapchete_packages
-from mapchete.processes import process_names_docstrings
+from shapely.geometry import shape
 
 from mapchete_hub import __version__
+from mapchete_hub.admission import (
+    AdmissionRejected,
+    bounds_area,
+    check_admission,
+    limits_enabled,
+)
+from mapchete_hub.compression import CompressionMiddleware
+from mapchete_hub.db.base import page_sort
+from mapchete_hub.events import EVENT_FIELDS
+from mapchete_hub.footprints import (
+    FGB_FIELDS,
+    FGB_MEDIA_TYPE,
+    MAX_TILE_ZOOM,
+    MVT_MEDIA_TYPE,
+    TILE_FIELDS,
+    flatgeobuf,
+    tile_query_bounds,
+    vector_tile,
+)
+from mapchete_hub.geometry import backend_process_area, backend_process_areas
 from mapchete_hub.lifespan_resources import resources, setup_lifespan_resources
-from mapchete_hub.models import MapcheteJob, to_status_list
+from mapchete_hub.metrics import (
+    METRICS_MEDIA_TYPE,
+    RUNNING_STATUSES,
+    MetricsMiddleware,
+    latest_metrics,
+    set_job_counts,
+)
+from mapchete_hub.models import (
+    JobEntry,
+    JobsCursor,
+    JobsFilter,
+    JobsLookup,
+    JobStats,
+    JobSummary,
+    MapcheteJob,
+    parse_fields,
+    parse_sort,
+    to_status_list,
+)
 from mapchete_hub.observers import SlackMessenger
+from mapchete_hub.observers.slack_messenger import send_slack_message, status_emoji
+from mapchete_hub.processes import CatalogueDocument, ProcessCatalogue
+from mapchete_hub.serialization import (
+    FastJSONResponse,
+    dumps,
+    feature_collection,
+    job_feature,
+)
 from mapchete_hub.settings import get_dask_specs, mhub_settings
-from mapchete_hub.timetools import parse_to_date
+from mapchete_hub.timetools import interval_to_timedelta, parse_to_date
+from mapchete_hub.tracing import (
+    Span,
+    current_traceparent,
+    parse_traceparent,
+    traced,
+    tracer,
+)
 
 uvicorn_logger = logging.getLogger("uvicorn.access")
 stream_handler = logging.StreamHandler()
@@ -93,8 +300,29 @@ for logger_name in logger_names:
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+FINISHED_STATUSES = {Status.done, Status.failed, Status.cancelled}
+CANCELLABLE_STATUSES = [
+    Status.pending,
+    Status.parsing,
+    Status.initializing,
+    Status.running,
+    Status.retrying,
+]
+
 
 app = FastAPI(lifespan=setup_lifespan_resources)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=mhub_settings.compression_minimum_size,
+    gzip_level=mhub_settings.compression_gzip_level,
+    zstd_level=mhub_settings.compression_zstd_level,
+)
+app.add_middleware(MetricsMiddleware)
 
 
 # REST endpoints
@@ -115,32 +343,68 @@ async def root() -> dict:
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Returns Prometheus metrics."""
+    try:
+        # scraped every few seconds, so only count jobs per status
+        set_job_counts(
+            await resources.async_backend_db.status_counts(
+                status=[Status.pending, *RUNNING_STATUSES]
+            )
+        )
+    except Exception as exc:  # pragma: no cover
+        logger.exception("cannot read job counts: %s", exc)
+    return Response(
+        await asyncio.to_thread(latest_metrics), media_type=METRICS_MEDIA_TYPE
+    )
+
+
 @app.get("/conformance")
 async def get_conformance():
     raise NotImplementedError()
 
 
 @app.get("/processes")
-async def get_processes() -> dict:
+async def get_processes(request: Request) -> Response:
     """Lists the processes this API offers."""
-    return {
-        "processes": [
-            {"title": title, "description": description}
-            for title, description in process_names_docstrings()
-        ]
-    }
+    catalogue = await _process_catalogue()
+    return _catalogue_response(request, catalogue.processes)
+
+
+@app.post("/processes:refresh")
+async def refresh_processes(request: Request) -> Response:
+    """Rebuild the process catalogue, e.g. after installing new processes."""
+    await asyncio.to_thread(resources.process_catalogue.refresh)
+    return _catalogue_response(request, resources.process_catalogue.processes)
 
 
 @app.get("/processes/{process_id}")
-async def get_process(process_id: str) -> dict:
+async def get_process(request: Request, process_id: str) -> Response:
     """Returns a detailed description of a process."""
+    catalogue = await _process_catalogue()
     try:
-        title, description = process_names_docstrings(process_id)[0]
-        return {"title": title, "description": description}
-    except IndexError as exc:
+        return _catalogue_response(request, catalogue.process(process_id))
+    except KeyError as exc:
         raise HTTPException(404, f"process '{process_id}' not found") from exc
 
 
+async def _process_catalogue() -> ProcessCatalogue:
+    """Return process catalogue and rebuild it in a thread if it has expired."""
+    if resources.process_catalogue.expired:
+        await asyncio.to_thread(resources.process_catalogue.refresh)
+    return resources.process_catalogue
+
+
+def _catalogue_response(request: Request, document: CatalogueDocument) -> Response:
+    headers = {"ETag": document.etag}
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=document.body, media_type="application/json", headers=headers
+    )
+
+
 @app.post("/processes/{process_id}")
 async def post_process(process_id: str):
     """Returns a detailed description of a process."""
@@ -148,43 +412,266 @@ async def post_process(process_id: str):
 
 
 @app.post("/processes/{process_id}/execution", status_code=201)
+@traced("post_job")
 async def post_job(
     process_id: str,
     job_config: MapcheteJob,
-    response: Response,
+    request: Request,
     background_tasks: BackgroundTasks,
-) -> dict:
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Response:
     """Executes a process, i.e. creates a new job."""
+    if idempotency_key:
+        job_entry = await _idempotent_job(idempotency_key, job_config)
+        if job_entry is not None:
+            return FastJSONResponse(
+                job_feature(job_entry),
+                status_code=201,
+                headers={
+                    "Location": f"/jobs/{job_entry.job_id}",
+                    "Idempotent-Replayed": "true",
+                },
+            )
+
+    timing = _ServerTiming()
+    # job execution continues the trace of the submission
+    trace_context = current_traceparent()
+    try:
+        job_config = _prepare_job_config(job_config)
+
+        # calculating the process area may read and reproject whole vector files
+        with timing("area"):
+            process_area = await _run_blocking(backend_process_area, job_config)
+
+        # reject job if too many jobs are queued
+        client_id = _client_id(request)
+        async with _admission(timing, [process_area], client_id):
+            # create new entry in database
+            with timing("db"):
+                job_entry = await resources.async_backend_db.new(
+                    job_config=job_config,
+                    process_area=process_area,
+                    client_id=client_id,
+                    trace_context=trace_context,
+                )
+                if idempotency_key:
+                    await resources.async_backend_db.bind_idempotency_key(
+                        idempotency_key, job_entry.job_id
+                    )
+    except AdmissionRejected as exc:
+        if idempotency_key:
+            # allow the client to retry
+            await resources.async_backend_db.release_idempotency_key(idempotency_key)
+        raise _too_many_requests(exc) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.exception(exc)
+        if idempotency_key:
+            await resources.async_backend_db.release_idempotency_key(idempotency_key)
+        raise HTTPException(400, str(exc)) from exc
+    except BaseException:
+        # e.g. the request got cancelled because the client has disconnected
+        if idempotency_key:
+            await resources.async_backend_db.release_idempotency_key(idempotency_key)
+        raise
+
     try:
-        # get dask specs and settings
-        job_config.params["dask_specs"] = get_dask_specs(
-            job_config.config.dask_specs or job_config.params.get("dask_specs")
+        # pass on job to job handler, this can involve blocking kubernetes API calls
+        with timing("submit"):
+            await _run_blocking(resources.job_handler.submit, job_entry)
+        logger.debug("submitted job %s (%s)", job_entry, timing.header())
+
+        # return job entry
+        return FastJSONResponse(
+            job_feature(job_entry),
+            status_code=201,
+            headers={
+                "Location": f"/jobs/{job_entry.job_id}",
+                "Server-Timing": timing.header(),
+            },
+        )
+
+    except Exception as exc:
+        logger.exception(exc)
+        # the job will never run, so a retry with the same key has to submit it again
+        if idempotency_key:
+            await resources.async_backend_db.release_idempotency_key(idempotency_key)
+        await resources.async_backend_db.set(
+            job_entry.job_id,
+            status=Status.failed,
+            exception=repr(exc),
+            traceback="\n".join(traceback.format_tb(exc.__traceback__)),
         )
-        job_config.params["dask_settings"] = DaskSettings(
-            **job_config.params.pop("dask_settings")
-            if "dask_settings" in job_config.params
-            else {}
+        raise HTTPException(400, str(exc)) from exc
+
+
+async def _idempotent_job(
+    idempotency_key: str, job_config: MapcheteJob
+) -> Optional[JobEntry]:
+    """
+    Claim idempotency key or return the job already created with this key.
+
+    Raises a 422 if the key was used with another job configuration and a 409
+    if the job for this key is still being created.
+    """
+    fingerprint = hashlib.sha1(
+        job_config.model_dump_json().encode(), usedforsecurity=False
+    ).hexdigest()
+    existing = await resources.async_backend_db.claim_idempotency_key(
+        idempotency_key, fingerprint=fingerprint
+    )
+    if existing is None:
+        return None
+    elif existing.fingerprint != fingerprint:
+        raise HTTPException(
+            422, "Idempotency-Key was already used with another job configuration"
         )
+    elif existing.job_id is None:
+        raise HTTPException(
+            409, "a job submission with this Idempotency-Key is still in progress"
+        )
+    logger.debug(
+        "job %s already submitted with key %s", existing.job_id, idempotency_key
+    )
+    try:
+        return await resources.async_backend_db.job(existing.job_id)
+    except KeyError as exc:  # pragma: no cover
+        raise HTTPException(
+            404, f"job {existing.job_id} not found in the database"
+        ) from exc
 
-        # create new entry in database
-        job_entry = resources.backend_db.new(job_config=job_config)
 
-        # pass on job to job handler
-        # background_tasks.add_task(resources.job_handler.submit, job_entry)
-        resources.job_handler.submit(job_entry)
-        logger.debug("submitted job %s", job_entry)
+@app.post("/processes/{process_id}/execution:batch", status_code=201)
+@traced("post_jobs")
+async def post_jobs(
+    process_id: str,
+    job_configs: List[MapcheteJob],
+    request: Request,
+) -> Response:
+    """Executes a process multiple times, i.e. creates multiple new jobs."""
+    timing = _ServerTiming()
+    client_id = _client_id(request)
+    trace_context = current_traceparent()
+    try:
+        job_configs = [_prepare_job_config(job_config) for job_config in job_configs]
 
-        # return job entry
-        response.headers["Location"] = f"/jobs/{job_entry.job_id}"
-        return job_entry.to_geojson_dict()
+        # process areas are calculated in parallel threads
+        with timing("area"):
+            process_areas = await _run_blocking(backend_process_areas, job_configs)
 
+        # reject all jobs if too many jobs are queued
+        async with _admission(timing, process_areas, client_id):
+            # create all entries in database at once
+            with timing("db"):
+                job_entries = await resources.async_backend_db.new_many(
+                    job_configs=job_configs,
+                    process_areas=process_areas,
+                    client_id=client_id,
+                    trace_context=trace_context,
+                )
+
+        # pass on jobs to job handler
+        with timing("submit"):
+            await _run_blocking(resources.job_handler.submit_many, job_entries)
+        logger.debug("submitted %s jobs (%s)", len(job_entries), timing.header())
+
+        return FastJSONResponse(
+            feature_collection(job_entries),
+            status_code=201,
+            headers={"Server-Timing": timing.header()},
+        )
+
+    except AdmissionRejected as exc:
+        raise _too_many_requests(exc) from exc
     except Exception as exc:  # pragma: no cover
         logger.exception(exc)
         raise HTTPException(400, str(exc)) from exc
 
 
+def _client_id(request: Request) -> Optional[str]:
+    """Identify client by MHUB_ADMISSION_CLIENT_HEADER or its address."""
+    client_id = request.headers.get(mhub_settings.admission_client_header)
+    if client_id:
+        return client_id
+    return request.client.host if request.client else None
+
+
+@asynccontextmanager
+async def _admission(
+    timing: "_ServerTiming", process_areas: List[dict], client_id: Optional[str]
+) -> AsyncIterator[None]:
+    """Check admission limits and keep other submissions out until jobs are inserted."""
+    if not limits_enabled(mhub_settings):
+        yield
+        return
+    # otherwise concurrent submissions could all pass the check before inserting
+    async with resources.admission_lock:
+        with timing("admission"):
+            await check_admission(
+                resources.async_backend_db,
+                mhub_settings,
+                areas=[
+                    bounds_area(shape(process_area).bounds)
+                    for process_area in process_areas
+                ],
+                client_id=client_id,
+            )
+        yield
+
+
+def _too_many_requests(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(429, str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+async def _run_blocking(func: Callable[..., T], *args) -> T:
+    """Run blocking function in the bounded job submission thread pool."""
+    # run in a copy of the current context to keep the current span
+    return await asyncio.get_running_loop().run_in_executor(
+        resources.submission_executor, copy_context().run, func, *args
+    )
+
+
+class _ServerTiming:
+    """
+    Measure request stages and format them as Server-Timing header.
+
+    Each stage is also traced as a span.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, stage: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            with tracer.span(stage):
+                yield
+        finally:
+            self.durations[stage] = time.perf_counter() - start
+
+    def header(self) -> str:
+        return ", ".join(
+            f"{stage};dur={duration * 1000:.1f}"
+            for stage, duration in self.durations.items()
+        )
+
+
+def _prepare_job_config(job_config: MapcheteJob) -> MapcheteJob:
+    """Add dask specs and settings to job parameters."""
+    job_config.params["dask_specs"] = get_dask_specs(
+        job_config.config.dask_specs or job_config.params.get("dask_specs")
+    )
+    job_config.params["dask_settings"] = DaskSettings(
+        **job_config.params.pop("dask_settings")
+        if "dask_settings" in job_config.params
+        else {}
+    )
+    return job_config
+
+
 @app.get("/jobs")
 async def list_jobs(
+    request: Request,
     output_path: Optional[str] = None,
     status: Optional[str] = None,
     command: Optional[str] = None,
@@ -192,39 +679,301 @@ async def list_jobs(
     bounds: Optional[str] = None,  # Field(None, example="0.0,1.0,2.0,3.0"),
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
-) -> dict:
+    limit: Optional[int] = Query(None, ge=1),
+    sort: Optional[str] = None,
+    cursor: Optional[str] = Query(None, alias="next"),
+    fields: Optional[str] = None,
+    stream: bool = False,
+):
     """Returns the running and finished jobs for a process."""
+    kwargs = _filter_kwargs(
+        output_path=output_path,
+        status=status,
+        command=command,
+        job_name=job_name,
+        bounds=tuple(map(float, bounds.split(","))) if bounds else None,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    try:
+        if sort:
+            parse_sort(sort)
+        jobs_cursor = JobsCursor.decode(cursor) if cursor else None
+        fields_list = parse_fields(fields) if fields else None
+        # sort order of next page link, also checks whether cursor matches sort
+        next_sort = page_sort(sort=sort, limit=limit, cursor=jobs_cursor)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+
+    kwargs.update(sort=sort, cursor=jobs_cursor, fields=fields_list)
+    logger.debug("job filter kwargs: %s", kwargs)
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _ndjson_features(
+                resources.async_backend_db.iter_jobs(limit=limit, **kwargs)
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    # request one more job than needed to find out whether there is a next page
+    kwargs.update(limit=limit + 1 if limit else None)
+
+    if stream:
+        return StreamingResponse(
+            _feature_collection_chunks(
+                request,
+                resources.async_backend_db.iter_jobs(**kwargs),
+                limit=limit,
+                sort=next_sort,
+            ),
+            media_type=GEOJSON_MEDIA_TYPE,
+        )
+
+    validators = {}
+    if _is_conditional(request):
+        validators = _validators(
+            await resources.async_backend_db.jobs(**dict(kwargs, fields=["updated"])),
+            variant=_variant(request),
+        )
+        if _not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+
+    jobs = await resources.async_backend_db.jobs(**kwargs)
+    validators = validators or _validators(jobs, variant=_variant(request))
+    next_job = None
+    if limit and len(jobs) > limit:
+        jobs = jobs[:limit]
+        next_job = jobs[-1]
+
+    return FastJSONResponse(
+        feature_collection(
+            jobs, links=_jobs_links(request, next_job=next_job, sort=next_sort)
+        ),
+        headers=validators,
+    )
+
+
+def _filter_kwargs(
+    output_path: Optional[str] = None,
+    status: Optional[Union[str, List[str]]] = None,
+    command: Optional[str] = None,
+    job_name: Optional[str] = None,
+    bounds: Optional[Sequence[float]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    job_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Convert job filters into status handler jobs() keyword arguments."""
     try:
         status_list = to_status_list(status) if status else None
     except KeyError as exc:
         raise HTTPException(400, f"invalid status: {status}") from exc
-
-    kwargs = {
+    return {
         "output_path": output_path,
         "status": status_list,
         "command": command,
         "job_name": job_name,
-        "bounds": tuple(map(float, bounds.split(","))) if bounds else None,
+        "bounds": tuple(bounds) if bounds else None,
         "from_date": parse_to_date(from_date) if from_date else None,
         "to_date": parse_to_date(to_date) if to_date else None,
+        "job_ids": job_ids,
     }
-    logger.debug("job filter kwargs: %s", kwargs)
 
-    return {
-        "type": "FeatureCollection",
-        "features": [
-            job.to_geojson_dict() for job in resources.backend_db.jobs(**kwargs)
-        ],
-    }
+
+def _jobs_links(
+    request: Request,
+    next_job: Optional[Union[JobEntry, JobSummary]] = None,
+    sort: Optional[str] = None,
+) -> List[dict]:
+    """Return OGC API links of a jobs page, with a next link if next_job is given."""
+    links = [
+        {
+            "href": str(request.url),
+            "rel": "self",
+            "type": GEOJSON_MEDIA_TYPE,
+            "title": "this document",
+        }
+    ]
+    if next_job is not None and sort is not None:
+        next_cursor = JobsCursor.from_job(next_job, sort=sort)
+        links.append(
+            {
+                "href": str(
+                    request.url.include_query_params(next=next_cursor.encode())
+                ),
+                "rel": "next",
+                "type": GEOJSON_MEDIA_TYPE,
+                "title": "next page",
+            }
+        )
+    return links
+
+
+def _dumps(obj) -> str:
+    return dumps(obj).decode()
+
+
+async def _ndjson_features(
+    jobs: AsyncGenerator[Union[JobEntry, JobSummary], None],
+) -> AsyncIterator[str]:
+    """Yield one GeoJSON feature per line."""
+    async with aclosing(jobs):
+        async for job in jobs:
+            yield _dumps(job_feature(job)) + "\n"
+
+
+async def _feature_collection_chunks(
+    request: Request,
+    jobs: AsyncGenerator[Union[JobEntry, JobSummary], None],
+    limit: Optional[int] = None,
+    sort: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield a GeoJSON FeatureCollection chunk by chunk.
+
+    jobs is expected to contain one more job than limit if there is a next page.
+    """
+    yield '{"type": "FeatureCollection", "features": ['
+    number_returned = 0
+    next_job = last_job = None
+    async with aclosing(jobs):
+        async for job in jobs:
+            if limit and number_returned == limit:
+                next_job = last_job
+                break
+            yield ("," if number_returned else "") + _dumps(job_feature(job))
+            number_returned += 1
+            last_job = job
+    yield (
+        f'], "numberReturned": {number_returned}, '
+        f'"links": {_dumps(_jobs_links(request, next_job=next_job, sort=sort))}}}'
+    )
+
+
+@app.get("/jobs/stats")
+async def get_jobs_stats(
+    output_path: Optional[str] = None,
+    status: Optional[str] = None,
+    command: Optional[str] = None,
+    job_name: Optional[str] = None,
+    bounds: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    bucket_size: int = Query(3600, ge=1),
+) -> JobStats:
+    """Returns aggregated statistics of jobs."""
+    kwargs = _filter_kwargs(
+        output_path=output_path,
+        status=status,
+        command=command,
+        job_name=job_name,
+        bounds=tuple(map(float, bounds.split(","))) if bounds else None,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    return await resources.async_backend_db.stats(bucket_size=bucket_size, **kwargs)
+
+
+@app.get("/jobs/tiles/{z}/{x}/{y}.mvt")
+async def get_jobs_tile(
+    z: int = Path(ge=0, le=MAX_TILE_ZOOM),
+    x: int = Path(ge=0),
+    y: int = Path(ge=0),
+    output_path: Optional[str] = None,
+    status: Optional[str] = None,
+    command: Optional[str] = None,
+    job_name: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+) -> Response:
+    """Returns job footprints within a tile as Mapbox Vector Tile."""
+    try:
+        bounds = tile_query_bounds(z, x, y)
+    except ValueError as exc:
+        raise HTTPException(404, str(exc)) from exc
+    kwargs = _filter_kwargs(
+        output_path=output_path,
+        status=status,
+        command=command,
+        job_name=job_name,
+        bounds=bounds,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    # only jobs intersecting the tile are read using the spatial index
+    jobs = await resources.async_backend_db.jobs(fields=TILE_FIELDS, **kwargs)
+    content = await asyncio.to_thread(vector_tile, jobs, z, x, y)
+    return Response(content, media_type=MVT_MEDIA_TYPE)
+
+
+@app.get("/jobs.fgb")
+async def get_jobs_flatgeobuf(
+    output_path: Optional[str] = None,
+    status: Optional[str] = None,
+    command: Optional[str] = None,
+    job_name: Optional[str] = None,
+    bounds: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+) -> Response:
+    """Returns job footprints as FlatGeobuf."""
+    kwargs = _filter_kwargs(
+        output_path=output_path,
+        status=status,
+        command=command,
+        job_name=job_name,
+        bounds=tuple(map(float, bounds.split(","))) if bounds else None,
+        from_date=from_date,
+        to_date=to_date,
+    )
+    jobs = await resources.async_backend_db.jobs(fields=FGB_FIELDS, **kwargs)
+    return Response(
+        await asyncio.to_thread(flatgeobuf, jobs),
+        media_type=FGB_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="jobs.fgb"'},
+    )
 
 
 @app.get("/jobs/{job_id}")
-async def get_job(job_id: str):
+async def get_job(
+    job_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    wait: Optional[str] = None,
+    status_not: Optional[str] = None,
+):
     """Returns the status of a job."""
     try:
-        return resources.backend_db.job(job_id).to_geojson_dict()
+        fields_list = parse_fields(fields) if fields else None
+        wait_seconds = _wait_seconds(wait, prefer=request.headers.get("prefer"))
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    try:
+        status_not_list = set(to_status_list(status_not)) if status_not else None
+    except KeyError as exc:
+        raise HTTPException(400, f"invalid status: {status_not}") from exc
+    try:
+        if wait_seconds:
+            await _wait_for_job(job_id, wait_seconds, status_not=status_not_list)
+            if not wait:
+                response.headers["Preference-Applied"] = f"wait={wait_seconds:g}"
+        validators = {}
+        if _is_conditional(request):
+            validators = _validators(
+                [await resources.async_backend_db.job(job_id, fields=["updated"])],
+                variant=_variant(request),
+            )
+            if _not_modified(request, validators):
+                return Response(
+                    status_code=304, headers=dict(response.headers, **validators)
+                )
+        job = await resources.async_backend_db.job(job_id, fields=fields_list)
     except KeyError as exc:
         raise HTTPException(404, f"job {job_id} not found in the database") from exc
+    response.headers.update(validators or _validators([job], variant=_variant(request)))
+    return FastJSONResponse(job_feature(job), headers=response.headers)
 
 
 @app.delete("/jobs/{job_id}")
@@ -233,26 +982,82 @@ async def cancel_job(
 ):
     """Cancel a job execution."""
     try:
-        job = resources.backend_db.job(job_id)
-        if job.status in [
-            Status.pending,
-            Status.parsing,
-            Status.initializing,
-            Status.running,
-            Status.retrying,
-        ]:  # pragma: no cover
-            resources.backend_db.set(job_id, status=Status.cancelled)
+        job = await resources.async_backend_db.job(job_id)
+        if job.status in CANCELLABLE_STATUSES:  # pragma: no cover
+            await resources.async_backend_db.set(job_id, status=Status.cancelled)
             slack_messenger = SlackMessenger(mhub_settings.self_instance_name, job)
             slack_messenger.send("aborting ...")
             slack_messenger.update(status=Status.cancelled)
-        return resources.backend_db.job(job_id).to_geojson_dict()
+        return FastJSONResponse(
+            job_feature(await resources.async_backend_db.job(job_id))
+        )
     except KeyError as exc:
         raise HTTPException(404, f"job {job_id} not found in the database") from exc
 
 
+@app.post("/jobs:lookup")
+async def lookup_jobs(lookup: JobsLookup) -> Response:
+    """Returns multiple jobs in the order of the given job IDs."""
+    try:
+        fields_list = parse_fields(lookup.fields) if lookup.fields else None
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    jobs = {
+        job.job_id: job
+        for job in await resources.async_backend_db.jobs(
+            job_ids=lookup.job_ids, fields=fields_list
+        )
+    }
+    return FastJSONResponse(
+        feature_collection(jobs[job_id] for job_id in lookup.job_ids if job_id in jobs)
+    )
+
+
+@app.post("/jobs:cancel")
+async def cancel_jobs(jobs_filter: JobsFilter, background_tasks: BackgroundTasks):
+    """Cancel all pending and running jobs matching the filter."""
+    kwargs = _filter_kwargs(**jobs_filter.model_dump())
+    if not any(value is not None for value in kwargs.values()):
+        raise HTTPException(400, "at least one filter has to be provided")
+    requested_status = kwargs.pop("status") or CANCELLABLE_STATUSES
+    jobs = await resources.async_backend_db.jobs(
+        status=[
+            status for status in requested_status if status in CANCELLABLE_STATUSES
+        ],
+        fields=["job_name", "status"],
+        **kwargs,
+    )
+    # jobs may have left a cancellable status in the meantime
+    cancelled = (
+        set(
+            await resources.async_backend_db.set_many(
+                [job.job_id for job in jobs],
+                status=Status.cancelled,
+                if_status=CANCELLABLE_STATUSES,
+            )
+        )
+        if jobs
+        else set()
+    )
+    jobs = [job for job in jobs if job.job_id in cancelled]
+    if jobs:
+        for job in jobs:
+            job.status = Status.cancelled
+        # one message instead of one per job
+        background_tasks.add_task(
+            send_slack_message,
+            f"{status_emoji(Status.cancelled)} {mhub_settings.self_instance_name}: "
+            f"cancelling {len(jobs)} job(s): "
+            + ", ".join(f"*{job.job_name}*" for job in jobs),
+        )
+    return FastJSONResponse(feature_collection(jobs))
+
+
 @app.get("/jobs/{job_id}/results")
 async def get_job_results(
     job_id: str,
+    request: Request,
+    response: Response,
 ):
     """
     Return the results of a job.
@@ -284,10 +1089,19 @@ async def get_job_results(
     """
     # raise if Job ID not found
     try:
-        job = resources.backend_db.job(job_id)
+        validators = {}
+        if _is_conditional(request):
+            validators = _validators(
+                [await resources.async_backend_db.job(job_id, fields=["updated"])],
+                variant="results",
+            )
+            if _not_modified(request, validators):
+                return Response(status_code=304, headers=validators)
+        job = await resources.async_backend_db.job(job_id)
     except KeyError as exc:
         raise HTTPException(404, f"job {job_id} not found in the database") from exc
     if job.status == Status.done:
+        response.headers.update(validators or _validators([job], variant="results"))
         return job.result
 
     elif job.status in [
@@ -321,3 +1135,255 @@ async def get_job_results(
         )
     else:  # pragma: no cover
         raise ValueError(f"invalid job status: {job.status}")
+
+
+@app.get("/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str) -> List[Span]:
+    """Return spans recorded for the submission and execution of a job."""
+    try:
+        job = await resources.async_backend_db.job(job_id, fields=["trace_context"])
+    except KeyError as exc:
+        raise HTTPException(404, f"job {job_id} not found in the database") from exc
+    trace_context = getattr(job, "trace_context", None)
+    if not trace_context:
+        raise HTTPException(404, f"job {job_id} was not traced")
+    trace_id, _ = parse_traceparent(trace_context)
+    # the trace file can be large
+    return await asyncio.to_thread(tracer.spans, trace_id)
+
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Stream job updates as Server-Sent Events until the job has finished."""
+    try:
+        await resources.async_backend_db.job(job_id, fields=["status"])
+    except KeyError as exc:
+        raise HTTPException(404, f"job {job_id} not found in the database") from exc
+    return _event_stream_response(_job_events([job_id], until_finished=True))
+
+
+@app.get("/events")
+async def get_events(job_id: Optional[str] = None):
+    """Stream updates of all or given jobs as Server-Sent Events."""
+    job_ids = job_id.split(",") if job_id else None
+    return _event_stream_response(_job_events(job_ids))
+
+
+def _event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        # prevent proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _job_events(
+    job_ids: Optional[List[str]] = None, until_finished: bool = False
+) -> AsyncIterator[str]:
+    """
+    Yield Server-Sent Events of job updates.
+
+    If job_ids are given, the current state of these jobs is sent first.
+    """
+    finished = set()
+    known: Dict[str, Dict[str, Any]] = {}
+    loop = asyncio.get_running_loop()
+    # subscribe before reading the jobs so no update gets lost in between
+    with resources.job_events.subscribe(job_ids) as subscription:
+        for job_id in job_ids or []:
+            try:
+                job = await resources.async_backend_db.job(job_id, fields=EVENT_FIELDS)
+            except KeyError:
+                continue
+            known[job_id] = _event_attributes(job)
+            for event in _sse_events(job_id, known[job_id]):
+                yield event
+            if job.status in FINISHED_STATUSES:
+                finished.add(job_id)
+        keepalive_at = loop.time() + mhub_settings.event_stream_keepalive
+        while not (until_finished and job_ids and finished.issuperset(job_ids)):
+            received = await subscription.get(
+                timeout=max(keepalive_at - loop.time(), 0.0)
+            )
+            if not received:
+                # comment line which keeps idle connections open
+                yield ": keepalive\n\n"
+                keepalive_at = loop.time() + mhub_settings.event_stream_keepalive
+                continue
+            updates = _merge_updates(known, received)
+            for job_id, attributes in updates.items():
+                for event in _sse_events(job_id, attributes):
+                    yield event
+                if attributes.get("status") in FINISHED_STATUSES:
+                    finished.add(job_id)
+            if updates:
+                keepalive_at = loop.time() + mhub_settings.event_stream_keepalive
+
+
+def _event_attributes(job: Union[JobEntry, JobSummary]) -> Dict[str, Any]:
+    return job.model_dump(include=set(EVENT_FIELDS), exclude_none=True)
+
+
+def _merge_updates(
+    known: Dict[str, Dict[str, Any]], updates: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Remember job updates received as events and return the changed attributes."""
+    changed = {}
+    for job_id, attributes in updates.items():
+        if job_id in known:
+            attributes = {
+                key: value
+                for key, value in attributes.items()
+                if known[job_id].get(key) != value
+            }
+            known[job_id].update(attributes)
+            # progress is always sent with current and total
+            if attributes.keys() & {"current_progress", "total_progress"}:
+                attributes.update(
+                    {
+                        key: known[job_id][key]
+                        for key in ["current_progress", "total_progress"]
+                        if key in known[job_id]
+                    }
+                )
+        if attributes:
+            changed[job_id] = attributes
+    return changed
+
+
+def _sse_events(job_id: str, attributes: Dict[str, Any]) -> Iterator[str]:
+    """Convert updated job attributes into Server-Sent Events."""
+
+    def _event(event: str, **data) -> str:
+        return f"event: {event}\nid: {job_id}\ndata: {_dumps(dict(job_id=job_id, **data))}\n\n"
+
+    progress = {
+        key: attributes[key]
+        for key in ["current_progress", "total_progress"]
+        if key in attributes
+    }
+    if progress:
+        yield _event("progress", **progress)
+    if attributes.get("dask_dashboard_link"):
+        yield _event(
+            "dask_dashboard_link",
+            dask_dashboard_link=attributes["dask_dashboard_link"],
+        )
+    if "result" in attributes:
+        yield _event("result", result=attributes["result"])
+    # status comes last so clients can stop listening after a final status
+    if "status" in attributes:
+        yield _event("status", status=attributes["status"])
+
+
+def _variant(request: Request) -> str:
+    """Return query string without parameters not affecting the representation."""
+    return request.url.remove_query_params(["wait", "status_not"]).query
+
+
+def _validators(
+    jobs: List[Union[JobEntry, JobSummary]], variant: str = ""
+) -> Dict[str, str]:
+    """
+    Return ETag and Last-Modified headers derived from the updated timestamps.
+
+    variant distinguishes different representations of the same jobs, e.g. the
+    query string. No headers are returned if a job has no updated timestamp,
+    e.g. legacy jobs or responses not including the "updated" field.
+    """
+    timestamps: List[datetime] = []
+    etag = hashlib.sha1(variant.encode(), usedforsecurity=False)
+    for job in jobs:
+        updated: Optional[datetime] = getattr(job, "updated", None)
+        if updated is None:
+            return {}
+        timestamps.append(updated)
+        etag.update(f"{job.job_id}:{updated.isoformat()}".encode())
+    validators = {"ETag": f'"{etag.hexdigest()}"'}
+    if timestamps:
+        validators["Last-Modified"] = format_datetime(
+            max(timestamps).astimezone(timezone.utc), usegmt=True
+        )
+    return validators
+
+
+def _is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _not_modified(request: Request, validators: Dict[str, str]) -> bool:
+    """Evaluate If-None-Match and If-Modified-Since request headers."""
+    if not validators:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored if If-None-Match is present (RFC 9110)
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        return "*" in etags or validators["ETag"] in etags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in validators:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return parsedate_to_datetime(validators["Last-Modified"]) <= since
+    return False
+
+
+def _wait_seconds(wait: Optional[str] = None, prefer: Optional[str] = None) -> float:
+    """
+    Parse long-poll duration from wait parameter or 'Prefer: wait=N' header.
+
+    The duration is capped by the long_poll_max_wait setting.
+    """
+    if wait is None and prefer:
+        # e.g. "respond-async, wait=30"
+        for preference in prefer.replace(";", ",").split(","):
+            name, _, value = preference.strip().partition("=")
+            if name.lower() == "wait" and value:
+                wait = value
+                break
+    if not wait:
+        return 0.0
+    try:
+        seconds = (
+            float(wait)
+            if wait.replace(".", "", 1).isdigit()
+            else interval_to_timedelta(wait).total_seconds()
+        )
+    except ValueError as exc:
+        raise ValueError(f"invalid wait duration: {wait}") from exc
+    return min(max(seconds, 0.0), mhub_settings.long_poll_max_wait)
+
+
+async def _wait_for_job(
+    job_id: str, timeout: float, status_not: Optional[Set[Status]] = None
+) -> None:
+    """
+    Wait until job status or progress changes or until timeout.
+
+    If status_not is given, wait until the job status is none of these.
+    Raises KeyError if job does not exist.
+    """
+    # subscribe before reading the job so no update gets lost in between
+    with resources.job_events.subscribe([job_id]) as subscription:
+        job = await resources.async_backend_db.job(job_id, fields=EVENT_FIELDS)
+        known = {job_id: _event_attributes(job)}
+        if status_not is not None and job.status not in status_not:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            updates = _merge_updates(known, await subscription.get(timeout=remaining))
+            if status_not is None:
+                if updates.get(job_id, {}).keys() & {
+                    "status",
+                    "current_progress",
+                    "total_progress",
+                }:
+                    return
+            elif known[job_id].get("status") not in status_not:
+                return
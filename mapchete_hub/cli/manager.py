@@ -1,20 +1,17 @@
+from __future__ import annotations
+
 import logging
 import time
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 import click
 
 from mapchete_hub import __version__
 from mapchete_hub._log import setup_logger, LogLevels
-from mapchete_hub.db import init_backenddb
-from mapchete_hub.job_handler import KubernetesWorkerJobHandler
-from mapchete_hub.job_handler.k8s_worker import K8SJobEntry
 from mapchete_hub.settings import mhub_settings
-from mapchete_hub.timetools import (
-    date_to_str,
-    interval_to_timedelta,
-    passed_time_to_timestamp,
-)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mapchete_hub.job_handler.k8s_worker import K8SJobEntry
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +59,11 @@ def main():  # pragma: no cover
     is_flag=True,
     help="Adds mapchete loggers.",
 )
+@click.option(
+    "--metrics-port",
+    type=click.INT,
+    help="Expose Prometheus metrics on this port.",
+)
 def watch(
     since: str = "7d",
     inactive_since: str = "5h",
@@ -69,6 +71,7 @@ def watch(
     watch_interval: str = "3s",
     log_level: LogLevels = "info",
     add_mapchete_logger: bool = False,
+    metrics_port: Optional[int] = None,
 ):
     check_inactive_dashboard = not skip_dashboard_check
     setup_logger(log_level, add_mapchete_logger=add_mapchete_logger)
@@ -78,6 +81,18 @@ def watch(
         if mhub_settings.backend_db == "memory":
             raise ValueError("this command does not work with an in-memory db!")
 
+        from mapchete_hub.db import init_backenddb
+        from mapchete_hub.job_handler.k8s_worker import KubernetesWorkerJobHandler
+        from mapchete_hub.metrics import QUEUED_JOBS, RUNNING_JOBS, serve_metrics
+        from mapchete_hub.timetools import (
+            date_to_str,
+            interval_to_timedelta,
+            passed_time_to_timestamp,
+        )
+
+        if metrics_port:
+            serve_metrics(metrics_port)
+
         logger.debug("connecting to backend DB ...")
         with init_backenddb(mhub_settings.backend_db) as status_handler:
             logger.debug("creating KubernetesWorkerJobHandler ...")
@@ -95,6 +110,8 @@ def watch(
                         mhub_settings.max_parallel_jobs,
                         len(queued_jobs(all_jobs)),
                     )
+                    QUEUED_JOBS.set(len(queued_jobs(all_jobs)))
+                    RUNNING_JOBS.set(len(running_jobs(all_jobs)))
 
                     # check on running jobs and retry them if they are stalled
                     all_jobs = retry_stalled_jobs(
@@ -162,6 +179,10 @@ def clean(
         if mhub_settings.backend_db == "memory":
             raise ValueError("this command does not work with an in-memory db!")
 
+        from mapchete_hub.db import init_backenddb
+        from mapchete_hub.job_handler.k8s_worker import KubernetesWorkerJobHandler
+        from mapchete_hub.timetools import date_to_str, passed_time_to_timestamp
+
         logger.debug("connecting to backend DB ...")
         with init_backenddb(mhub_settings.backend_db) as status_handler:
             logger.debug("creating KubernetesWorkerJobHandler ...")
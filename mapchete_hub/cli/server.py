@@ -1,16 +1,26 @@
 """Mapchete command line tool with subcommands."""
 
+import logging
+import multiprocessing
 import os
+import signal
+import tempfile
+import threading
+from contextlib import ExitStack
+from multiprocessing.process import BaseProcess
 from typing import Optional
 
 import click
-import uvicorn
 
 from mapchete_hub import __version__
-from mapchete_hub._log import uvicorn_log_config
-from mapchete_hub.app import app
+from mapchete_hub._log import setup_logger, uvicorn_log_config
 from mapchete_hub.settings import mhub_settings, LogLevels
 
+logger = logging.getLogger(__name__)
+
+# import string instead of app object, so uvicorn can start worker processes
+APP = "mapchete_hub.app:app"
+
 
 @click.version_option(version=__version__, message="%(version)s")
 @click.group()
@@ -50,7 +60,10 @@ def main():  # pragma: no cover
     type=click.INT,
     default=1,
     show_default=True,
-    help="Number of uvicorn workers.",
+    help=(
+        "Number of uvicorn workers. Multiple workers require a database backend "
+        "and run jobs of the background-thread job handler in one executor process."
+    ),
 )
 def start(
     host: str,
@@ -58,15 +71,111 @@ def start(
     log_level: Optional[LogLevels] = None,
     add_mapchete_logger: bool = False,
     workers: int = 1,
+):
+    with ExitStack() as stack:
+        if workers > 1:
+            if mhub_settings.backend_db == "memory":
+                raise click.UsageError(
+                    "multiple workers require MHUB_BACKEND_DB to be set, as an "
+                    "in-memory database cannot be shared between processes"
+                )
+            # aggregate metrics of all worker processes
+            if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                os.environ["PROMETHEUS_MULTIPROC_DIR"] = stack.enter_context(
+                    tempfile.TemporaryDirectory(prefix="mhub-metrics-")
+                )
+            if mhub_settings.job_handler == "background-thread":
+                # API workers only queue jobs and one executor process runs them
+                os.environ["MHUB_JOB_HANDLER"] = "queue"
+                stack.callback(
+                    _stop_process,
+                    _start_executor_process(
+                        log_level=log_level, add_mapchete_logger=add_mapchete_logger
+                    ),
+                )
+
+        import uvicorn
+
+        # start server
+        uvicorn.run(
+            APP,
+            host=host,
+            port=port,
+            log_level=(log_level or mhub_settings.log_level).lower(),
+            log_config=uvicorn_log_config(
+                log_level=log_level, add_mapchete_logger=add_mapchete_logger
+            ),
+            workers=workers,
+        )
+
+
+@main.command(help="Run jobs queued by mapchete Hub servers using the queue handler.")
+@click.option(
+    "--add-mapchete-logger",
+    is_flag=True,
+    help="Adds mapchete loggers.",
+)
+@click.option(
+    "--log-level",
+    type=click.Choice(
+        ["critical", "error", "warning", "info", "debug", "notset"],
+        case_sensitive=False,
+    ),
+    help="Set log level.",
+)
+@click.option(
+    "--requeue-unowned-jobs",
+    is_flag=True,
+    help=(
+        "Queue active jobs without executor again, e.g. jobs of executors of "
+        "previous versions. Do not use if other job handlers share the database."
+    ),
+)
+def executor(
+    log_level: Optional[LogLevels] = None,
+    add_mapchete_logger: bool = False,
+    requeue_unowned_jobs: bool = False,
+):  # pragma: no cover
+    _run_executor(
+        log_level=log_level,
+        add_mapchete_logger=add_mapchete_logger,
+        requeue_unowned=requeue_unowned_jobs,
+    )
+
+
+def _run_executor(
+    log_level: Optional[LogLevels] = None,
+    add_mapchete_logger: bool = False,
+    requeue_unowned: bool = False,
 ):  # pragma: no cover
-    # start server
-    uvicorn.run(
-        app,
-        host=host,
-        port=port,
-        log_level=(log_level or mhub_settings.log_level).lower(),
-        log_config=uvicorn_log_config(
-            log_level=log_level, add_mapchete_logger=add_mapchete_logger
-        ),
-        workers=workers,
+    from mapchete_hub.job_handler.queue_executor import run_queue_executor
+
+    setup_logger(log_level, add_mapchete_logger=add_mapchete_logger)
+    logger.info("mhub executor online")
+    stop = threading.Event()
+    # stop polling but let active jobs finish
+    for signum in [signal.SIGINT, signal.SIGTERM]:
+        signal.signal(signum, lambda *_: stop.set())
+    run_queue_executor(stop=stop, requeue_unowned=requeue_unowned)
+
+
+def _start_executor_process(
+    log_level: Optional[LogLevels] = None, add_mapchete_logger: bool = False
+) -> BaseProcess:  # pragma: no cover
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_executor,
+        kwargs=dict(log_level=log_level, add_mapchete_logger=add_mapchete_logger),
+        name="mhub-executor",
     )
+    process.start()
+    logger.info("started executor process %s", process.pid)
+    return process
+
+
+def _stop_process(process: BaseProcess) -> None:  # pragma: no cover
+    logger.info("waiting for executor process %s to finish jobs ...", process.pid)
+    process.terminate()
+    try:
+        process.join()
+    except KeyboardInterrupt:
+        process.kill()
@@ -1,16 +1,9 @@
 import logging
 
 import click
-from distributed import LocalCluster
-from mapchete import Timer
-from mapchete.commands.observer import Observers
-from mapchete.enums import Status
 
 from mapchete_hub import __version__
 from mapchete_hub._log import LogLevels, setup_logger
-from mapchete_hub.db import init_backenddb
-from mapchete_hub.job_wrapper import job_wrapper
-from mapchete_hub.observers import DBUpdater, SlackMessenger
 from mapchete_hub.settings import mhub_settings
 
 logger = logging.getLogger(__name__)
@@ -48,6 +41,16 @@ def run_job(
         if mhub_settings.backend_db == "memory":
             raise ValueError("this command does not work with an in-memory db!")
 
+        # only import modules required to run a job after checking the settings
+        from distributed import LocalCluster
+        from mapchete import Timer
+        from mapchete.commands.observer import Observers
+        from mapchete.enums import Status
+
+        from mapchete_hub.db import init_backenddb
+        from mapchete_hub.job_wrapper import job_wrapper
+        from mapchete_hub.observers import DBUpdater, SlackMessenger
+
         logger.debug("connecting to backend DB ...")
         with init_backenddb(mhub_settings.backend_db) as backend_db:
             # read job entry from databast
@@ -62,6 +65,7 @@ def run_job(
                     backend_db=backend_db,
                     job_entry=job_entry,
                     event_rate_limit=mhub_settings.backend_db_event_rate_limit,
+                    cancel_check_interval=mhub_settings.backend_db_cancel_check_interval,
                 )
                 # initialize slack messenger observer
                 job_slack_messenger = SlackMessenger(
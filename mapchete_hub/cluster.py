@@ -1,24 +1,29 @@
 from __future__ import annotations
 
 import logging
-from contextlib import contextmanager
+import time
+from contextlib import ExitStack, contextmanager
 from enum import Enum
-from typing import Any, Dict, Generator, Optional, Union
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, Generator, Optional, Union
 
 from aiohttp import ServerConnectionError, ServerDisconnectedError, ServerTimeoutError
 from dask.distributed import Client, LocalCluster, get_client
-from dask_gateway import BasicAuth, Gateway, GatewayCluster
 from mapchete.config.models import DaskSettings, DaskSpecs
 from mapchete.executor import DaskExecutor
 from pydantic import Field
 from retry import retry
 
+from mapchete_hub.metrics import CLUSTER_PROVISIONING
 from mapchete_hub.settings import (
     MHubSettings,
-    DASK_DEFAULT_SPECS,
+    default_dask_specs,
     mhub_settings,
     update_gateway_cluster_options,
 )
+from mapchete_hub.tracing import traced, tracer
+
+if TYPE_CHECKING:  # pragma: no cover
+    from dask_gateway import GatewayCluster
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,8 @@ class ClusterSetup:
         settings = settings or mhub_settings
 
         if settings.dask_gateway_url:  # pragma: no cover
+            from dask_gateway import BasicAuth
+
             self.type = ClusterType.gateway
             self.url = settings.dask_gateway_url
             self.kwargs = dict(auth=BasicAuth(password=settings.dask_gateway_pass))
@@ -54,47 +61,58 @@ class ClusterSetup:
 @contextmanager
 def get_dask_executor(
     job_id: str,
-    dask_specs: DaskSpecs = DASK_DEFAULT_SPECS,
+    dask_specs: Optional[DaskSpecs] = None,
     dask_settings: DaskSettings = DaskSettings(),
     preprocessing_tasks: Optional[int] = None,
     tile_tasks: Optional[int] = None,
-    cluster_setup: ClusterSetup = ClusterSetup(),
+    cluster_setup: Optional[ClusterSetup] = None,
     local_cluster: Optional[LocalCluster] = None,
     **kwargs,
 ) -> Generator[DaskExecutor, None, None]:
+    dask_specs = dask_specs or default_dask_specs()
+    # read cluster setup from current settings
+    cluster_setup = cluster_setup or ClusterSetup()
     logger.info("requesting dask cluster and dask client for job %s...", job_id)
+    start = time.perf_counter()
+    executor_context: ContextManager[DaskExecutor]
     if cluster_setup.type == ClusterType.local:
         logger.warning(
             "Either MHUB_DASK_GATEWAY_URL and MHUB_DASK_GATEWAY_PASS or MHUB_DASK_SCHEDULER_URL have to be set. "
             "A LocalCluster is now being used."
         )
-        with local_cluster_executor(
+        executor_context = local_cluster_executor(
             cluster_setup=cluster_setup,
             dask_specs=dask_specs,
             dask_settings=dask_settings,
             preprocessing_tasks=preprocessing_tasks,
             tile_tasks=tile_tasks,
             local_cluster=local_cluster,
-        ) as executor:
-            yield executor
+        )
 
     elif cluster_setup.type == ClusterType.gateway:  # pragma: no cover
-        with gateway_cluster_executor(
+        executor_context = gateway_cluster_executor(
             cluster_setup=cluster_setup,
             dask_specs=dask_specs,
             dask_settings=dask_settings,
             preprocessing_tasks=preprocessing_tasks,
             tile_tasks=tile_tasks,
-        ) as executor:
-            yield executor
+        )
 
     elif cluster_setup.type == ClusterType.scheduler:  # pragma: no cover
-        with existing_scheduler_executor(cluster_setup=cluster_setup) as executor:
-            yield executor
+        executor_context = existing_scheduler_executor(cluster_setup=cluster_setup)
 
     else:  # pragma: no cover
         raise ValueError("invalid cluster setup: %s", cluster_setup)
 
+    with ExitStack() as stack:
+        # only trace cluster provisioning, not the job using the executor
+        with tracer.span(f"{cluster_setup.type.value}_cluster_executor", job_id=job_id):
+            executor = stack.enter_context(executor_context)
+        CLUSTER_PROVISIONING.labels(cluster_type=cluster_setup.type.value).observe(
+            time.perf_counter() - start
+        )
+        yield executor
+
 
 @contextmanager
 def local_cluster_executor(
@@ -153,7 +171,9 @@ def gateway_cluster_executor(
         - use this client to yield a mapchete DaskExecutor
     """
 
-    dask_specs = dask_specs or DASK_DEFAULT_SPECS
+    from dask_gateway import Gateway
+
+    dask_specs = dask_specs or default_dask_specs()
 
     # don't open Gateway connection in a context manager, because we don't need it
     # after creating the client
@@ -201,6 +221,7 @@ def existing_scheduler_executor(
     logger.debug("no client to close")
 
 
+@traced("cluster_adapt")
 def cluster_adapt(
     cluster_setup: ClusterSetup,
     cluster: Union[LocalCluster, GatewayCluster],
@@ -0,0 +1,277 @@
+"""
+Negotiated response compression.
+
+Compresses responses with zstd (if the zstandard package is installed) or
+gzip, depending on the Accept-Encoding request header. Streamed responses are
+compressed chunk by chunk and flushed after every chunk, so clients can decode
+features of a streamed job listing as soon as they arrive. Server-Sent Events
+are never compressed.
+
+Large chunks are compressed in a thread to not block the event loop. ETags of
+compressed responses get the content encoding as suffix, as they identify
+another representation than the uncompressed response.
+"""
+
+import asyncio
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_MEDIA_TYPES = {"text/event-stream"}
+
+
+def available_encodings() -> List[str]:
+    """Return supported content encodings in order of preference."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def negotiate_encoding(
+    accept_encoding: str, encodings: Optional[List[str]] = None
+) -> Optional[str]:
+    """
+    Select content encoding from an Accept-Encoding header.
+
+    Encodings with a higher quality value win, on equal quality the order of
+    encodings decides. Returns None if no encoding is acceptable.
+    """
+    encodings = available_encodings() if encodings is None else encodings
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    candidates = [
+        (qualities.get(encoding, qualities.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(encodings)
+    ]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+
+class Compressor(ABC):
+    """Compress one response body chunk by chunk."""
+
+    content_encoding: str
+
+    @abstractmethod
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        """Compress chunk and flush, finish the stream if more_body is False."""
+
+
+class GzipCompressor(Compressor):
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.compress(body) + self.compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        return self.compressor.compress(body) + self.compressor.flush()
+
+
+class ZstdCompressor(Compressor):
+    content_encoding = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.compress(body) + self.compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        return self.compressor.compress(body) + self.compressor.flush()
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Return ETag of the representation compressed with encoding."""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def decoded_etags(etags: str, encoding: str) -> str:
+    """Remove encoding suffix from a list of ETags, e.g. from If-None-Match."""
+    suffix = f'-{encoding}"'
+    return ", ".join(
+        f'{etag[: -len(suffix)]}"' if etag.endswith(suffix) else etag
+        for etag in (etag.strip() for etag in etags.split(","))
+    )
+
+
+class CompressionResponder:
+    """
+    Compress the response of one request.
+
+    The response start is held back until the first body chunk has arrived, as
+    the headers depend on whether the body gets compressed.
+    """
+
+    send: Send
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        compressor: Compressor,
+        minimum_size: int,
+        thread_minimum_size: int,
+    ) -> None:
+        self.app = app
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.encoded_etags = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        # validators of the compressed representation refer to the uncompressed one
+        headers = MutableHeaders(scope=scope)
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            decoded = decoded_etags(if_none_match, self.compressor.content_encoding)
+            self.encoded_etags = decoded != if_none_match
+            headers["If-None-Match"] = decoded
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if message["status"] == 304:
+                # the client expects the ETag it has sent
+                if self.encoded_etags:
+                    self._encode_etag(message)
+                self.passthrough = True
+            elif (
+                "Content-Encoding" in headers
+                or message["status"] == 206
+                or _excluded(headers)
+            ):
+                self.passthrough = True
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        elif self.passthrough or message["type"] != "http.response.body":
+            # e.g. http.response.pathsend is not compressed
+            if self.start is not None:
+                await self.send(self.start)
+                self.start = None
+                self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is None:
+            # remaining chunks of a streamed response
+            await self.send(dict(message, body=await self._compress(body, more_body)))
+            return
+
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if len(body) < self.minimum_size and not more_body:
+            # small responses are not compressed
+            self.passthrough = True
+        else:
+            body = await self._compress(body, more_body)
+            headers["Content-Encoding"] = self.compressor.content_encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            self._encode_etag(start)
+            message = dict(message, body=body)
+        await self.send(start)
+        await self.send(message)
+
+    def _encode_etag(self, start: Message) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        etag = headers.get("ETag")
+        if etag is not None:
+            headers["ETag"] = encoded_etag(etag, self.compressor.content_encoding)
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            # compressing large chunks would block the event loop
+            return await asyncio.to_thread(self.compressor.compress, body, more_body)
+        return self.compressor.compress(body, more_body)
+
+
+class CompressionMiddleware:
+    """Compress responses larger than minimum_size with zstd or gzip."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        thread_minimum_size: int = 128 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.thread_minimum_size = thread_minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":  # pragma: no cover
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        compressor: Compressor
+        if encoding == "zstd":
+            compressor = ZstdCompressor(self.zstd_level)
+        elif encoding == "gzip":
+            compressor = GzipCompressor(self.gzip_level)
+        else:
+            await self.app(scope, receive, _send_with_vary(send))
+            return
+        await CompressionResponder(
+            self.app,
+            compressor,
+            minimum_size=self.minimum_size,
+            thread_minimum_size=self.thread_minimum_size,
+        )(scope, receive, send)
+
+
+def _excluded(headers: Headers) -> bool:
+    media_type = headers.get("Content-Type", "").partition(";")[0].strip().lower()
+    return media_type in EXCLUDED_MEDIA_TYPES
+
+
+def _send_with_vary(send: Send) -> Send:
+    """Mark uncompressed responses as depending on Accept-Encoding."""
+
+    async def _send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            if not _excluded(headers):
+                headers.add_vary_header("Accept-Encoding")
+        await send(message)
+
+    return _send
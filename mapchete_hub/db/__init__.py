@@ -1,11 +1,10 @@
-from contextlib import contextmanager
-from typing import Any, Generator
+import sys
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Generator, Optional
 
-import mongomock
-
-from mapchete_hub.db.base import BaseStatusHandler
-from mapchete_hub.db.memory import MemoryStatusHandler
-from mapchete_hub.db.mongodb import MongoDBStatusHandler
+from mapchete_hub.db.base import AsyncBaseStatusHandler, BaseStatusHandler
+from mapchete_hub.db.memory import AsyncMemoryStatusHandler, MemoryStatusHandler
+from mapchete_hub.db.mongodb import AsyncMongoDBStatusHandler, MongoDBStatusHandler
 
 
 @contextmanager
@@ -13,7 +12,7 @@ def init_backenddb(src: Any) -> Generator[BaseStatusHandler, None, None]:
     if isinstance(src, str) and src.startswith("mongodb"):  # pragma: no cover
         with MongoDBStatusHandler(db_uri=src) as db:
             yield db
-    elif isinstance(src, mongomock.database.Database):
+    elif _is_mongomock_database(src):
         with MongoDBStatusHandler(database=src) as db:
             yield db
     elif isinstance(src, str) and src == "memory":
@@ -21,3 +20,35 @@ def init_backenddb(src: Any) -> Generator[BaseStatusHandler, None, None]:
             yield db
     else:  # pragma: no cover
         raise NotImplementedError(f"backend {src} of type {type(src)}")
+
+
+@asynccontextmanager
+async def init_async_backenddb(
+    src: Any, status_handler: Optional[BaseStatusHandler] = None
+) -> AsyncGenerator[AsyncBaseStatusHandler, None]:
+    """
+    Initialize asynchronous status handler.
+
+    An in-memory backend can only be shared if the existing synchronous
+    MemoryStatusHandler is passed on as status_handler.
+    """
+    if isinstance(src, str) and src.startswith("mongodb"):  # pragma: no cover
+        async with AsyncMongoDBStatusHandler(db_uri=src) as db:
+            yield db
+    elif isinstance(src, str) and src == "memory":
+        if status_handler is not None and not isinstance(
+            status_handler, MemoryStatusHandler
+        ):  # pragma: no cover
+            raise TypeError(
+                f"in-memory backend cannot be shared with {type(status_handler)}"
+            )
+        async with AsyncMemoryStatusHandler(status_handler=status_handler) as db:
+            yield db
+    else:  # pragma: no cover
+        raise NotImplementedError(f"backend {src} of type {type(src)}")
+
+
+def _is_mongomock_database(src: Any) -> bool:
+    # mongomock is only used in tests, so it is not imported otherwise
+    mongomock = sys.modules.get("mongomock")
+    return mongomock is not None and isinstance(src, mongomock.database.Database)
@@ -2,23 +2,192 @@
 Abstraction classes for database.
 """
 
+import asyncio
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+    overload,
+)
 
 from mapchete.enums import Status
 from mapchete.types import Progress
 
-from mapchete_hub.models import JobEntry, MapcheteJob
+from mapchete_hub.geometry import backend_process_areas
+from mapchete_hub.metrics import instrument_status_handler
+from mapchete_hub.models import (
+    DEFAULT_SORT,
+    IdempotencyKey,
+    JobEntry,
+    JobsCursor,
+    JobStats,
+    JobSummary,
+    MapcheteJob,
+)
 
 logger = logging.getLogger(__name__)
 
+JobListener = Callable[[str, Dict[str, Any]], None]
 
-class BaseStatusHandler(ABC):
+
+class JobListenersMixin:
+    """
+    Notify listeners about job updates written by this status handler.
+
+    Listeners are called with the job ID and the updated attributes from
+    within the thread which wrote the update, so they have to return quickly.
+    """
+
+    _listeners: Optional[List[JobListener]] = None
+
+    def add_listener(self, listener: JobListener) -> None:
+        if self._listeners is None:
+            self._listeners = []
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        if self._listeners and listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, job_id: str, attributes: Dict[str, Any]) -> None:
+        for listener in self._listeners or []:
+            try:
+                listener(job_id, attributes)
+            except Exception as exc:  # pragma: no cover
+                logger.exception("job listener %s failed: %s", listener, exc)
+
+
+class WriteBehindMixin:
+    """
+    Buffer progress updates passed to update_job() and write them in batches.
+
+    Only the latest progress of each job is kept and written every
+    write_behind_interval seconds by a background thread. Any other update,
+    e.g. a status transition, is written immediately together with the
+    buffered progress of its job, so terminal states are never delayed or
+    overwritten by older progress. stop_write_behind() has to be called when
+    the status handler is closed.
+    """
+
+    write_behind_interval: float = 0.0
+    _pending_progress: Optional[Dict[str, Progress]] = None
+    _write_behind_thread: Optional[threading.Thread] = None
+
+    def enable_write_behind(self, interval: float) -> None:
+        """Buffer progress updates if interval is greater than 0."""
+        if interval <= 0:
+            return
+        self.write_behind_interval = interval
+        self._pending_progress = {}
+        self._pending_lock = threading.Lock()
+        # keeps order of buffered and immediate writes
+        self._write_lock = threading.RLock()
+        self._write_behind_stop = threading.Event()
+
+    def write_progress(self, progress: Dict[str, Progress]) -> None:
+        """
+        Write progress of multiple jobs.
+
+        Backends should override this to write all jobs at once.
+        """
+        for job_id, job_progress in progress.items():
+            self._update_job(job_id, progress=job_progress)  # type: ignore
+
+    def flush(self) -> None:
+        """Write buffered progress updates."""
+        if self._pending_progress is None:
+            return
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending_progress = self._pending_progress, {}
+            if pending:
+                logger.debug("write buffered progress of %s jobs", len(pending))
+                self.write_progress(pending)
+
+    def stop_write_behind(self) -> None:
+        """Stop background thread and write buffered progress updates."""
+        if self._write_behind_thread is not None:
+            self._write_behind_stop.set()
+            self._write_behind_thread.join()
+            self._write_behind_thread = None
+            self._write_behind_stop.clear()
+        self.flush()
+
+    def _buffer_progress(self, job_id: str, **kwargs) -> bool:
+        """Buffer update and return True if it only contains progress."""
+        progress = kwargs.get("progress")
+        if self._pending_progress is None or progress is None:
+            return False
+        elif any(v is not None for k, v in kwargs.items() if k != "progress"):
+            return False
+        with self._pending_lock:
+            self._pending_progress[job_id] = merge_progress(
+                self._pending_progress.get(job_id), progress
+            )
+            if self._write_behind_thread is None:
+                self._write_behind_thread = threading.Thread(
+                    target=self._write_behind_loop, name="write-behind", daemon=True
+                )
+                self._write_behind_thread.start()
+        return True
+
+    def _pop_pending_progress(
+        self, job_id: str, progress: Optional[Progress] = None
+    ) -> Optional[Progress]:
+        """Remove buffered progress of job and merge it with a newer progress."""
+        if self._pending_progress is None:
+            return progress
+        with self._pending_lock:
+            pending = self._pending_progress.pop(job_id, None)
+        if pending is None:
+            return progress
+        return merge_progress(pending, progress) if progress else pending
+
+    def _ordered_write(self) -> ContextManager:
+        """Keep immediate writes from overtaking a running flush."""
+        if self._pending_progress is None:
+            return nullcontext()
+        return self._write_lock
+
+    def _write_behind_loop(self) -> None:
+        while not self._write_behind_stop.wait(self.write_behind_interval):
+            try:
+                self.flush()
+            except Exception as exc:  # pragma: no cover
+                # newer progress will be buffered with the next update anyway
+                logger.exception("cannot write buffered progress: %s", exc)
+
+
+class BaseStatusHandler(JobListenersMixin, WriteBehindMixin, ABC):
     """Base functions for status handler."""
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # observe call durations of all implementations
+        instrument_status_handler(cls)
+
+    @overload
+    def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
     @abstractmethod
-    def jobs(self, **kwargs) -> List[JobEntry]:
+    def jobs(self, **kwargs) -> Sequence[Union[JobEntry, JobSummary]]:
         """
         Return jobs as list of GeoJSON features.
 
@@ -38,14 +207,50 @@ class BaseStatusHandler(ABC):
             Filter by earliest date.
         to_date : str
             Filter by latest date.
+        job_ids : list
+            Filter by job IDs.
+        limit : int
+            Maximum number of jobs to return.
+        sort : str
+            Sort by 'updated' or 'submitted', prefix with '-' for descending order.
+        cursor : JobsCursor
+            Only return jobs after this position.
+        fields : list
+            Only read these fields from the backend and return JobSummary objects.
 
         Returns
         -------
         GeoJSON features : list of dict
         """
 
+    def count(self, **kwargs) -> int:
+        """
+        Return the number of jobs matching the jobs() filters.
+
+        Backends should override this to count jobs without reading them.
+        """
+        return len(self.jobs(fields=["job_id"], **kwargs))
+
+    def status_counts(self, **kwargs) -> Dict[Status, int]:
+        """
+        Return the number of jobs per status matching the jobs() filters.
+
+        Backends should override this to count jobs without reading them.
+        """
+        return dict(
+            Counter(job.status for job in self.jobs(fields=["status"], **kwargs))
+        )
+
+    @overload
+    def job(self, job_id, fields: None = None) -> JobEntry: ...
+
+    @overload
+    def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
     @abstractmethod
-    def job(self, job_id) -> JobEntry:
+    def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
         """
         Return job as GeoJSON feature.
 
@@ -53,6 +258,8 @@ class BaseStatusHandler(ABC):
         ----------
         job_id : str
             Unique job ID.
+        fields : list
+            Only read these fields from the backend and return a JobSummary.
 
         Returns
         -------
@@ -60,11 +267,58 @@ class BaseStatusHandler(ABC):
         """
 
     @abstractmethod
-    def new(self, job_config: MapcheteJob) -> JobEntry:
+    def status(self, job_id) -> Status:
+        """
+        Return only the current status of a job.
+
+        Backends should read just the status field, as this is polled while
+        a job is running.
+        """
+
+    def is_cancelled(self, job_id) -> bool:
+        """Return whether job was cancelled."""
+        return self.status(job_id) == Status.cancelled
+
+    @abstractmethod
+    def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> JobEntry:
         """
         Create new job entry in database.
+
+        The process area is calculated from job_config if not provided.
+        client_id identifies the submitting client and trace_context is the
+        traceparent of the submission.
         """
 
+    def new_many(
+        self,
+        job_configs: List[MapcheteJob],
+        process_areas: Optional[List[dict]] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> List[JobEntry]:
+        """
+        Create multiple job entries in database.
+
+        Process areas are calculated in parallel if not provided.
+        """
+        if process_areas is None:
+            process_areas = backend_process_areas(job_configs)
+        return [
+            self.new(
+                job_config,
+                process_area=process_area,
+                client_id=client_id,
+                trace_context=trace_context,
+            )
+            for job_config, process_area in zip(job_configs, process_areas)
+        ]
+
     @abstractmethod
     def set(
         self,
@@ -82,6 +336,86 @@ class BaseStatusHandler(ABC):
         Set job metadata.
         """
 
+    def update_job(self, job_id: str, **kwargs) -> None:
+        """
+        Set job metadata like set() without returning the updated job.
+
+        Updates only containing progress are buffered if write-behind is
+        enabled.
+        """
+        if self._buffer_progress(job_id, **kwargs):
+            return
+        with self._ordered_write():
+            kwargs.update(
+                progress=self._pop_pending_progress(job_id, kwargs.get("progress"))
+            )
+            self._update_job(job_id, **kwargs)
+
+    def _update_job(self, job_id: str, **kwargs) -> None:
+        """Backends should override this if reading back the job is expensive."""
+        self.set(job_id, **kwargs)
+
+    def set_many(
+        self,
+        job_ids: List[str],
+        status: Optional[Status] = None,
+        if_status: Optional[List[Status]] = None,
+        **kwargs,
+    ) -> List[str]:
+        """
+        Set metadata of multiple jobs and return the IDs of updated jobs.
+
+        If if_status is given, only jobs currently having one of these statuses
+        are updated. Contrary to set(), the runtime of finished jobs is not
+        calculated.
+        """
+        updated = []
+        for job_id in job_ids:
+            if if_status is None or self.job(job_id, fields=["status"]).status in (
+                if_status
+            ):
+                self.set(job_id, status=status, **kwargs)
+                updated.append(job_id)
+        return updated
+
+    @abstractmethod
+    def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        """
+        Return aggregated statistics of jobs.
+
+        Jobs can be filtered like in jobs(). Counts per status, the number of
+        queued (pending) jobs and runtime/queue wait percentiles per process and
+        per time bucket of bucket_size seconds (by submission time) are computed
+        within the backend without reading the jobs themselves.
+        """
+
+    @abstractmethod
+    def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        """
+        Store a new idempotency key.
+
+        Returns None if the key was stored. If the key has already been used
+        within MHUB_IDEMPOTENCY_KEY_TTL, the existing record is returned.
+        """
+
+    @abstractmethod
+    def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        """Assign the job created for a claimed idempotency key."""
+
+    @abstractmethod
+    def release_idempotency_key(self, key: str) -> None:
+        """Remove idempotency key, e.g. if no job could be created."""
+
+    @abstractmethod
+    def executor_heartbeat(self, executor_id: str) -> None:
+        """Record that a queue executor is alive."""
+
+    @abstractmethod
+    def live_executors(self, timeout: float) -> Set[str]:
+        """Return queue executors with a heartbeat within the last timeout seconds."""
+
     def __enter__(self):
         """Enter context."""
         return self
@@ -89,3 +423,252 @@ class BaseStatusHandler(ABC):
     def __exit__(self, *args):
         """Exit context."""
         return
+
+
+class AsyncBaseStatusHandler(JobListenersMixin, ABC):
+    """
+    Base functions for asynchronous status handler.
+
+    This mirrors BaseStatusHandler but can be awaited from within the event loop
+    of the REST API without blocking other requests.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_status_handler(cls)
+
+    @overload
+    async def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    async def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
+    @abstractmethod
+    async def jobs(self, **kwargs) -> Sequence[Union[JobEntry, JobSummary]]:
+        """
+        Return jobs as list of GeoJSON features.
+
+        Accepts the same filters as BaseStatusHandler.jobs().
+        """
+
+    async def iter_jobs(
+        self, **kwargs
+    ) -> AsyncGenerator[Union[JobEntry, JobSummary], None]:
+        """
+        Iterate over jobs.
+
+        Accepts the same filters as jobs(). Backends which can read from a
+        database cursor should override this to yield each job as soon as it
+        is read instead of collecting all of them first.
+        """
+        for job in await self.jobs(**kwargs):
+            yield job
+
+    async def count(self, **kwargs) -> int:
+        """Return the number of jobs matching the jobs() filters."""
+        return len(await self.jobs(fields=["job_id"], **kwargs))
+
+    async def status_counts(self, **kwargs) -> Dict[Status, int]:
+        """Return the number of jobs per status matching the jobs() filters."""
+        return dict(
+            Counter(job.status for job in await self.jobs(fields=["status"], **kwargs))
+        )
+
+    @overload
+    async def job(self, job_id, fields: None = None) -> JobEntry: ...
+
+    @overload
+    async def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
+    @abstractmethod
+    async def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
+        """
+        Return job as GeoJSON feature.
+
+        Parameters
+        ----------
+        job_id : str
+            Unique job ID.
+        fields : list
+            Only read these fields from the backend and return a JobSummary.
+
+        Returns
+        -------
+        GeoJSON feature or None
+        """
+
+    @abstractmethod
+    async def status(self, job_id) -> Status:
+        """Return only the current status of a job."""
+
+    async def is_cancelled(self, job_id) -> bool:
+        """Return whether job was cancelled."""
+        return await self.status(job_id) == Status.cancelled
+
+    @abstractmethod
+    async def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> JobEntry:
+        """
+        Create new job entry in database.
+
+        The process area is calculated from job_config if not provided.
+        client_id identifies the submitting client and trace_context is the
+        traceparent of the submission.
+        """
+
+    async def new_many(
+        self,
+        job_configs: List[MapcheteJob],
+        process_areas: Optional[List[dict]] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> List[JobEntry]:
+        """
+        Create multiple job entries in database.
+
+        Process areas are calculated in parallel threads if not provided.
+        """
+        if process_areas is None:
+            process_areas = await asyncio.to_thread(backend_process_areas, job_configs)
+        return [
+            await self.new(
+                job_config,
+                process_area=process_area,
+                client_id=client_id,
+                trace_context=trace_context,
+            )
+            for job_config, process_area in zip(job_configs, process_areas)
+        ]
+
+    @abstractmethod
+    async def set(
+        self,
+        job_id: str,
+        status: Optional[Status] = None,
+        progress: Optional[Progress] = None,
+        exception: Optional[str] = None,
+        traceback: Optional[str] = None,
+        dask_dashboard_link: Optional[str] = None,
+        dask_specs: Optional[dict] = None,
+        results: Optional[str] = None,
+        **kwargs,
+    ) -> JobEntry:
+        """
+        Set job metadata.
+        """
+
+    async def update_job(self, job_id: str, **kwargs) -> None:
+        """
+        Set job metadata like set() without returning the updated job.
+
+        Backends should override this if reading back the job is expensive.
+        """
+        await self.set(job_id, **kwargs)
+
+    async def set_many(
+        self,
+        job_ids: List[str],
+        status: Optional[Status] = None,
+        if_status: Optional[List[Status]] = None,
+        **kwargs,
+    ) -> List[str]:
+        """
+        Set metadata of multiple jobs and return the IDs of updated jobs.
+
+        Accepts the same arguments as BaseStatusHandler.set_many().
+        """
+        updated = []
+        for job_id in job_ids:
+            if (
+                if_status is None
+                or (await self.job(job_id, fields=["status"])).status in if_status
+            ):
+                await self.set(job_id, status=status, **kwargs)
+                updated.append(job_id)
+        return updated
+
+    @abstractmethod
+    async def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        """
+        Return aggregated statistics of jobs.
+
+        Accepts the same arguments as BaseStatusHandler.stats().
+        """
+
+    @abstractmethod
+    async def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        """
+        Store a new idempotency key.
+
+        Accepts the same arguments as BaseStatusHandler.claim_idempotency_key().
+        """
+
+    @abstractmethod
+    async def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        """Assign the job created for a claimed idempotency key."""
+
+    @abstractmethod
+    async def release_idempotency_key(self, key: str) -> None:
+        """Remove idempotency key, e.g. if no job could be created."""
+
+    async def __aenter__(self):
+        """Enter context."""
+        return self
+
+    async def __aexit__(self, *args):
+        """Exit context."""
+        return
+
+
+def new_job_attributes(job: JobEntry) -> Dict[str, Any]:
+    """Attributes of a newly created job passed on to job listeners."""
+    return dict(status=job.status, submitted=job.submitted, updated=job.updated)
+
+
+def new_idempotency_key(key: str, fingerprint: Optional[str] = None) -> IdempotencyKey:
+    """Create a new idempotency key record which is not yet bound to a job."""
+    # MongoDB only stores milliseconds
+    now = datetime.now(timezone.utc)
+    return IdempotencyKey(
+        key=key,
+        fingerprint=fingerprint,
+        created=now.replace(microsecond=now.microsecond // 1000 * 1000),
+    )
+
+
+def page_sort(
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[JobsCursor] = None,
+) -> Optional[str]:
+    """
+    Determine sort order of a jobs query.
+
+    Paginated queries always need a stable order, so DEFAULT_SORT is used if
+    no sort order was requested.
+    """
+    if cursor is not None:
+        if sort is not None and sort != cursor.sort:
+            raise ValueError(
+                f"cursor was created with sort order {cursor.sort} and not {sort}"
+            )
+        return cursor.sort
+    elif sort is None and limit is not None:
+        return DEFAULT_SORT
+    return sort
+
+
+def merge_progress(old: Optional[Progress], new: Progress) -> Progress:
+    """Return new progress, keeping the total of old progress if not given."""
+    if old is None or new.total is not None:
+        return new
+    return Progress(current=new.current, total=old.total)
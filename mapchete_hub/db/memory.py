@@ -1,17 +1,39 @@
 import logging
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Union, overload
 from uuid import uuid4
 
+import numpy as np
 from mapchete.enums import Status
 from mapchete.types import Progress
 from shapely import to_wkt
 from shapely.geometry import box, shape
 
-from mapchete_hub.db.base import BaseStatusHandler
-from mapchete_hub.geometry import process_area_from_config
-from mapchete_hub.models import JobEntry, MapcheteJob
+from mapchete_hub.db.base import (
+    AsyncBaseStatusHandler,
+    BaseStatusHandler,
+    JobListener,
+    new_idempotency_key,
+    new_job_attributes,
+    page_sort,
+)
+from mapchete_hub.geometry import backend_process_area
+from mapchete_hub.models import (
+    STATS_PERCENTILES,
+    BucketStats,
+    DurationStats,
+    GroupStats,
+    IdempotencyKey,
+    JobEntry,
+    JobsCursor,
+    JobStats,
+    JobSummary,
+    MapcheteJob,
+    parse_sort,
+    process_label,
+)
 from mapchete_hub.random_names import random_name
 from mapchete_hub.settings import mhub_settings
 from mapchete_hub.timetools import parse_to_date
@@ -23,22 +45,51 @@ class MemoryStatusHandler(BaseStatusHandler):
     """Abstraction layer over in-memory backend."""
 
     _jobs: Dict[str, JobEntry]
+    _idempotency_keys: Dict[str, IdempotencyKey]
+    _executors: Dict[str, datetime]
 
     def __init__(self, *args, **kwargs):
-        pass
+        self._lock = threading.Lock()
 
     def __enter__(self):
         self._jobs = {}
+        self._idempotency_keys = {}
+        self._executors = {}
         logger.debug("enter MemoryStatusHandler")
         return self
 
     def __exit__(self, *args, **kwargs):
         logger.debug("exit MemoryStatusHandler")
+        self.stop_write_behind()
 
-    def job(self, job_id) -> JobEntry:
-        return self._jobs[job_id]
+    @overload
+    def job(self, job_id, fields: None = None) -> JobEntry: ...
 
-    def jobs(self, **kwargs) -> List[JobEntry]:
+    @overload
+    def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
+    def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
+        return project(self._jobs[job_id], fields)
+
+    def status(self, job_id) -> Status:
+        return self._jobs[job_id].status
+
+    @overload
+    def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
+    def jobs(
+        self,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[JobsCursor] = None,
+        fields: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Sequence[Union[JobEntry, JobSummary]]:
         query = {k: v for k, v in kwargs.items() if v is not None}
 
         logger.debug("raw query: %s", query)
@@ -75,6 +126,9 @@ class MemoryStatusHandler(BaseStatusHandler):
                 elif field == "to_date":
                     if not _updated_until(job, value):
                         break
+                elif field == "job_ids":
+                    if job.job_id not in value:
+                        break
                 elif field == "status":
                     status = value if isinstance(value, list) else [value]
                     status = [Status[status] for status in status]
@@ -87,9 +141,39 @@ class MemoryStatusHandler(BaseStatusHandler):
                     result.append(job)
                 except Exception as exc:  # pragma: no cover
                     logger.exception("cannot create GeoJSON from entry: %s", exc)
-        return result
 
-    def new(self, job_config: MapcheteJob):
+        sort = page_sort(sort=sort, limit=limit, cursor=cursor)
+        if sort:
+            sort_field, descending = parse_sort(sort)
+
+            def _sort_key(job: JobEntry):
+                return (parse_to_date(getattr(job, sort_field.value)), job.job_id)
+
+            result.sort(key=_sort_key, reverse=descending)
+            if cursor:
+                position = (cursor.value, cursor.job_id)
+                result = [
+                    job
+                    for job in result
+                    if (
+                        _sort_key(job) < position
+                        if descending
+                        else _sort_key(job) > position
+                    )
+                ]
+        if limit is not None:
+            result = result[:limit]
+        if fields is not None and sort:
+            fields = list(fields) + [parse_sort(sort)[0].value]
+        return [project(job, fields) for job in result]
+
+    def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ):
         """
         Create new job entry in database.
         """
@@ -97,9 +181,7 @@ class MemoryStatusHandler(BaseStatusHandler):
         logger.debug(
             f"got new job with config {job_config} and assigning job ID {job_id}"
         )
-        process_area = process_area_from_config(
-            job_config, dst_crs=os.environ.get("MHUB_BACKEND_CRS", "EPSG:4326")
-        )[0]
+        process_area = process_area or backend_process_area(job_config)
 
         submitted = datetime.now(timezone.utc)
         job_entry = JobEntry.from_dict(
@@ -117,9 +199,12 @@ class MemoryStatusHandler(BaseStatusHandler):
                 updated=submitted,
                 job_name=job_config.params.get("job_name") or random_name(),
                 dask_specs=job_config.params.get("dask_specs", dict()),
+                client_id=client_id,
+                trace_context=trace_context,
             )
         )
         self._jobs[job_id] = job_entry
+        self._notify(job_id, new_job_attributes(job_entry))
         return self.job(job_id)
 
     def set(
@@ -169,4 +254,235 @@ class MemoryStatusHandler(BaseStatusHandler):
         entry.update(updated=timestamp)
 
         self._jobs[job_id] = entry
+        self._notify(job_id, dict(new_attributes, updated=timestamp))
         return self.job(job_id)
+
+    def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        return job_stats(self.jobs(**kwargs), bucket_size=bucket_size)
+
+    def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        with self._lock:
+            existing = self._idempotency_keys.get(key)
+            if existing and not existing.expired(
+                mhub_settings.idempotency_key_ttl, mhub_settings.idempotency_claim_ttl
+            ):
+                return existing
+            self._idempotency_keys[key] = new_idempotency_key(key, fingerprint)
+            return None
+
+    def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        with self._lock:
+            self._idempotency_keys[key].job_id = job_id
+
+    def release_idempotency_key(self, key: str) -> None:
+        with self._lock:
+            self._idempotency_keys.pop(key, None)
+
+    def executor_heartbeat(self, executor_id: str) -> None:
+        self._executors[executor_id] = datetime.now(timezone.utc)
+
+    def live_executors(self, timeout: float) -> Set[str]:
+        since = datetime.now(timezone.utc) - timedelta(seconds=timeout)
+        return {
+            executor_id
+            for executor_id, heartbeat in self._executors.items()
+            if heartbeat >= since
+        }
+
+
+class AsyncMemoryStatusHandler(AsyncBaseStatusHandler):
+    """
+    Asynchronous abstraction layer over in-memory backend.
+
+    As the in-memory backend never blocks on I/O, this simply wraps a
+    MemoryStatusHandler. Pass on an existing instance to share its jobs with
+    synchronous consumers such as the job handler.
+    """
+
+    _status_handler: MemoryStatusHandler
+    _owns_status_handler: bool = False
+
+    def __init__(self, status_handler: Optional[MemoryStatusHandler] = None):
+        if status_handler is None:
+            self._status_handler = MemoryStatusHandler()
+            self._owns_status_handler = True
+        else:
+            self._status_handler = status_handler
+
+    async def __aenter__(self):
+        if self._owns_status_handler:
+            self._status_handler.__enter__()
+        logger.debug("enter AsyncMemoryStatusHandler")
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        logger.debug("exit AsyncMemoryStatusHandler")
+        if self._owns_status_handler:
+            self._status_handler.__exit__(*args)
+
+    def add_listener(self, listener: JobListener) -> None:
+        # all updates are written by the wrapped status handler
+        self._status_handler.add_listener(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        self._status_handler.remove_listener(listener)
+
+    @overload
+    async def job(self, job_id, fields: None = None) -> JobEntry: ...
+
+    @overload
+    async def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
+    async def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
+        return self._status_handler.job(job_id, fields=fields)
+
+    async def status(self, job_id) -> Status:
+        return self._status_handler.status(job_id)
+
+    @overload
+    async def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    async def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
+    async def jobs(self, **kwargs) -> Sequence[Union[JobEntry, JobSummary]]:
+        return self._status_handler.jobs(**kwargs)
+
+    async def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> JobEntry:
+        return self._status_handler.new(
+            job_config,
+            process_area=process_area,
+            client_id=client_id,
+            trace_context=trace_context,
+        )
+
+    async def set(
+        self,
+        job_id: str,
+        status: Optional[Status] = None,
+        progress: Optional[Progress] = None,
+        exception: Optional[str] = None,
+        traceback: Optional[str] = None,
+        dask_dashboard_link: Optional[str] = None,
+        dask_specs: Optional[dict] = None,
+        results: Optional[str] = None,
+        **kwargs,
+    ) -> JobEntry:
+        return self._status_handler.set(
+            job_id,
+            status=status,
+            progress=progress,
+            exception=exception,
+            traceback=traceback,
+            dask_dashboard_link=dask_dashboard_link,
+            dask_specs=dask_specs,
+            results=results,
+            **kwargs,
+        )
+
+    async def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        return self._status_handler.stats(bucket_size=bucket_size, **kwargs)
+
+    async def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        return self._status_handler.claim_idempotency_key(key, fingerprint)
+
+    async def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        self._status_handler.bind_idempotency_key(key, job_id)
+
+    async def release_idempotency_key(self, key: str) -> None:
+        self._status_handler.release_idempotency_key(key)
+
+
+def project(
+    job: JobEntry, fields: Optional[List[str]] = None
+) -> Union[JobEntry, JobSummary]:
+    """Return JobSummary containing only given fields."""
+    if fields is None:
+        return job
+    return JobSummary(**{field: getattr(job, field) for field in ["job_id", *fields]})
+
+
+def job_stats(jobs: List[JobEntry], bucket_size: int = 3600) -> JobStats:
+    """
+    Aggregate job statistics.
+
+    Job attributes are collected into arrays once, counts and percentiles are
+    then calculated per group on these arrays.
+    """
+    statuses = np.array([job.status.value for job in jobs], dtype=object)
+    processes = np.array(
+        [process_label(job.mapchete.config.process) for job in jobs], dtype=object
+    )
+    runtimes = np.array(
+        [np.nan if job.runtime is None else job.runtime for job in jobs], dtype=float
+    )
+    queue_waits = np.array(
+        [
+            (job.started - job.submitted).total_seconds()
+            # new jobs get submitted as started timestamp until they actually start
+            if job.started and job.submitted and job.started > job.submitted
+            else np.nan
+            for job in jobs
+        ],
+        dtype=float,
+    )
+    submitted = np.array(
+        [job.submitted.timestamp() if job.submitted else np.nan for job in jobs],
+        dtype=float,
+    )
+    buckets = np.floor(submitted / bucket_size) * bucket_size
+
+    def _group_stats(mask: np.ndarray) -> Dict[str, Any]:
+        return dict(
+            jobs=int(mask.sum()),
+            runtime=_duration_stats(runtimes[mask]),
+            queue_wait=_duration_stats(queue_waits[mask]),
+        )
+
+    status_values, status_counts = np.unique(statuses, return_counts=True)
+    status = {
+        Status(value): int(count) for value, count in zip(status_values, status_counts)
+    }
+    return JobStats(
+        jobs=len(jobs),
+        queue_depth=status.get(Status.pending, 0),
+        status=status,
+        processes={
+            process: GroupStats(**_group_stats(processes == process))
+            for process in np.unique(processes)
+        },
+        bucket_size=bucket_size,
+        buckets=[
+            BucketStats(
+                start=datetime.fromtimestamp(start, timezone.utc),
+                **_group_stats(buckets == start),
+            )
+            for start in np.unique(buckets[~np.isnan(buckets)])
+        ],
+    )
+
+
+def _duration_stats(values: np.ndarray) -> DurationStats:
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return DurationStats()
+    percentiles = np.percentile(values, STATS_PERCENTILES, method="lower")
+    return DurationStats(
+        count=values.size,
+        **{
+            f"p{percentile}": float(value)
+            for percentile, value in zip(STATS_PERCENTILES, percentiles)
+        },
+    )
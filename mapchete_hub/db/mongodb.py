@@ -1,17 +1,57 @@
+import asyncio
 import logging
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import re
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    overload,
+)
 from uuid import uuid4
 
 import pymongo
 from mapchete.enums import Status
 from mapchete.types import Progress
+from rasterio.crs import CRS
+from shapely import make_valid
 from shapely.geometry import box, mapping, shape
 
-from mapchete_hub.db.base import BaseStatusHandler
-from mapchete_hub.geometry import process_area_from_config
-from mapchete_hub.models import JobEntry, MapcheteJob, to_status_list
+from mapchete_hub.db.base import (
+    AsyncBaseStatusHandler,
+    BaseStatusHandler,
+    new_idempotency_key,
+    new_job_attributes,
+    page_sort,
+)
+from mapchete_hub.geometry import (
+    backend_crs,
+    backend_process_area,
+    backend_process_areas,
+)
+from mapchete_hub.models import (
+    CUSTOM_PROCESS,
+    STATS_PERCENTILES,
+    UNKNOWN_PROCESS,
+    BucketStats,
+    DurationStats,
+    GroupStats,
+    IdempotencyKey,
+    JobEntry,
+    JobsCursor,
+    JobStats,
+    JobSummary,
+    MapcheteJob,
+    parse_sort,
+    to_status_list,
+)
 from mapchete_hub.random_names import random_name
 from mapchete_hub.settings import mhub_settings
 from mapchete_hub.timetools import parse_to_date
@@ -39,109 +79,145 @@ class MongoDBStatusHandler(BaseStatusHandler):
             self._db = database
 
         self._jobs = self._db["jobs"]
+        self._idempotency_keys = self._db["idempotency_keys"]
+        self._executors = self._db["executors"]
+        self.enable_write_behind(mhub_settings.backend_db_write_behind_interval)
 
         logger.debug("active client %s", self._client)
 
     def __enter__(self):
         logger.debug("enter MongoDBStatusHandler")
+        create_indexes(self._db)
         return self
 
     def __exit__(self, *args, **kwargs):
         logger.debug("exit MongoDBStatusHandler")
+        self.stop_write_behind()
         if self._client:
             self._client.close()
 
-    def jobs(self, **kwargs) -> List[JobEntry]:
-        query = {k: v for k, v in kwargs.items() if v is not None}
-        logger.debug("raw query: %s", query)
-
-        # parsing job status groups
-        status = query.get("status")
-        if status is not None:
-            status_list = to_status_list(status)
-            # group statuses are lowercase!
-            query.update(status={"$in": status_list})
-
-        # convert bounds query into a geo search query
-        bounds = query.get("bounds")
-        if bounds is not None:
-            query.update(
-                geometry={"$geoIntersects": {"$geometry": mapping(box(*bounds))}}
-            )
-            query.pop("bounds")
-
-        # convert from_date and to_date kwargs to updated query
-        if query.get("from_date") or query.get("to_date"):
-            for i in ["from_date", "to_date"]:
-                date = query.get(i)
-                if date:
-                    query[i] = parse_to_date(date)
-            query.update(
-                updated={
-                    k: v
-                    for k, v in zip(
-                        # don't know wy "$lte", "$gte" and not the other way round, but the test passes
-                        # ["$lte", "$gte"],
-                        ["$gte", "$lte"],
-                        [query.get("from_date"), query.get("to_date")],
-                    )
-                    if v is not None
-                }
-            )
-            query.pop("from_date", None)
-            query.pop("to_date", None)
-        logger.debug("MongoDB query: %s", query)
+    @overload
+    def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
+    def jobs(
+        self,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[JobsCursor] = None,
+        fields: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Sequence[Union[JobEntry, JobSummary]]:
+        sort = page_sort(sort, limit, cursor)
+        query, sort_spec = paged_jobs_query(
+            jobs_query(**kwargs), sort=sort, cursor=cursor
+        )
+        entries = self._jobs.find(query, projection(fields, sort=sort))
+        if sort_spec:
+            entries = entries.sort(sort_spec)
+        if limit is not None:
+            entries = entries.limit(limit)
         jobs = []
-        for entry in self._jobs.find(query):
+        for entry in entries:
             try:
-                jobs.append(JobEntry.from_dict(entry))
+                jobs.append(from_document(entry, fields))
             except Exception as exc:  # pragma: no cover
                 logger.exception("cannot create JobEntry from entry: %s", exc)
         return jobs
 
-    def job(self, job_id) -> JobEntry:
+    def count(self, **kwargs) -> int:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            return self._jobs.count_documents(jobs_query(**kwargs))
+
+    def status_counts(self, **kwargs) -> Dict[Status, int]:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            documents = self._jobs.aggregate(
+                status_counts_pipeline(jobs_query(**kwargs))
+            )
+            return {Status(doc["_id"]): doc["count"] for doc in documents}
+
+    @overload
+    def job(self, job_id, fields: None = None) -> JobEntry: ...
+
+    @overload
+    def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
+    def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
         with pymongo.timeout(mhub_settings.mongodb_timeout):
-            result = self._jobs.find_one({"job_id": job_id})
+            result = self._jobs.find_one({"job_id": job_id}, projection(fields))
         if result:
-            return JobEntry.from_dict(result)
+            return from_document(result, fields)
         else:  # pragma: no cover
             raise KeyError(f"job {job_id} not found in the database: {result}")
 
-    def new(self, job_config: MapcheteJob) -> JobEntry:
+    def status(self, job_id) -> Status:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = self._jobs.find_one({"job_id": job_id}, {"status": 1, "_id": 0})
+        if result:
+            return Status(result["status"])
+        else:  # pragma: no cover
+            raise KeyError(f"job {job_id} not found in the database")
+
+    def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> JobEntry:
         """
         Create new job entry in database.
         """
-        job_id = uuid4().hex
-        logger.debug(
-            f"got new job with config {job_config} and assigning job ID {job_id}"
-        )
-        process_area = process_area_from_config(
-            job_config, dst_crs=os.environ.get("MHUB_BACKEND_CRS", "EPSG:4326")
-        )[0]
-        submitted = datetime.now(timezone.utc)
-        entry = JobEntry.from_dict(
-            dict(
-                job_id=job_id,
-                url=os.path.join(mhub_settings.self_url, "jobs", job_id),
-                status=Status.pending,
-                geometry=process_area,
-                bounds=list(shape(process_area).bounds),
-                mapchete=job_config,
-                output_path=job_config.config.output["path"],
-                submitted=submitted,
-                started=submitted,
-                updated=submitted,
-                job_name=job_config.params.get("job_name") or random_name(),
-                dask_specs=job_config.params.get("dask_specs", dict()),
-            )
+        entry = new_job_entry(
+            job_config,
+            process_area=process_area,
+            client_id=client_id,
+            trace_context=trace_context,
         )
         with pymongo.timeout(mhub_settings.mongodb_timeout):
             result = self._jobs.insert_one(entry.model_dump())
         if result.acknowledged:
-            return self.job(job_id)
+            self._notify(entry.job_id, new_job_attributes(entry))
+            return self.job(entry.job_id)
         else:  # pragma: no cover
             raise RuntimeError(f"entry {entry} could not be inserted into MongoDB")
 
+    def new_many(
+        self,
+        job_configs: List[MapcheteJob],
+        process_areas: Optional[List[dict]] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> List[JobEntry]:
+        """
+        Create multiple job entries in database using one bulk insert.
+        """
+        if process_areas is None:
+            process_areas = backend_process_areas(job_configs)
+        entries = [
+            new_job_entry(
+                job_config,
+                process_area=process_area,
+                client_id=client_id,
+                trace_context=trace_context,
+            )
+            for job_config, process_area in zip(job_configs, process_areas)
+        ]
+        if not entries:
+            return []
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = self._jobs.insert_many([entry.model_dump() for entry in entries])
+        if result.acknowledged:
+            for entry in entries:
+                self._notify(entry.job_id, new_job_attributes(entry))
+            return entries
+        else:  # pragma: no cover
+            raise RuntimeError("entries could not be inserted into MongoDB")
+
     def set(
         self,
         job_id: str,
@@ -154,46 +230,917 @@ class MongoDBStatusHandler(BaseStatusHandler):
         results: Optional[str] = None,
         **kwargs,
     ) -> JobEntry:
-        entry: Dict[str, Any] = {"job_id": job_id}
-        new_attributes: Dict[str, Any] = {
-            k: v
-            for k, v in dict(
-                exception=exception if exception is None else str(exception),
+        with self._ordered_write():
+            entry = job_update(
+                job_id,
+                status=status,
+                progress=self._pop_pending_progress(job_id, progress),
+                exception=exception,
                 traceback=traceback,
                 dask_dashboard_link=dask_dashboard_link,
                 dask_specs=dask_specs,
                 results=results,
                 **kwargs,
-            ).items()
-            if v is not None
+            )
+            logger.debug("%s: update attributes: %s", job_id, entry)
+
+            with pymongo.timeout(mhub_settings.mongodb_timeout):
+                job = JobEntry.from_dict(
+                    self._jobs.find_one_and_update(
+                        {"job_id": job_id},
+                        job_update_pipeline(entry),
+                        upsert=True,
+                        return_document=pymongo.ReturnDocument.AFTER,
+                    )
+                )
+        if job.status == Status.done:
+            entry.update(runtime=job.runtime, finished=job.finished)
+        self._notify(job_id, entry)
+        return job
+
+    def _update_job(self, job_id: str, **kwargs) -> None:
+        entry = job_update(job_id, **kwargs)
+        logger.debug("%s: update attributes: %s", job_id, entry)
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            self._jobs.update_one(
+                {"job_id": job_id}, job_update_pipeline(entry), upsert=True
+            )
+        self._notify(job_id, entry)
+
+    def write_progress(self, progress: Dict[str, Progress]) -> None:
+        entries = {
+            job_id: job_update(job_id, progress=job_progress)
+            for job_id, job_progress in progress.items()
         }
-        timestamp = datetime.now(timezone.utc)
-        if status:
-            new_attributes.update(status=Status[status])
-            if status == Status.initializing:
-                new_attributes.update(started=timestamp)
-            elif status == Status.done:
-                started = self.job(job_id).started
-                if started:
-                    new_attributes.update(
-                        runtime=(timestamp - started).total_seconds(),
-                        finished=timestamp,
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            self._jobs.bulk_write(
+                [
+                    pymongo.UpdateOne({"job_id": job_id}, job_update_pipeline(entry))
+                    for job_id, entry in entries.items()
+                ],
+                ordered=False,
+            )
+        for job_id, entry in entries.items():
+            self._notify(job_id, entry)
+
+    def set_many(
+        self,
+        job_ids: List[str],
+        status: Optional[Status] = None,
+        if_status: Optional[List[Status]] = None,
+        **kwargs,
+    ) -> List[str]:
+        query, entry = many_jobs_update(
+            job_ids, status=status, if_status=if_status, **kwargs
+        )
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = self._jobs.update_many(query, {"$set": entry})
+            if 0 < result.modified_count < len(job_ids):
+                # update_many() does not tell which jobs were updated
+                job_ids = [
+                    job["job_id"]
+                    for job in self._jobs.find(
+                        updated_jobs_query(job_ids, entry), {"job_id": 1, "_id": 0}
                     )
-        if progress:
-            new_attributes.update(current_progress=progress.current)
-            if progress.total is not None:
-                new_attributes.update(total_progress=progress.total)
-        logger.debug("%s: update attributes: %s", job_id, new_attributes)
-        entry.update(**new_attributes)
-        # add timestamp to entry
-        entry.update(updated=timestamp)
-
-        with pymongo.timeout(mhub_settings.mongodb_timeout):
-            return JobEntry.from_dict(
-                self._jobs.find_one_and_update(
+                ]
+        updated = job_ids if result.modified_count else []
+        logger.debug("updated %s jobs: %s", len(updated), entry)
+        for job_id in updated:
+            self._notify(job_id, entry)
+        return updated
+
+    def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            documents = list(
+                self._jobs.aggregate(
+                    stats_pipeline(jobs_query(**kwargs), bucket_size),
+                    allowDiskUse=True,
+                )
+            )
+        return stats_from_document(documents[0], bucket_size)
+
+    def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        record = new_idempotency_key(key, fingerprint)
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            # the unique index on key makes sure only one request claims the key
+            for _ in range(2):
+                try:
+                    self._idempotency_keys.insert_one(record.model_dump())
+                    return None
+                except pymongo.errors.DuplicateKeyError:
+                    existing = self._idempotency_keys.find_one({"key": key}, {"_id": 0})
+                if existing is None:  # pragma: no cover
+                    continue
+                existing_key = idempotency_key_from_dict(existing)
+                if not existing_key.expired(
+                    mhub_settings.idempotency_key_ttl,
+                    mhub_settings.idempotency_claim_ttl,
+                ):
+                    return existing_key
+                # the TTL index removes expired keys only about once a minute and
+                # ignores unbound keys; keys bound in the meantime are kept
+                self._idempotency_keys.delete_one(
+                    {
+                        "key": key,
+                        "created": existing["created"],
+                        "job_id": existing.get("job_id"),
+                    }
+                )
+        raise RuntimeError(f"idempotency key {key} could not be claimed")
+
+    def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            self._idempotency_keys.update_one(
+                {"key": key}, {"$set": {"job_id": job_id}}
+            )
+
+    def release_idempotency_key(self, key: str) -> None:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            self._idempotency_keys.delete_one({"key": key})
+
+    def executor_heartbeat(self, executor_id: str) -> None:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            self._executors.update_one(
+                {"executor_id": executor_id},
+                {"$set": {"heartbeat": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+
+    def live_executors(self, timeout: float) -> Set[str]:
+        since = datetime.now(timezone.utc) - timedelta(seconds=timeout)
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            return {
+                document["executor_id"]
+                for document in self._executors.find(
+                    {"heartbeat": {"$gte": since}}, {"executor_id": 1, "_id": 0}
+                )
+            }
+
+
+class AsyncMongoDBStatusHandler(AsyncBaseStatusHandler):
+    """
+    Asynchronous abstraction layer over MongoDB backend.
+
+    Indexes are only created by MongoDBStatusHandler, which runs alongside.
+    """
+
+    def __init__(self, db_uri=None, client=None, database=None):
+        """Initialize."""
+        if db_uri:  # pragma: no cover
+            logger.debug("connect to MongoDB: %s", db_uri)
+            self._client = pymongo.AsyncMongoClient(db_uri, tz_aware=False)
+            self._db = self._client["mhub"]
+
+        elif client:  # pragma: no cover
+            logger.debug("use existing PyMongo client instance: %s", client)
+            self._client = client
+            self._db = self._client["mhub"]
+
+        elif database:
+            self._client = None
+            self._db = database
+
+        self._jobs = self._db["jobs"]
+        self._idempotency_keys = self._db["idempotency_keys"]
+
+        logger.debug("active client %s", self._client)
+
+    async def __aenter__(self):
+        logger.debug("enter AsyncMongoDBStatusHandler")
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        logger.debug("exit AsyncMongoDBStatusHandler")
+        if self._client:  # pragma: no cover
+            await self._client.close()
+
+    @overload
+    async def jobs(self, *, fields: None = None, **kwargs) -> List[JobEntry]: ...
+
+    @overload
+    async def jobs(self, *, fields: List[str], **kwargs) -> List[JobSummary]: ...
+
+    async def jobs(
+        self,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[JobsCursor] = None,
+        fields: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Sequence[Union[JobEntry, JobSummary]]:
+        return [
+            job
+            async for job in self.iter_jobs(
+                limit=limit, sort=sort, cursor=cursor, fields=fields, **kwargs
+            )
+        ]
+
+    async def iter_jobs(
+        self,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[JobsCursor] = None,
+        fields: Optional[List[str]] = None,
+        **kwargs,
+    ) -> AsyncGenerator[Union[JobEntry, JobSummary], None]:
+        sort = page_sort(sort, limit, cursor)
+        query, sort_spec = paged_jobs_query(
+            jobs_query(**kwargs), sort=sort, cursor=cursor
+        )
+        entries = self._jobs.find(query, projection(fields, sort=sort))
+        if sort_spec:
+            entries = entries.sort(sort_spec)
+        if limit is not None:
+            entries = entries.limit(limit)
+        try:
+            async for entry in entries:
+                try:
+                    job = from_document(entry, fields)
+                except Exception as exc:  # pragma: no cover
+                    logger.exception("cannot create JobEntry from entry: %s", exc)
+                    continue
+                yield job
+        finally:
+            await entries.close()
+
+    async def count(self, **kwargs) -> int:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            return await self._jobs.count_documents(jobs_query(**kwargs))
+
+    async def status_counts(self, **kwargs) -> Dict[Status, int]:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            cursor = await self._jobs.aggregate(
+                status_counts_pipeline(jobs_query(**kwargs))
+            )
+            return {Status(doc["_id"]): doc["count"] for doc in await cursor.to_list()}
+
+    @overload
+    async def job(self, job_id, fields: None = None) -> JobEntry: ...
+
+    @overload
+    async def job(self, job_id, fields: List[str]) -> JobSummary: ...
+
+    async def job(
+        self, job_id, fields: Optional[List[str]] = None
+    ) -> Union[JobEntry, JobSummary]:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = await self._jobs.find_one({"job_id": job_id}, projection(fields))
+        if result:
+            return from_document(result, fields)
+        else:
+            raise KeyError(f"job {job_id} not found in the database: {result}")
+
+    async def status(self, job_id) -> Status:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = await self._jobs.find_one(
+                {"job_id": job_id}, {"status": 1, "_id": 0}
+            )
+        if result:
+            return Status(result["status"])
+        else:  # pragma: no cover
+            raise KeyError(f"job {job_id} not found in the database")
+
+    async def new(
+        self,
+        job_config: MapcheteJob,
+        process_area: Optional[dict] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> JobEntry:
+        """
+        Create new job entry in database.
+        """
+        entry = new_job_entry(
+            job_config,
+            process_area=process_area,
+            client_id=client_id,
+            trace_context=trace_context,
+        )
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = await self._jobs.insert_one(entry.model_dump())
+        if result.acknowledged:
+            self._notify(entry.job_id, new_job_attributes(entry))
+            return await self.job(entry.job_id)
+        else:  # pragma: no cover
+            raise RuntimeError(f"entry {entry} could not be inserted into MongoDB")
+
+    async def new_many(
+        self,
+        job_configs: List[MapcheteJob],
+        process_areas: Optional[List[dict]] = None,
+        client_id: Optional[str] = None,
+        trace_context: Optional[str] = None,
+    ) -> List[JobEntry]:
+        """
+        Create multiple job entries in database using one bulk insert.
+
+        Process areas are calculated in parallel threads if not provided.
+        """
+        if process_areas is None:
+            process_areas = await asyncio.to_thread(backend_process_areas, job_configs)
+        entries = [
+            new_job_entry(
+                job_config,
+                process_area=process_area,
+                client_id=client_id,
+                trace_context=trace_context,
+            )
+            for job_config, process_area in zip(job_configs, process_areas)
+        ]
+        if not entries:
+            return []
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = await self._jobs.insert_many(
+                [entry.model_dump() for entry in entries]
+            )
+        if result.acknowledged:
+            for entry in entries:
+                self._notify(entry.job_id, new_job_attributes(entry))
+            return entries
+        else:  # pragma: no cover
+            raise RuntimeError("entries could not be inserted into MongoDB")
+
+    async def set(
+        self,
+        job_id: str,
+        status: Optional[Status] = None,
+        progress: Optional[Progress] = None,
+        exception: Optional[str] = None,
+        traceback: Optional[str] = None,
+        dask_dashboard_link: Optional[str] = None,
+        dask_specs: Optional[dict] = None,
+        results: Optional[str] = None,
+        **kwargs,
+    ) -> JobEntry:
+        entry = job_update(
+            job_id,
+            status=status,
+            progress=progress,
+            exception=exception,
+            traceback=traceback,
+            dask_dashboard_link=dask_dashboard_link,
+            dask_specs=dask_specs,
+            results=results,
+            **kwargs,
+        )
+        logger.debug("%s: update attributes: %s", job_id, entry)
+
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            job = JobEntry.from_dict(
+                await self._jobs.find_one_and_update(
                     {"job_id": job_id},
-                    {"$set": entry},
+                    job_update_pipeline(entry),
                     upsert=True,
                     return_document=pymongo.ReturnDocument.AFTER,
                 )
             )
+        if job.status == Status.done:
+            entry.update(runtime=job.runtime, finished=job.finished)
+        self._notify(job_id, entry)
+        return job
+
+    async def update_job(self, job_id: str, **kwargs) -> None:
+        entry = job_update(job_id, **kwargs)
+        logger.debug("%s: update attributes: %s", job_id, entry)
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            await self._jobs.update_one(
+                {"job_id": job_id}, job_update_pipeline(entry), upsert=True
+            )
+        self._notify(job_id, entry)
+
+    async def set_many(
+        self,
+        job_ids: List[str],
+        status: Optional[Status] = None,
+        if_status: Optional[List[Status]] = None,
+        **kwargs,
+    ) -> List[str]:
+        query, entry = many_jobs_update(
+            job_ids, status=status, if_status=if_status, **kwargs
+        )
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            result = await self._jobs.update_many(query, {"$set": entry})
+            if 0 < result.modified_count < len(job_ids):
+                # update_many() does not tell which jobs were updated
+                job_ids = [
+                    job["job_id"]
+                    async for job in self._jobs.find(
+                        updated_jobs_query(job_ids, entry), {"job_id": 1, "_id": 0}
+                    )
+                ]
+        updated = job_ids if result.modified_count else []
+        logger.debug("updated %s jobs: %s", len(updated), entry)
+        for job_id in updated:
+            self._notify(job_id, entry)
+        return updated
+
+    async def stats(self, bucket_size: int = 3600, **kwargs) -> JobStats:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            cursor = await self._jobs.aggregate(
+                stats_pipeline(jobs_query(**kwargs), bucket_size),
+                allowDiskUse=True,
+            )
+            documents = await cursor.to_list()
+        return stats_from_document(documents[0], bucket_size)
+
+    async def claim_idempotency_key(
+        self, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[IdempotencyKey]:
+        record = new_idempotency_key(key, fingerprint)
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            # the unique index on key makes sure only one request claims the key
+            for _ in range(2):
+                try:
+                    await self._idempotency_keys.insert_one(record.model_dump())
+                    return None
+                except pymongo.errors.DuplicateKeyError:
+                    existing = await self._idempotency_keys.find_one(
+                        {"key": key}, {"_id": 0}
+                    )
+                if existing is None:  # pragma: no cover
+                    continue
+                existing_key = idempotency_key_from_dict(existing)
+                if not existing_key.expired(
+                    mhub_settings.idempotency_key_ttl,
+                    mhub_settings.idempotency_claim_ttl,
+                ):
+                    return existing_key
+                # the TTL index removes expired keys only about once a minute and
+                # ignores unbound keys; keys bound in the meantime are kept
+                await self._idempotency_keys.delete_one(
+                    {
+                        "key": key,
+                        "created": existing["created"],
+                        "job_id": existing.get("job_id"),
+                    }
+                )
+        raise RuntimeError(f"idempotency key {key} could not be claimed")
+
+    async def bind_idempotency_key(self, key: str, job_id: str) -> None:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            await self._idempotency_keys.update_one(
+                {"key": key}, {"$set": {"job_id": job_id}}
+            )
+
+    async def release_idempotency_key(self, key: str) -> None:
+        with pymongo.timeout(mhub_settings.mongodb_timeout):
+            await self._idempotency_keys.delete_one({"key": key})
+
+
+def jobs_query(**kwargs) -> Dict[str, Any]:
+    """Convert BaseStatusHandler.jobs() filters into a MongoDB query."""
+    query = {k: v for k, v in kwargs.items() if v is not None}
+    logger.debug("raw query: %s", query)
+
+    # look up multiple jobs at once
+    job_ids = query.pop("job_ids", None)
+    if job_ids is not None:
+        query.update(job_id={"$in": list(job_ids)})
+
+    # parsing job status groups
+    status = query.get("status")
+    if status is not None:
+        status_list = to_status_list(status)
+        # group statuses are lowercase!
+        query.update(status={"$in": status_list})
+
+    # convert bounds query into a geo search query
+    bounds = query.get("bounds")
+    if bounds is not None:
+        query.update(geometry={"$geoIntersects": {"$geometry": mapping(box(*bounds))}})
+        query.pop("bounds")
+
+    # convert from_date and to_date kwargs to updated query
+    if query.get("from_date") or query.get("to_date"):
+        for i in ["from_date", "to_date"]:
+            date = query.get(i)
+            if date:
+                query[i] = parse_to_date(date)
+        query.update(
+            updated={
+                k: v
+                for k, v in zip(
+                    # don't know wy "$lte", "$gte" and not the other way round, but the test passes
+                    # ["$lte", "$gte"],
+                    ["$gte", "$lte"],
+                    [query.get("from_date"), query.get("to_date")],
+                )
+                if v is not None
+            }
+        )
+        query.pop("from_date", None)
+        query.pop("to_date", None)
+    logger.debug("MongoDB query: %s", query)
+    return query
+
+
+def projection(
+    fields: Optional[List[str]] = None, sort: Optional[str] = None
+) -> Optional[Dict[str, int]]:
+    """
+    Convert fields into a MongoDB projection which also contains job_id and the
+    sort field.
+    """
+    if fields is None:
+        return None
+    out = {"job_id": 1}
+    out.update({field: 1 for field in fields})
+    if sort:
+        out[parse_sort(sort)[0].value] = 1
+    out.update(_id=0)
+    return out
+
+
+def from_document(
+    entry: Dict[str, Any], fields: Optional[List[str]] = None
+) -> Union[JobEntry, JobSummary]:
+    if fields is None:
+        return JobEntry.from_dict(entry)
+    return JobSummary.from_dict(entry)
+
+
+def paged_jobs_query(
+    query: Dict[str, Any],
+    sort: Optional[str] = None,
+    cursor: Optional[JobsCursor] = None,
+) -> Tuple[Dict[str, Any], Optional[List[Tuple[str, int]]]]:
+    """Extend query to start after cursor and return sort specification."""
+    if sort is None:
+        return query, None
+    field, descending = parse_sort(sort)
+    direction = pymongo.DESCENDING if descending else pymongo.ASCENDING
+    if cursor:
+        # job_id breaks ties between jobs with identical timestamps
+        operator = "$lt" if descending else "$gt"
+        after = {
+            "$or": [
+                {field.value: {operator: cursor.value}},
+                {field.value: cursor.value, "job_id": {operator: cursor.job_id}},
+            ]
+        }
+        query = {"$and": [query, after]} if query else after
+    return query, [(field.value, direction), ("job_id", direction)]
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# same labels as models.process_label()
+PROCESS_LABEL = {
+    "$cond": [
+        {"$isArray": "$mapchete.config.process"},
+        CUSTOM_PROCESS,
+        {"$ifNull": ["$mapchete.config.process", UNKNOWN_PROCESS]},
+    ]
+}
+
+
+def status_counts_pipeline(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Count jobs per status, which only needs the status index."""
+    return [
+        {"$match": query},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+    ]
+
+
+def stats_pipeline(query: Dict[str, Any], bucket_size: int) -> List[Dict[str, Any]]:
+    """
+    Aggregation pipeline calculating job statistics in one $facet stage.
+
+    Percentiles are read from the sorted durations of each group, as
+    $percentile is not available before MongoDB 7.0.
+    """
+    # milliseconds since epoch, as $toLong does not convert dates before 4.0
+    submitted = {"$subtract": ["$submitted", EPOCH]}
+    groups = {
+        "processes": PROCESS_LABEL,
+        "buckets": {
+            "$subtract": [submitted, {"$mod": [submitted, bucket_size * 1000]}]
+        },
+    }
+    durations = {
+        "runtime": "$runtime",
+        # new jobs get submitted as started timestamp until they actually start
+        "queue_wait": {
+            "$cond": [
+                {"$gt": ["$started", "$submitted"]},
+                {"$divide": [{"$subtract": ["$started", "$submitted"]}, 1000]},
+                None,
+            ]
+        },
+    }
+    facets: Dict[str, List[Dict[str, Any]]] = {
+        "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+    }
+    for group, group_id in groups.items():
+        facets[group] = [{"$group": {"_id": group_id, "jobs": {"$sum": 1}}}]
+        for duration, value in durations.items():
+            facets[f"{group}_{duration}"] = [
+                {"$project": {"_id": 0, "group": group_id, "value": value}},
+                {"$match": {"value": {"$ne": None}}},
+                {"$sort": {"value": 1}},
+                {"$group": {"_id": "$group", "values": {"$push": "$value"}}},
+                {
+                    "$project": {
+                        "count": {"$size": "$values"},
+                        **{
+                            f"p{percentile}": {
+                                "$arrayElemAt": [
+                                    "$values",
+                                    {
+                                        "$toInt": {
+                                            "$floor": {
+                                                "$multiply": [
+                                                    percentile / 100,
+                                                    {
+                                                        "$subtract": [
+                                                            {"$size": "$values"},
+                                                            1,
+                                                        ]
+                                                    },
+                                                ]
+                                            }
+                                        }
+                                    },
+                                ]
+                            }
+                            for percentile in STATS_PERCENTILES
+                        },
+                    }
+                },
+            ]
+    return [{"$match": query}, {"$facet": facets}]
+
+
+def stats_from_document(document: Dict[str, Any], bucket_size: int) -> JobStats:
+    """Convert result of stats_pipeline() into JobStats."""
+
+    def _groups(group: str) -> Dict[Any, Dict[str, Any]]:
+        out: Dict[Any, Dict[str, Any]] = {
+            item["_id"]: dict(jobs=item["jobs"])
+            for item in document[group]
+            if item["_id"] is not None
+        }
+        for duration in ["runtime", "queue_wait"]:
+            for item in document[f"{group}_{duration}"]:
+                if item["_id"] in out:
+                    out[item["_id"]][duration] = DurationStats(
+                        **{k: v for k, v in item.items() if k != "_id"}
+                    )
+        return out
+
+    status = {Status(item["_id"]): item["count"] for item in document["status"]}
+    return JobStats(
+        jobs=sum(status.values()),
+        queue_depth=status.get(Status.pending, 0),
+        status=status,
+        processes={
+            process: GroupStats(**stats)
+            for process, stats in _groups("processes").items()
+        },
+        bucket_size=bucket_size,
+        buckets=[
+            BucketStats(
+                start=datetime.fromtimestamp(start / 1000, timezone.utc), **stats
+            )
+            for start, stats in sorted(_groups("buckets").items())
+        ],
+    )
+
+
+def create_indexes(database: Any) -> None:
+    """
+    Create indexes of all collections and drop outdated jobs indexes.
+
+    Failing indexes are logged as errors but do not prevent startup, e.g. the
+    2dsphere index cannot be built while jobs with invalid geometries exist.
+    """
+    for collection, indexes in [
+        ("idempotency_keys", idempotency_key_indexes()),
+        ("executors", executor_indexes()),
+    ]:
+        try:
+            database[collection].create_indexes(indexes)
+        except pymongo.errors.OperationFailure as exc:  # pragma: no cover
+            logger.error("cannot create %s indexes: %s", collection, exc)
+    jobs = database["jobs"]
+    for name in stale_job_index_names(jobs.index_information()):
+        logger.info("drop outdated jobs index %s", name)
+        jobs.drop_index(name)
+    for index in job_indexes():
+        try:
+            jobs.create_indexes([index])
+        except pymongo.errors.OperationFailure as exc:  # pragma: no cover
+            logger.error("cannot create jobs index %s: %s", index.document["name"], exc)
+
+
+# increase when changing job_indexes(), so outdated indexes get dropped
+JOB_INDEXES_VERSION = 1
+
+# options of job indexes by name without version suffix
+JOB_INDEXES: Dict[str, Dict[str, Any]] = {
+    "job_id_unique": dict(keys="job_id", unique=True),
+    "status_updated": dict(keys=[("status", 1), ("updated", -1)]),
+    "output_path_updated": dict(keys=[("output_path", 1), ("updated", -1)]),
+    "job_name_updated": dict(keys=[("job_name", 1), ("updated", -1)]),
+    "command_updated": dict(keys=[("command", 1), ("updated", -1)]),
+    "updated_job_id": dict(keys=[("updated", -1), ("job_id", -1)]),
+    "submitted_job_id": dict(keys=[("submitted", -1), ("job_id", -1)]),
+    "geometry_2dsphere": dict(keys=[("geometry", pymongo.GEOSPHERE)]),
+}
+
+_JOB_INDEX_NAME = re.compile(
+    rf"^({'|'.join(map(re.escape, JOB_INDEXES))})_v(?P<version>\d+)$"
+)
+
+
+def job_indexes() -> List[pymongo.IndexModel]:
+    """
+    Indexes used by jobs() filters and sort orders.
+
+    Every filter of jobs_query() is the prefix of at least one index and
+    "updated" and "submitted" are followed by "job_id" as in paged_jobs_query().
+    Index names end with the version, e.g. "status_updated_v1". The 2dsphere
+    index is only created if MHUB_BACKEND_CRS is EPSG:4326.
+    """
+    return [
+        pymongo.IndexModel(name=f"{name}_v{JOB_INDEXES_VERSION}", **index)
+        for name, index in JOB_INDEXES.items()
+        # MongoDB rejects documents with non-WGS84 coordinates once indexed
+        if name != "geometry_2dsphere" or backend_crs() == CRS.from_epsg(4326)
+    ]
+
+
+def stale_job_index_names(index_information: Dict[str, Any]) -> List[str]:
+    """
+    Names of indexes created by older versions of job_indexes().
+
+    Indexes of newer versions are kept, as they belong to servers which are
+    already updated, e.g. during a rolling deployment.
+    """
+    return [
+        name
+        for name in index_information
+        if (match := _JOB_INDEX_NAME.match(name))
+        and int(match.group("version")) < JOB_INDEXES_VERSION
+    ]
+
+
+def idempotency_key_indexes() -> List[pymongo.IndexModel]:
+    """Unique index on idempotency keys and TTL index removing expired keys."""
+    return [
+        pymongo.IndexModel("key", unique=True, name="key_unique"),
+        pymongo.IndexModel(
+            "created",
+            expireAfterSeconds=int(mhub_settings.idempotency_key_ttl),
+            name="created_ttl",
+        ),
+    ]
+
+
+def executor_indexes() -> List[pymongo.IndexModel]:
+    """Unique index on executor IDs and TTL index removing dead executors."""
+    return [
+        pymongo.IndexModel("executor_id", unique=True, name="executor_id_unique"),
+        pymongo.IndexModel(
+            "heartbeat", expireAfterSeconds=60 * 60 * 24, name="heartbeat_ttl"
+        ),
+    ]
+
+
+def idempotency_key_from_dict(document: Dict[str, Any]) -> IdempotencyKey:
+    # MongoDB returns naive datetime objects
+    return IdempotencyKey(**dict(document, created=parse_to_date(document["created"])))
+
+
+def new_job_entry(
+    job_config: MapcheteJob,
+    process_area: Optional[dict] = None,
+    client_id: Optional[str] = None,
+    trace_context: Optional[str] = None,
+) -> JobEntry:
+    """Create a pending JobEntry for a new job configuration."""
+    job_id = uuid4().hex
+    logger.debug(f"got new job with config {job_config} and assigning job ID {job_id}")
+    geometry = shape(process_area or backend_process_area(job_config))
+    if not geometry.is_valid:
+        # MongoDB cannot index invalid geometries, e.g. self-intersecting polygons
+        geometry = make_valid(geometry)
+    # MongoDB only stores milliseconds
+    now = datetime.now(timezone.utc)
+    submitted = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    return JobEntry.from_dict(
+        dict(
+            job_id=job_id,
+            url=os.path.join(mhub_settings.self_url, "jobs", job_id),
+            status=Status.pending,
+            geometry=mapping(geometry),
+            bounds=list(geometry.bounds),
+            mapchete=job_config,
+            output_path=job_config.config.output["path"],
+            submitted=submitted,
+            started=submitted,
+            updated=submitted,
+            job_name=job_config.params.get("job_name") or random_name(),
+            dask_specs=job_config.params.get("dask_specs", dict()),
+            client_id=client_id,
+            trace_context=trace_context,
+        )
+    )
+
+
+def job_update(
+    job_id: Optional[str],
+    status: Optional[Status] = None,
+    progress: Optional[Progress] = None,
+    exception: Optional[str] = None,
+    traceback: Optional[str] = None,
+    dask_dashboard_link: Optional[str] = None,
+    dask_specs: Optional[dict] = None,
+    results: Optional[str] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """Build the $set document for a job update, job_id is only set if given."""
+    entry: Dict[str, Any] = {} if job_id is None else {"job_id": job_id}
+    new_attributes: Dict[str, Any] = {
+        k: v
+        for k, v in dict(
+            exception=exception if exception is None else str(exception),
+            traceback=traceback,
+            dask_dashboard_link=dask_dashboard_link,
+            dask_specs=dask_specs,
+            results=results,
+            **kwargs,
+        ).items()
+        if v is not None
+    }
+    timestamp = datetime.now(timezone.utc)
+    if status:
+        new_attributes.update(status=Status[status])
+        if status == Status.initializing:
+            new_attributes.update(started=timestamp)
+    if progress:
+        new_attributes.update(current_progress=progress.current)
+        if progress.total is not None:
+            new_attributes.update(total_progress=progress.total)
+    entry.update(**new_attributes)
+    # add timestamp to entry
+    entry.update(updated=timestamp)
+    return entry
+
+
+def many_jobs_update(
+    job_ids: List[str],
+    status: Optional[Status] = None,
+    if_status: Optional[List[Status]] = None,
+    **kwargs,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Build query and $set document to update multiple jobs at once."""
+    entry = job_update(None, status=status, **kwargs)
+    query: Dict[str, Any] = {"job_id": {"$in": list(job_ids)}}
+    if if_status is not None:
+        query.update(status={"$in": list(if_status)})
+    return query, entry
+
+
+def updated_jobs_query(job_ids: List[str], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Query jobs which got updated by many_jobs_update() using their timestamp."""
+    return {"job_id": {"$in": list(job_ids)}, "updated": entry["updated"]}
+
+
+def job_update_pipeline(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Update pipeline setting entry and the runtime of jobs which are done.
+
+    runtime and finished are calculated from the stored "started" timestamp
+    by the server, so a job update needs only one round-trip. Values are
+    wrapped in $literal, as strings starting with "$" would otherwise be read
+    as field paths.
+    """
+    pipeline: List[Dict[str, Any]] = [
+        {"$set": {key: {"$literal": value} for key, value in entry.items()}}
+    ]
+    if entry.get("status") == Status.done:
+        # keep previous values if there is no started timestamp
+        started = {"$ifNull": ["$started", False]}
+        pipeline.append(
+            {
+                "$set": {
+                    "runtime": {
+                        "$cond": [
+                            started,
+                            {
+                                "$divide": [
+                                    {"$subtract": ["$updated", "$started"]},
+                                    1000,
+                                ]
+                            },
+                            "$runtime",
+                        ]
+                    },
+                    "finished": {"$cond": [started, "$updated", "$finished"]},
+                }
+            }
+        )
+    return pipeline
@@ -0,0 +1,218 @@
+"""
+In-process job events.
+
+Status handlers notify JobEvents about every job update they write. REST
+endpoints subscribe to these events instead of polling the database, so any
+number of waiting clients does not cause additional database reads.
+
+Status handlers only capture updates written within this process, i.e. jobs
+running on external workers (e.g. the k8s job handlers) or in a queue executor
+process do not emit events. While anyone is subscribed, JobEvents.poll()
+therefore reads the subscribed jobs from the database every
+MHUB_EVENT_POLL_INTERVAL seconds in one query per process and publishes the
+changes as events. If anyone is subscribed to all jobs, the jobs updated since
+the last poll are read as well.
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from mapchete_hub.settings import mhub_settings
+
+logger = logging.getLogger(__name__)
+
+# job attributes published as events
+EVENT_FIELDS = ["status", "current_progress", "total_progress", "dask_dashboard_link"]
+
+JobsReader = Callable[..., Awaitable[Sequence[Any]]]
+
+
+class JobSubscription:
+    """
+    Job updates pending for one subscriber.
+
+    Updates of the same job are merged until the subscriber collects them, so
+    memory use only depends on the number of jobs and not on the number of
+    updates a slow subscriber has missed.
+    """
+
+    job_ids: Optional[Set[str]]
+    _pending: Dict[str, Dict[str, Any]]
+    _event: asyncio.Event
+
+    def __init__(self, job_ids: Optional[Collection[str]] = None):
+        self.job_ids = None if job_ids is None else set(job_ids)
+        self._pending = {}
+        self._event = asyncio.Event()
+
+    def put(self, job_id: str, attributes: Dict[str, Any]) -> None:
+        if self.job_ids is None or job_id in self.job_ids:
+            self._pending.setdefault(job_id, {}).update(attributes)
+            self._event.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Wait for job updates.
+
+        Returns merged updated attributes per job ID or an empty dictionary if
+        no update arrived within timeout.
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        pending, self._pending = self._pending, {}
+        self._event.clear()
+        return pending
+
+
+class JobEvents:
+    """
+    Distribute job updates to subscribers within the event loop.
+
+    Instances are registered as listeners on status handlers and can be called
+    from any thread.
+    """
+
+    _loop: asyncio.AbstractEventLoop
+    _subscriptions: Set[JobSubscription]
+    _subscribed: asyncio.Event
+    _unsubscribed: asyncio.Event
+    # latest published attributes of jobs which have been polled or updated since
+    _seen: Dict[str, Dict[str, Any]]
+    # updated timestamp of the latest job polled for subscribers to all jobs
+    _updated_since: Optional[datetime]
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._subscriptions = set()
+        self._subscribed = asyncio.Event()
+        self._unsubscribed = asyncio.Event()
+        self._unsubscribed.set()
+        self._seen = {}
+        self._updated_since = None
+
+    def __call__(self, job_id: str, attributes: Dict[str, Any]) -> None:
+        if not self._subscriptions:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._publish, job_id, dict(attributes))
+        except RuntimeError:  # pragma: no cover
+            logger.debug("event loop closed, dropping update of job %s", job_id)
+
+    def _publish(self, job_id: str, attributes: Dict[str, Any]) -> None:
+        if not self._subscriptions:
+            return
+        self._seen.setdefault(job_id, {}).update(attributes)
+        for subscription in list(self._subscriptions):
+            subscription.put(job_id, attributes)
+
+    @contextmanager
+    def subscribe(
+        self, job_ids: Optional[Collection[str]] = None
+    ) -> Generator[JobSubscription, None, None]:
+        """Subscribe to updates of given jobs or of all jobs if job_ids is None."""
+        subscription = JobSubscription(job_ids)
+        if job_ids is None and not self._all_jobs_subscribed():
+            self._updated_since = datetime.now(timezone.utc)
+        self._subscriptions.add(subscription)
+        self._subscribed.set()
+        self._unsubscribed.clear()
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+            if not self._subscriptions:
+                self._subscribed.clear()
+                self._unsubscribed.set()
+                self._seen.clear()
+
+    async def poll(self, read_jobs: JobsReader) -> None:
+        """
+        Publish updates of subscribed jobs read from the database until cancelled.
+
+        read_jobs is called like AsyncBaseStatusHandler.jobs(). Polling pauses
+        while nobody is subscribed.
+        """
+        while True:
+            await self._subscribed.wait()
+            try:
+                # start over if all subscribers have left in the meantime
+                await asyncio.wait_for(
+                    self._unsubscribed.wait(), mhub_settings.event_poll_interval
+                )
+                continue
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._poll(read_jobs)
+            except Exception as exc:  # pragma: no cover
+                logger.exception("polling job updates failed: %s", exc)
+
+    def _all_jobs_subscribed(self) -> bool:
+        return any(subscription.job_ids is None for subscription in self._subscriptions)
+
+    async def _poll(self, read_jobs: JobsReader) -> None:
+        # only keep what is published from now on and what gets polled
+        seen, self._seen = self._seen, {}
+        job_ids: Set[str] = set()
+        for subscription in self._subscriptions:
+            job_ids.update(subscription.job_ids or ())
+        fields = EVENT_FIELDS + ["updated"]
+        jobs: List[Any] = []
+        if job_ids:
+            jobs.extend(await read_jobs(job_ids=sorted(job_ids), fields=fields))
+        if self._all_jobs_subscribed():
+            # jobs updated exactly at _updated_since are read again but not published
+            updated_jobs = await read_jobs(from_date=self._updated_since, fields=fields)
+            self._updated_since = max(
+                [job.updated for job in updated_jobs if job.updated is not None],
+                default=self._updated_since,
+            )
+            jobs.extend(updated_jobs)
+        for job in jobs:
+            self._publish_polled(
+                job.job_id,
+                job.model_dump(include=set(fields), exclude_none=True),
+                previous={**seen.get(job.job_id, {}), **self._seen.get(job.job_id, {})},
+            )
+
+    def _publish_polled(
+        self, job_id: str, attributes: Dict[str, Any], previous: Dict[str, Any]
+    ) -> None:
+        """Publish polled attributes which differ from the ones published before."""
+        if _older(attributes.get("updated"), previous.get("updated")):
+            # an event of this process arrived after the job was read
+            self._seen[job_id] = previous
+            return
+        self._seen[job_id] = dict(previous, updated=attributes.get("updated"))
+        changed = {
+            key: value
+            for key, value in attributes.items()
+            if key != "updated" and previous.get(key) != value
+        }
+        if changed:
+            self._publish(job_id, changed)
+
+
+def _older(timestamp: Optional[datetime], other: Optional[datetime]) -> bool:
+    return (
+        isinstance(timestamp, datetime)
+        and isinstance(other, datetime)
+        and timestamp < other
+    )
@@ -0,0 +1,136 @@
+"""
+Job footprints as Mapbox Vector Tiles and FlatGeobuf.
+
+Map views only request the jobs intersecting a web mercator tile, which are
+selected by the spatial index of the backend database. Job geometries are
+reprojected, clipped to the tile and simplified to the tile resolution before
+being encoded.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import mapbox_vector_tile
+from fiona.io import MemoryFile
+from mapchete.geometry import reproject_geometry
+from mapchete.tile import BufferedTilePyramid
+from shapely.geometry import box, mapping, shape
+
+from mapchete_hub.geometry import backend_crs
+from mapchete_hub.models import JobEntry, JobSummary
+
+logger = logging.getLogger(__name__)
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+FGB_MEDIA_TYPE = "application/flatgeobuf"
+
+LAYER_NAME = "jobs"
+TILE_EXTENT = 4096
+# pixels around a tile so clipped polygon edges are not drawn at tile borders
+TILE_BUFFER = 64
+
+TILE_FIELDS = [
+    "geometry",
+    "job_name",
+    "status",
+    "current_progress",
+    "total_progress",
+]
+FGB_SCHEMA = {
+    "geometry": "Unknown",
+    "properties": {
+        "job_id": "str",
+        "job_name": "str",
+        "status": "str",
+        "command": "str",
+        "output_path": "str",
+        "current_progress": "int",
+        "total_progress": "int",
+        "submitted": "datetime",
+        "updated": "datetime",
+    },
+}
+FGB_FIELDS = ["geometry"] + [
+    field for field in FGB_SCHEMA["properties"] if field != "job_id"
+]
+
+WEB_MERCATOR = BufferedTilePyramid("mercator")
+MAX_TILE_ZOOM = 24
+
+
+def tile_query_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Return bounds of a web mercator tile in the backend CRS.
+
+    Raises a ValueError if the tile does not exist.
+    """
+    tile = WEB_MERCATOR.tile(z, y, x)
+    return reproject_geometry(
+        box(*tile.bounds), src_crs=WEB_MERCATOR.crs, dst_crs=backend_crs()
+    ).bounds
+
+
+def vector_tile(
+    jobs: Iterable[Union[JobEntry, JobSummary]], z: int, x: int, y: int
+) -> bytes:
+    """Encode job footprints intersecting a web mercator tile."""
+    tile = WEB_MERCATOR.tile(z, y, x)
+    resolution = (tile.bounds.right - tile.bounds.left) / TILE_EXTENT
+    clip = box(*tile.bounds).buffer(TILE_BUFFER * resolution, join_style="mitre")
+    src_crs = backend_crs()
+    features = []
+    for job in jobs:
+        geometry = reproject_geometry(
+            shape(getattr(job, "geometry")), src_crs=src_crs, dst_crs=WEB_MERCATOR.crs
+        )
+        geometry = geometry.intersection(clip).simplify(resolution)
+        if geometry.is_empty:
+            continue
+        features.append(dict(geometry=geometry, properties=_tile_properties(job)))
+    logger.debug("encode %s jobs into tile %s", len(features), (z, x, y))
+    return mapbox_vector_tile.encode(
+        [dict(name=LAYER_NAME, features=features)],
+        default_options=dict(quantize_bounds=tuple(tile.bounds), extents=TILE_EXTENT),
+    )
+
+
+def _tile_properties(job: Union[JobEntry, JobSummary]) -> Dict[str, Any]:
+    properties: Dict[str, Any] = dict(
+        job_id=job.job_id,
+        job_name=job.job_name,
+        status=job.status.value if job.status else None,
+        current_progress=job.current_progress,
+        total_progress=job.total_progress,
+    )
+    if job.current_progress is not None and job.total_progress:
+        properties.update(progress=job.current_progress / job.total_progress)
+    # vector tiles cannot encode null values
+    return {key: value for key, value in properties.items() if value is not None}
+
+
+def flatgeobuf(jobs: Iterable[Union[JobEntry, JobSummary]]) -> bytes:
+    """Write job footprints into a FlatGeobuf file in the backend CRS."""
+    records: List[dict] = [
+        dict(
+            geometry=mapping(shape(getattr(job, "geometry"))),
+            properties={
+                field: _fgb_value(getattr(job, field, None))
+                for field in FGB_SCHEMA["properties"]
+            },
+        )
+        for job in jobs
+    ]
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="FlatGeobuf", schema=FGB_SCHEMA, crs=backend_crs().to_string()
+        ) as dst:
+            dst.writerecords(records)
+        return memfile.read()
+
+
+def _fgb_value(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    elif hasattr(value, "value"):
+        return value.value
+    return value
@@ -2,6 +2,11 @@
 Geometry functions.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import List
+
 from mapchete.config.parse import get_zoom_levels
 from mapchete.io.vector import fiona_open
 from mapchete.geometry import reproject_geometry
@@ -13,8 +18,10 @@ from shapely.geometry import box, mapping, shape
 from shapely.ops import unary_union
 
 from mapchete_hub.models import MapcheteJob
+from mapchete_hub.tracing import traced
 
 
+@traced("process_area_from_config")
 def process_area_from_config(job: MapcheteJob, dst_crs=None, **kwargs):
     """
     Calculate process area from mapchete configuration and process parameters.
@@ -125,3 +132,32 @@ def process_area_from_config(job: MapcheteJob, dst_crs=None, **kwargs):
         ),
         mapping(geometry),
     )
+
+
+def backend_crs() -> CRS:
+    """Return CRS of the backend database (MHUB_BACKEND_CRS)."""
+    return CRS.from_user_input(os.environ.get("MHUB_BACKEND_CRS", "EPSG:4326"))
+
+
+def backend_process_area(job: MapcheteJob) -> dict:
+    """Return process area in the CRS of the backend database (MHUB_BACKEND_CRS)."""
+    return process_area_from_config(job, dst_crs=backend_crs())[0]
+
+
+def backend_process_areas(jobs: List[MapcheteJob]) -> List[dict]:
+    """Calculate process areas of multiple jobs in parallel threads."""
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=min(len(jobs), os.cpu_count() or 1)
+    ) as executor:
+        # copy context of this thread so process areas are traced within the
+        # current span
+        contexts = [copy_context() for _ in jobs]
+        return list(
+            executor.map(
+                lambda context, job: context.run(backend_process_area, job),
+                contexts,
+                jobs,
+            )
+        )
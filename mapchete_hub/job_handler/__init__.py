@@ -1,29 +1,50 @@
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Generator
 
 from mapchete_hub.db.base import BaseStatusHandler
-from mapchete_hub.job_handler.background_thread import BackgroundThreadJobHandler
 from mapchete_hub.job_handler.base import JobHandlerBase
-from mapchete_hub.job_handler.k8s_worker import KubernetesWorkerJobHandler
-from mapchete_hub.job_handler.mhub_worker import MHubWorkerJobHandler
 from mapchete_hub.settings import MHubSettings, mhub_settings
 
+# job handlers are only imported when used, e.g. mhub-manager does not need dask
+_JOB_HANDLERS = {
+    "BackgroundThreadJobHandler": "mapchete_hub.job_handler.background_thread",
+    "KubernetesWorkerJobHandler": "mapchete_hub.job_handler.k8s_worker",
+    "MHubWorkerJobHandler": "mapchete_hub.job_handler.mhub_worker",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _JOB_HANDLERS:
+        import importlib
+
+        return getattr(importlib.import_module(_JOB_HANDLERS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 @contextmanager
 def init_job_handler(
     status_handler: BaseStatusHandler, mhub_settings: MHubSettings = mhub_settings
 ) -> Generator[JobHandlerBase, None, None]:
     if mhub_settings.job_handler == "background-thread":
+        from mapchete_hub.job_handler.background_thread import (
+            BackgroundThreadJobHandler,
+        )
+
         with BackgroundThreadJobHandler.from_settings(
             settings=mhub_settings, status_handler=status_handler
         ) as handler:
             yield handler
-    elif mhub_settings.job_handler == "k8s-managed-worker":
+    elif mhub_settings.job_handler in ["k8s-managed-worker", "queue"]:
+        from mapchete_hub.job_handler.mhub_worker import MHubWorkerJobHandler
+
+        # jobs stay queued in the database until a worker or executor picks them up
         with MHubWorkerJobHandler.from_settings(
             settings=mhub_settings, status_handler=status_handler
         ) as handler:
             yield handler
     elif mhub_settings.job_handler == "k8s-job-worker":
+        from mapchete_hub.job_handler.k8s_worker import KubernetesWorkerJobHandler
+
         with KubernetesWorkerJobHandler.from_settings(
             settings=mhub_settings, status_handler=status_handler
         ) as handler:
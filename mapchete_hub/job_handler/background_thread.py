@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Set
 
 from dask.distributed import LocalCluster
 from mapchete.commands.observer import Observers
@@ -23,8 +23,10 @@ class BackgroundThreadJobHandler(JobHandlerBase):
     self_instance_name: str = ""
     max_parallel_jobs: int
     backend_db_event_rate_limit: float = 0.2
+    backend_db_cancel_check_interval: float = 1.0
     dask_gateway_url: Optional[str] = None
     dask_scheduler_url: Optional[str] = None
+    _futures: Dict[str, Future]
 
     def __init__(
         self,
@@ -32,6 +34,7 @@ class BackgroundThreadJobHandler(JobHandlerBase):
         max_parallel_jobs: int = 3,
         self_instance_name: str = "",
         backend_db_event_rate_limit: float = 0.2,
+        backend_db_cancel_check_interval: float = 1.0,
         dask_gateway_url: Optional[str] = None,
         dask_scheduler_url: Optional[str] = None,
         **kwargs,
@@ -42,6 +45,8 @@ class BackgroundThreadJobHandler(JobHandlerBase):
         self.dask_gateway_url = dask_gateway_url
         self.dask_scheduler_url = dask_scheduler_url
         self.backend_db_event_rate_limit = backend_db_event_rate_limit
+        self.backend_db_cancel_check_interval = backend_db_cancel_check_interval
+        self._futures = dict()
 
     def __enter__(self):
         """Enter context."""
@@ -69,18 +74,26 @@ class BackgroundThreadJobHandler(JobHandlerBase):
         observers = observers or self.get_job_observers(job_entry)
         try:
             # send task to background to be able to quickly return a message
-            self._thread_pool.submit(
+            future = self._thread_pool.submit(
                 job_wrapper,
                 job_entry,
                 observers=observers,
                 local_cluster=self.local_cluster,
             )
+            self._futures[job_entry.job_id] = future
+            future.add_done_callback(
+                lambda _: self._futures.pop(job_entry.job_id, None)
+            )
             job_entry.status = Status.pending
             return job_entry
         except Exception as exc:
             observers.notify(status=Status.failed, exception=exc)
             raise
 
+    def active_jobs(self) -> Set[str]:
+        """Return IDs of jobs submitted to this handler which have not finished."""
+        return set(self._futures)
+
     @staticmethod
     def from_settings(
         settings, status_handler: BaseStatusHandler
@@ -90,6 +103,7 @@ class BackgroundThreadJobHandler(JobHandlerBase):
             max_parallel_jobs=settings.max_parallel_jobs,
             self_instance_name=settings.self_instance_name,
             backend_db_event_rate_limit=settings.backend_db_event_rate_limit,
+            backend_db_cancel_check_interval=settings.backend_db_cancel_check_interval,
             dask_gateway_url=settings.dask_gateway_url,
             dask_scheduler_url=settings.dask_scheduler_url,
         )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional
 from mapchete.commands.observer import Observers
 
 from mapchete_hub.db.base import BaseStatusHandler
@@ -12,6 +12,7 @@ class JobHandlerBase(ABC):
     self_instance_name: str
     status_handler: BaseStatusHandler
     backend_db_event_rate_limit: float
+    backend_db_cancel_check_interval: float = 1.0
 
     def get_job_observers(self, job_entry: JobEntry) -> Observers:
         # initialize database updater
@@ -19,6 +20,7 @@ class JobHandlerBase(ABC):
             backend_db=self.status_handler,
             job_entry=job_entry,
             event_rate_limit=self.backend_db_event_rate_limit,
+            cancel_check_interval=self.backend_db_cancel_check_interval,
         )
         # initialize slack messenger
         slack_messenger = SlackMessenger(
@@ -32,6 +34,10 @@ class JobHandlerBase(ABC):
     ) -> JobEntry:
         """Submit a job."""
 
+    def submit_many(self, job_entries: List[JobEntry]) -> List[JobEntry]:
+        """Submit multiple jobs."""
+        return [self.submit(job_entry) for job_entry in job_entries]
+
     def __enter__(self):
         """Enter context."""
         return self
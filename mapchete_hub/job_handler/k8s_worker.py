@@ -21,6 +21,7 @@ from mapchete_hub.k8s import (
 from mapchete_hub.models import JobEntry
 from mapchete_hub.settings import JobWorkerResources, MHubSettings, mhub_settings
 from mapchete_hub.timetools import passed_time_to_timestamp
+from mapchete_hub.tracing import current_traceparent, tracer
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,7 @@ class KubernetesWorkerJobHandler(JobHandlerBase):
     image_pull_secret: str
     pod_env_vars: Optional[dict] = None
     backend_db_event_rate_limit: float
+    backend_db_cancel_check_interval: float
     retry_job_x_times: int
     remove_job_after_seconds: int
 
@@ -51,6 +53,7 @@ class KubernetesWorkerJobHandler(JobHandlerBase):
         service_account_name: str,
         image_pull_secret: str,
         pod_env_vars: Optional[dict] = None,
+        backend_db_cancel_check_interval: float = 1.0,
         retry_job_x_times: int = 0,
         remove_job_after_seconds: int = 0,
     ):
@@ -60,6 +63,7 @@ class KubernetesWorkerJobHandler(JobHandlerBase):
         self.status_handler = status_handler
         self.self_instance_name = self_instance_name
         self.backend_db_event_rate_limit = backend_db_event_rate_limit
+        self.backend_db_cancel_check_interval = backend_db_cancel_check_interval
         self.namespace = namespace
         self.image = image
         self.pod_resources = pod_resources
@@ -75,18 +79,23 @@ class KubernetesWorkerJobHandler(JobHandlerBase):
         """Submit a job."""
         observers = observers or self.get_job_observers(job_entry)
         try:
-            create_k8s_job(
-                job_entry=job_entry,
-                namespace=self.namespace,
-                image=self.image,
-                resources=self.pod_resources,
-                service_account_name=self.service_account_name,
-                image_pull_secret=self.image_pull_secret,
-                pod_env_vars=self.pod_env_vars,
-                retry_job_x_times=self.retry_job_x_times,
-                remove_job_after_seconds=self.remove_job_after_seconds,
-                batch_v1_client=self._batch_v1_client,
-            )
+            with tracer.span(
+                "create_k8s_job",
+                traceparent=current_traceparent() or job_entry.trace_context,
+                job_id=job_entry.job_id,
+            ):
+                create_k8s_job(
+                    job_entry=job_entry,
+                    namespace=self.namespace,
+                    image=self.image,
+                    resources=self.pod_resources,
+                    service_account_name=self.service_account_name,
+                    image_pull_secret=self.image_pull_secret,
+                    pod_env_vars=self.pod_env_vars,
+                    retry_job_x_times=self.retry_job_x_times,
+                    remove_job_after_seconds=self.remove_job_after_seconds,
+                    batch_v1_client=self._batch_v1_client,
+                )
             logger.debug(
                 "job %s submitted and will be run as a kubernetes job"
                 % job_entry.job_id
@@ -138,6 +147,7 @@ class KubernetesWorkerJobHandler(JobHandlerBase):
             status_handler=status_handler,
             self_instance_name=settings.self_instance_name,
             backend_db_event_rate_limit=settings.backend_db_event_rate_limit,
+            backend_db_cancel_check_interval=settings.backend_db_cancel_check_interval,
             namespace=settings.k8s_namespace,
             image=f"{settings.worker_default_image}:{settings.worker_image_tag}",
             pod_resources=settings.to_k8s_job_worker_resources(),
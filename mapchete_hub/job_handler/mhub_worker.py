@@ -18,17 +18,20 @@ class MHubWorkerJobHandler(JobHandlerBase):
     status_handler: BaseStatusHandler
     self_instance_name: str
     backend_db_event_rate_limit: float
+    backend_db_cancel_check_interval: float
 
     def __init__(
         self,
         status_handler: BaseStatusHandler,
         self_instance_name: str,
         backend_db_event_rate_limit: float,
+        backend_db_cancel_check_interval: float = 1.0,
         **kwargs,
     ):
         self.status_handler = status_handler
         self.self_instance_name = self_instance_name
         self.backend_db_event_rate_limit = backend_db_event_rate_limit
+        self.backend_db_cancel_check_interval = backend_db_cancel_check_interval
 
     def submit(
         self, job_entry: JobEntry, observers: Optional[Observers] = None
@@ -63,4 +66,5 @@ class MHubWorkerJobHandler(JobHandlerBase):
             status_handler=status_handler,
             self_instance_name=settings.self_instance_name,
             backend_db_event_rate_limit=settings.backend_db_event_rate_limit,
+            backend_db_cancel_check_interval=settings.backend_db_cancel_check_interval,
         )
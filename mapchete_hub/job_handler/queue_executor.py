@@ -0,0 +1,192 @@
+"""
+Run jobs queued in the database.
+
+If multiple API worker processes are running, they only queue new jobs in the
+shared database (job handler "queue"). An executor process picks up pending
+jobs in order of submission and runs them in a BackgroundThreadJobHandler, so
+only one thread pool and LocalCluster exist per executor.
+
+Executors claim a job by switching it from pending to parsing and storing their
+executor_id in one conditional update, so multiple executors can share a
+database. Each executor records a heartbeat on every poll. Active jobs of
+executors without a heartbeat for MHUB_QUEUE_EXECUTOR_TIMEOUT seconds are
+considered orphaned and are queued again. Active jobs without executor_id are
+run by other job handlers sharing the database and are never touched, except by
+requeue_unowned_jobs() when migrating from executors which did not store their
+executor_id.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import List, Optional
+from uuid import uuid4
+
+from mapchete.enums import Status
+
+from mapchete_hub.db import BaseStatusHandler, init_backenddb
+from mapchete_hub.job_handler.background_thread import BackgroundThreadJobHandler
+from mapchete_hub.metrics import RUNNING_STATUSES
+from mapchete_hub.models import JobEntry
+from mapchete_hub.settings import MHubSettings, mhub_settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueueExecutor:
+    status_handler: BaseStatusHandler
+    job_handler: BackgroundThreadJobHandler
+    max_parallel_jobs: int
+    executor_id: str
+    executor_timeout: float
+
+    def __init__(
+        self,
+        status_handler: BaseStatusHandler,
+        job_handler: BackgroundThreadJobHandler,
+        max_parallel_jobs: int = 2,
+        executor_id: Optional[str] = None,
+        executor_timeout: float = 30.0,
+    ):
+        self.status_handler = status_handler
+        self.job_handler = job_handler
+        self.max_parallel_jobs = max_parallel_jobs
+        self.executor_id = executor_id or uuid4().hex
+        self.executor_timeout = executor_timeout
+
+    def heartbeat(self) -> None:
+        """Record that this executor is alive."""
+        self.status_handler.executor_heartbeat(self.executor_id)
+
+    def requeue_orphaned_jobs(self) -> List[str]:
+        """Reset active jobs of executors which stopped sending heartbeats."""
+        live_executors = self.status_handler.live_executors(self.executor_timeout)
+        live_executors.add(self.executor_id)
+        return self._requeue(
+            [
+                job.job_id
+                for job in self.status_handler.jobs(
+                    status=RUNNING_STATUSES, fields=["executor_id"]
+                )
+                if getattr(job, "executor_id", None) not in {None, *live_executors}
+            ]
+        )
+
+    def requeue_unowned_jobs(self) -> List[str]:
+        """
+        Reset active jobs without executor_id.
+
+        Only run this once when migrating from executors which did not store
+        their executor_id and if no other job handler shares the database, as
+        jobs run by other job handlers do not have an executor_id either.
+        """
+        return self._requeue(
+            [
+                job.job_id
+                for job in self.status_handler.jobs(
+                    status=RUNNING_STATUSES, fields=["executor_id"]
+                )
+                if getattr(job, "executor_id", None) is None
+            ]
+        )
+
+    def _requeue(self, job_ids: List[str]) -> List[str]:
+        active_jobs = self.job_handler.active_jobs()
+        requeued = []
+        for job_id in job_ids:
+            if job_id in active_jobs:  # pragma: no cover
+                continue
+            # job may have finished in the meantime
+            elif self.status_handler.set_many(
+                [job_id], status=Status.pending, if_status=RUNNING_STATUSES
+            ):
+                logger.warning("requeue orphaned job %s", job_id)
+                requeued.append(job_id)
+        return requeued
+
+    def claim(self, job_id: str) -> bool:
+        """Claim pending job for this executor, fails if another one was faster."""
+        return bool(
+            self.status_handler.set_many(
+                [job_id],
+                status=Status.parsing,
+                if_status=[Status.pending],
+                executor_id=self.executor_id,
+            )
+        )
+
+    def submit_pending_jobs(self) -> List[JobEntry]:
+        """Claim and submit oldest pending jobs until max_parallel_jobs are active."""
+        active_jobs = self.job_handler.active_jobs()
+        capacity = self.max_parallel_jobs - len(active_jobs)
+        if capacity <= 0:
+            return []
+        submitted: List[JobEntry] = []
+        # only read job IDs, with some spare ones in case other executors are faster
+        for job in self.status_handler.jobs(
+            status=[Status.pending],
+            sort="submitted",
+            limit=capacity * 2,
+            fields=["job_id"],
+        ):
+            if len(submitted) == capacity:
+                break
+            elif job.job_id in active_jobs or not self.claim(job.job_id):
+                continue
+            logger.info("submitting queued job %s", job.job_id)
+            submitted.append(
+                self.job_handler.submit(self.status_handler.job(job.job_id))
+            )
+        return submitted
+
+    def run(
+        self, poll_interval: float = 1.0, stop: Optional[threading.Event] = None
+    ) -> None:
+        """Poll the database for pending jobs until stop is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.heartbeat()
+                self.requeue_orphaned_jobs()
+                self.submit_pending_jobs()
+            except Exception as exc:  # pragma: no cover
+                logger.exception(exc)
+            stop.wait(poll_interval)
+        logger.info("stopped polling, waiting for active jobs to finish ...")
+        # other executors would requeue active jobs without heartbeats
+        while self.job_handler.active_jobs():
+            try:
+                self.heartbeat()
+            except Exception as exc:  # pragma: no cover
+                logger.exception(exc)
+            time.sleep(poll_interval)
+
+
+def run_queue_executor(
+    settings: MHubSettings = mhub_settings,
+    stop: Optional[threading.Event] = None,
+    requeue_unowned: bool = False,
+) -> None:
+    """
+    Run jobs queued in the backend database of settings until stop is set.
+
+    If requeue_unowned is set, active jobs without executor_id are queued again
+    before polling starts.
+    """
+    if settings.backend_db == "memory":
+        raise ValueError("the queue executor does not work with an in-memory db!")
+    with init_backenddb(src=settings.backend_db) as status_handler:
+        with BackgroundThreadJobHandler.from_settings(
+            settings=settings, status_handler=status_handler
+        ) as job_handler:
+            executor = QueueExecutor(
+                status_handler=status_handler,
+                job_handler=job_handler,
+                max_parallel_jobs=settings.max_parallel_jobs,
+                executor_timeout=settings.queue_executor_timeout,
+            )
+            if requeue_unowned:
+                executor.requeue_unowned_jobs()
+            executor.run(poll_interval=settings.queue_poll_interval, stop=stop)
@@ -1,18 +1,34 @@
+import asyncio
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from mapchete_hub import __version__
-from mapchete_hub.db import BaseStatusHandler, init_backenddb
+from mapchete_hub import __version__, serialization
+from mapchete_hub.db import (
+    AsyncBaseStatusHandler,
+    BaseStatusHandler,
+    init_async_backenddb,
+    init_backenddb,
+)
+from mapchete_hub.events import JobEvents
 from mapchete_hub.job_handler import init_job_handler
 from mapchete_hub.job_handler.base import JobHandlerBase
+from mapchete_hub.metrics import mark_process_dead
+from mapchete_hub.processes import ProcessCatalogue
 from mapchete_hub.settings import mhub_settings
 
 logger = logging.getLogger(__name__)
 
 
 class Resources:
+    admission_lock: asyncio.Lock
     backend_db: BaseStatusHandler
+    async_backend_db: AsyncBaseStatusHandler
+    job_events: JobEvents
     job_handler: JobHandlerBase
+    process_catalogue: ProcessCatalogue
+    submission_executor: ThreadPoolExecutor
 
     def __setattr__(self, name, value):
         self.__dict__[name] = value
@@ -45,16 +61,56 @@ async def setup_lifespan_resources(*args):
     except ImportError:  # pragma: no cover
         pass
 
+    if serialization.orjson is None:  # pragma: no cover
+        logger.warning("orjson is not installed, encoding JSON with the json module")
+
+    # importing all registered processes is expensive, so do it only once
+    resources.process_catalogue = ProcessCatalogue(
+        ttl=mhub_settings.process_catalogue_ttl
+    )
+    await asyncio.to_thread(resources.process_catalogue.refresh)
+
+    # serializes admission checks and job inserts of this process
+    resources.admission_lock = asyncio.Lock()
+
     if mhub_settings.backend_db == "memory":
         logger.warning("MHUB_BACKEND_DB not provided; using in-memory metadata store")
     # use context managers to assert proper shutdown when app exits
     # start status handler
     with init_backenddb(src=mhub_settings.backend_db) as backend_db:
         resources.backend_db = backend_db
-        # start thread pool
-        with init_job_handler(
-            status_handler=resources.backend_db, mhub_settings=mhub_settings
-        ) as job_handler:
-            resources.job_handler = job_handler
+        # the REST endpoints use a non-blocking status handler on the same backend
+        async with init_async_backenddb(
+            src=mhub_settings.backend_db, status_handler=backend_db
+        ) as async_backend_db:
+            resources.async_backend_db = async_backend_db
+            # pass on all job updates written by this process to subscribers
+            resources.job_events = JobEvents()
+            backend_db.add_listener(resources.job_events)
+            async_backend_db.add_listener(resources.job_events)
+            # ... and the updates written by other processes
+            poller = asyncio.create_task(
+                resources.job_events.poll(
+                    lambda **kwargs: resources.async_backend_db.jobs(**kwargs)
+                )
+            )
+            # start thread pool
+            with init_job_handler(
+                status_handler=resources.backend_db, mhub_settings=mhub_settings
+            ) as job_handler:
+                resources.job_handler = job_handler
+
+                # blocking steps of job submissions run here instead of the event loop
+                with ThreadPoolExecutor(
+                    max_workers=mhub_settings.submission_threads,
+                    thread_name_prefix="mhub-submission",
+                ) as submission_executor:
+                    resources.submission_executor = submission_executor
+
+                    try:
+                        yield
+                    finally:
+                        poller.cancel()
 
-            yield
+    # live gauges of this worker process must not be exposed any more
+    mark_process_dead(os.getpid())
@@ -0,0 +1,209 @@
+"""
+Prometheus metrics.
+
+Metrics are collected in the default registry of the process. If the
+PROMETHEUS_MULTIPROC_DIR environment variable is set, e.g. when running
+multiple uvicorn workers, all processes write their metrics into this
+directory and metrics of all processes are aggregated when being exposed.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Tuple
+
+from mapchete.enums import Status
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+METRICS_MEDIA_TYPE = CONTENT_TYPE_LATEST
+
+RUNNING_STATUSES = [
+    Status.parsing,
+    Status.initializing,
+    Status.running,
+    Status.post_processing,
+    Status.retrying,
+]
+
+# status handler methods which are timed
+STATUS_HANDLER_METHODS = [
+    "jobs",
+    "count",
+    "job",
+    "status",
+    "new",
+    "new_many",
+    "set",
+    "_update_job",
+    "write_progress",
+    "set_many",
+    "stats",
+    "status_counts",
+    "claim_idempotency_key",
+    "bind_idempotency_key",
+    "release_idempotency_key",
+    "executor_heartbeat",
+    "live_executors",
+]
+
+REQUEST_LATENCY = Histogram(
+    "mhub_http_request_duration_seconds",
+    "Duration of HTTP requests until the response has been sent.",
+    ["method", "route", "status_code"],
+)
+DB_CALL_LATENCY = Histogram(
+    "mhub_db_call_duration_seconds",
+    "Duration of status handler calls.",
+    ["handler", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+QUEUED_JOBS = Gauge(
+    "mhub_jobs_queued",
+    "Number of pending jobs.",
+    multiprocess_mode="livemax",
+)
+RUNNING_JOBS = Gauge(
+    "mhub_jobs_running",
+    "Number of jobs being processed.",
+    multiprocess_mode="livemax",
+)
+JOB_START_LATENCY = Histogram(
+    "mhub_job_start_latency_seconds",
+    "Time between job submission and start of processing.",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600),
+)
+OBSERVER_UPDATES = Counter(
+    "mhub_observer_updates_total",
+    "Number of job updates received by observers.",
+    ["observer"],
+)
+CLUSTER_PROVISIONING = Histogram(
+    "mhub_cluster_provisioning_seconds",
+    "Time until a dask cluster and client are ready.",
+    ["cluster_type"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Return registry aggregating all processes in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def latest_metrics() -> bytes:
+    """Return metrics in the Prometheus text format."""
+    return generate_latest(metrics_registry())
+
+
+def serve_metrics(port: int, addr: str = "0.0.0.0") -> None:
+    """Expose metrics on a HTTP listener running in a daemon thread."""
+    logger.info("serving metrics on %s:%s", addr, port)
+    start_http_server(port, addr=addr, registry=metrics_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Remove live gauges of a process which exits in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def set_job_counts(status_counts: Dict[Status, int]) -> None:
+    """Set queued and running jobs gauges from job counts per status."""
+    QUEUED_JOBS.set(status_counts.get(Status.pending, 0))
+    RUNNING_JOBS.set(sum(status_counts.get(status, 0) for status in RUNNING_STATUSES))
+
+
+def timed_db_call(handler: str, method: str) -> Callable[[Callable], Callable]:
+    """Decorate a status handler method to observe its duration."""
+    histogram = DB_CALL_LATENCY.labels(handler=handler, method=method)
+
+    def _decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def _async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+            return _async_wrapper
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return _wrapper
+
+    return _decorator
+
+
+def instrument_status_handler(
+    cls: type, methods: Iterable[str] = STATUS_HANDLER_METHODS
+) -> None:
+    """Time status handler methods implemented by this class."""
+    for method in methods:
+        func = cls.__dict__.get(method)
+        if func is None or getattr(func, "__isabstractmethod__", False):
+            continue
+        setattr(cls, method, timed_db_call(cls.__name__, method)(func))
+
+
+class MetricsMiddleware:
+    """Observe request durations per route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":  # pragma: no cover
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def _send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            method, route = _route(scope)
+            REQUEST_LATENCY.labels(
+                method=method, route=route, status_code=str(status_code)
+            ).observe(time.perf_counter() - start)
+
+
+def _route(scope: Scope) -> Tuple[str, str]:
+    # the router stores the matched route in the scope, keeping the number of
+    # label values independent from path parameters
+    route = scope.get("route")
+    return scope["method"], getattr(route, "path", "unmatched")
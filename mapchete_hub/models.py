@@ -4,9 +4,11 @@ Models and schemas.
 
 from __future__ import annotations
 
+import base64
+from datetime import datetime, timezone
 from enum import Enum
 import logging
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from mapchete.config import ProcessConfig
 from mapchete.config.models import DaskSpecs
@@ -53,7 +55,7 @@ class MapcheteJob(BaseModel):
 class GeoJSON(BaseModel):
     type: str = "Feature"
     id: str
-    geometry: dict
+    geometry: Optional[dict] = None
     bounds: Optional[List[float]] = None
     area: Optional[str] = None
     properties: dict = Field(default_factory=dict)
@@ -106,6 +108,9 @@ class JobEntry(BaseModel):
     slack_channel_id: Optional[str] = None
     submitted_to_k8s: bool = False
     k8s_attempts: int = 0
+    client_id: Optional[str] = None
+    trace_context: Optional[str] = None
+    executor_id: Optional[str] = None
 
     def update(self, **new_data):
         for field, value in new_data.items():
@@ -141,6 +146,170 @@ class JobEntry(BaseModel):
         return JobEntry(**kwargs)
 
 
+SUMMARY_FIELDS = [
+    "job_id",
+    "job_name",
+    "status",
+    "current_progress",
+    "total_progress",
+    "bounds",
+    "submitted",
+    "updated",
+]
+
+
+class JobSummary(BaseModel):
+    """
+    Lightweight projection of a JobEntry.
+
+    Only the fields requested from the backend are set. Besides the summary
+    fields declared here, any other requested JobEntry field is kept as is.
+    """
+
+    model_config = ConfigDict(extra="allow")
+
+    job_id: str
+    job_name: Optional[str] = None
+    status: Optional[Status] = None
+    current_progress: Optional[NonNegativeInt] = None
+    total_progress: Optional[NonNegativeInt] = None
+    bounds: Optional[List[float]] = None
+    submitted: Optional[AwareDatetime] = None
+    updated: Optional[AwareDatetime] = None
+
+    def to_geojson(self) -> GeoJSON:
+        return GeoJSON(
+            type="Feature",
+            id=self.job_id,
+            geometry=getattr(self, "geometry", None),
+            bounds=self.bounds,
+            properties=self.model_dump(
+                exclude_unset=True, exclude={"job_id", "geometry", "bounds"}
+            ),
+        )
+
+    def to_geojson_dict(self) -> dict:
+        return self.to_geojson().to_dict()
+
+    @staticmethod
+    def from_dict(kwargs: dict) -> JobSummary:
+        # parse timestamps to timezone-aware datetime objects
+        for key in ["submitted", "started", "finished", "updated"]:
+            value = kwargs.get(key)
+            if value is not None:
+                kwargs[key] = parse_to_date(value)
+        return JobSummary(**kwargs)
+
+
+def parse_fields(fields: Union[str, List[str]]) -> List[str]:
+    """
+    Convert fields parameter to a list of JobEntry fields.
+
+    'summary' expands to SUMMARY_FIELDS and 'job_id' is always included.
+    """
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    out = ["job_id"]
+    for field in fields:
+        for name in SUMMARY_FIELDS if field == "summary" else [field]:
+            if name not in JobEntry.model_fields:
+                raise ValueError(f"invalid field: {name}")
+            if name not in out:
+                out.append(name)
+    return out
+
+
+class IdempotencyKey(BaseModel):
+    """Idempotency-Key of a job submission and the job it has created."""
+
+    key: str
+    fingerprint: Optional[str] = None
+    job_id: Optional[str] = None
+    created: AwareDatetime
+
+    def expired(self, ttl: float, claim_ttl: Optional[float] = None) -> bool:
+        """
+        Keys not bound to a job expire after claim_ttl already, as the submission
+        which has claimed them most likely failed without releasing them.
+        """
+        if self.job_id is None and claim_ttl is not None:
+            ttl = min(ttl, claim_ttl)
+        return (datetime.now(timezone.utc) - self.created).total_seconds() > ttl
+
+
+class JobsLookup(BaseModel):
+    """Look up multiple jobs by their IDs."""
+
+    job_ids: List[str]
+    fields: Optional[Union[str, List[str]]] = None
+
+
+class JobsFilter(BaseModel):
+    """Select jobs by their IDs and/or by the filters of GET /jobs."""
+
+    job_ids: Optional[List[str]] = None
+    output_path: Optional[str] = None
+    status: Optional[Union[str, List[str]]] = None
+    command: Optional[str] = None
+    job_name: Optional[str] = None
+    bounds: Optional[List[float]] = None
+    from_date: Optional[str] = None
+    to_date: Optional[str] = None
+
+
+STATS_PERCENTILES = (50, 90, 99)
+CUSTOM_PROCESS = "custom"
+UNKNOWN_PROCESS = "unknown"
+
+
+def process_label(process: Optional[Union[str, List[str]]]) -> str:
+    """Name of a process in job statistics; inline process code is 'custom'."""
+    if process is None:
+        return UNKNOWN_PROCESS
+    elif isinstance(process, list):
+        return CUSTOM_PROCESS
+    return str(process)
+
+
+class DurationStats(BaseModel):
+    """
+    Number and percentiles of durations in seconds.
+
+    Percentiles are the nearest lower rank, i.e. the value at position
+    floor(p * (count - 1)) of the sorted durations.
+    """
+
+    count: NonNegativeInt = 0
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class GroupStats(BaseModel):
+    """Number of jobs, runtimes and queue waits of a group of jobs."""
+
+    jobs: NonNegativeInt = 0
+    runtime: DurationStats = DurationStats()
+    queue_wait: DurationStats = DurationStats()
+
+
+class BucketStats(GroupStats):
+    """Statistics of jobs submitted within a time bucket."""
+
+    start: AwareDatetime
+
+
+class JobStats(BaseModel):
+    """Aggregated statistics of jobs."""
+
+    jobs: NonNegativeInt = 0
+    queue_depth: NonNegativeInt = 0
+    status: Dict[Status, NonNegativeInt] = Field(default_factory=dict)
+    processes: Dict[str, GroupStats] = Field(default_factory=dict)
+    bucket_size: int = 3600
+    buckets: List[BucketStats] = Field(default_factory=list)
+
+
 def to_status(status: Union[Status, str]) -> Status:
     if isinstance(status, Status):
         return status
@@ -157,3 +326,57 @@ def to_status_list(
     elif isinstance(statuses, list):
         return [to_status(status) for status in statuses]
     raise TypeError(f"cannot convert {statuses} to list of Status instances")
+
+
+class SortField(str, Enum):
+    updated = "updated"
+    submitted = "submitted"
+
+
+DEFAULT_SORT = "-submitted"
+
+
+def parse_sort(sort: str) -> Tuple[SortField, bool]:
+    """
+    Parse sort parameter into field and order.
+
+    A leading '-' means descending order, e.g. '-updated'.
+    """
+    descending = sort.startswith("-")
+    try:
+        return SortField(sort.lstrip("-+")), descending
+    except ValueError as exc:
+        raise ValueError(
+            f"invalid sort parameter {sort}, must be one of "
+            f"{[field.value for field in SortField]} with an optional '-' prefix"
+        ) from exc
+
+
+class JobsCursor(BaseModel):
+    """Position of the last job of a page when paginating through jobs."""
+
+    sort: str
+    value: AwareDatetime
+    job_id: str
+
+    @staticmethod
+    def from_job(job: Union[JobEntry, JobSummary], sort: str) -> JobsCursor:
+        field, _ = parse_sort(sort)
+        return JobsCursor(sort=sort, value=getattr(job, field.value), job_id=job.job_id)
+
+    def encode(self) -> str:
+        """Return opaque string representation."""
+        return (
+            base64.urlsafe_b64encode(self.model_dump_json().encode())
+            .decode()
+            .rstrip("=")
+        )
+
+    @staticmethod
+    def decode(cursor: str) -> JobsCursor:
+        try:
+            return JobsCursor.model_validate_json(
+                base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            )
+        except ValueError as exc:
+            raise ValueError(f"invalid cursor: {cursor}") from exc
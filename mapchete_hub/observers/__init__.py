@@ -1,4 +1,5 @@
 from mapchete_hub.observers.db_updater import DBUpdater
 from mapchete_hub.observers.slack_messenger import SlackMessenger
+from mapchete_hub.observers.trace_recorder import TraceRecorder
 
-__all__ = ["DBUpdater", "SlackMessenger"]
+__all__ = ["DBUpdater", "SlackMessenger", "TraceRecorder"]
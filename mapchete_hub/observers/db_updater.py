@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import time
 import traceback
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from mapchete.commands.observer import ObserverProtocol
@@ -12,6 +13,7 @@ from mapchete.executor import DaskExecutor
 from mapchete.types import Progress
 
 from mapchete_hub.db import BaseStatusHandler
+from mapchete_hub.metrics import JOB_START_LATENCY, OBSERVER_UPDATES
 from mapchete_hub.models import JobEntry
 
 logger = logging.getLogger(__name__)
@@ -20,17 +22,22 @@ logger = logging.getLogger(__name__)
 class DBUpdater(ObserverProtocol):
     last_event: float = 0.0
     event_rate_limit: float = 0.2
+    cancel_check_interval: float = 1.0
     backend_db: BaseStatusHandler
+    _cancelled: bool = False
+    _last_cancel_check: Optional[float] = None
 
     def __init__(
         self,
         backend_db: BaseStatusHandler,
         job_entry: JobEntry,
         event_rate_limit: float = 0.2,
+        cancel_check_interval: float = 1.0,
     ):
         self.backend_db = backend_db
         self.job_entry = job_entry
         self.event_rate_limit = event_rate_limit
+        self.cancel_check_interval = cancel_check_interval
 
     def update(
         self,
@@ -42,18 +49,12 @@ class DBUpdater(ObserverProtocol):
         result: Optional[dict] = None,
         **__,
     ):
+        OBSERVER_UPDATES.labels(observer=self.__class__.__name__).inc()
         set_kwargs: Dict[str, Any] = dict()
 
-        # check always if job was cancelled but respect the rate limit
-        event_time_passed = time.time() - self.last_event
-        if event_time_passed > self.event_rate_limit and status not in [
-            Status.failed,
-            Status.cancelled,
-        ]:
-            current_status = self.backend_db.job(self.job_entry.job_id).status
-            # if job status was set to cancelled, raise a JobCancelledError
-            if current_status == Status.cancelled:
-                raise JobCancelledError("job was cancelled")
+        # if job status was set to cancelled, raise a JobCancelledError
+        if status not in [Status.failed, Status.cancelled] and self.is_cancelled():
+            raise JobCancelledError("job was cancelled")
 
         # job status always has to be updated
         if status:
@@ -61,7 +62,13 @@ class DBUpdater(ObserverProtocol):
             logger.debug(
                 "DB update: job %s status changed to %s", self.job_entry.job_id, status
             )
-            if status == Status.retrying:
+            if status == Status.initializing and self.job_entry.submitted:
+                JOB_START_LATENCY.observe(
+                    (
+                        datetime.now(timezone.utc) - self.job_entry.submitted
+                    ).total_seconds()
+                )
+            elif status == Status.retrying:
                 logger.debug("job retrying, reset dashboard link to None")
                 self.set(dask_dashboard_link=None)
 
@@ -96,6 +103,21 @@ class DBUpdater(ObserverProtocol):
         if set_kwargs:
             self.set(**set_kwargs)
 
+    def is_cancelled(self) -> bool:
+        """
+        Return whether job was cancelled.
+
+        The database is read at most once per cancel_check_interval.
+        """
+        now = time.monotonic()
+        if not self._cancelled and (
+            self._last_cancel_check is None
+            or now - self._last_cancel_check >= self.cancel_check_interval
+        ):
+            self._cancelled = self.backend_db.is_cancelled(self.job_entry.job_id)
+            self._last_cancel_check = now
+        return self._cancelled
+
     def set(self, **kwargs):
         if kwargs:
-            self.backend_db.set(self.job_entry.job_id, **kwargs)
+            self.backend_db.update_job(self.job_entry.job_id, **kwargs)
@@ -10,6 +10,7 @@ from mapchete.errors import JobCancelledError
 from mapchete.executor import DaskExecutor
 from mapchete.pretty import pretty_seconds
 
+from mapchete_hub.metrics import OBSERVER_UPDATES
 from mapchete_hub.models import JobEntry
 from mapchete_hub.observers.db_updater import DBUpdater
 from mapchete_hub.settings import mhub_settings
@@ -87,6 +88,7 @@ class SlackMessenger(ObserverProtocol):
         message: Optional[str] = None,
         **__,
     ):
+        OBSERVER_UPDATES.labels(observer=self.__class__.__name__).inc()
         if status:
             if status == Status.pending and message:
                 self.send(message)
@@ -197,6 +199,30 @@ class SlackMessenger(ObserverProtocol):
                 self.send(message)
 
 
+def send_slack_message(message: str) -> None:
+    """Send a single message to the slack channel, e.g. to summarize bulk operations."""
+    if (
+        not mhub_settings.slack_token or not mhub_settings.slack_channel
+    ):  # pragma: no cover
+        logger.debug("no MHUB_SLACK_TOKEN or MHUB_SLACK_CHANNEL env variable set.")
+        return
+    try:  # pragma: no cover
+        from slack_sdk import WebClient
+        from slack_sdk.errors import SlackApiError
+    except ImportError:  # pragma: no cover
+        logger.debug(
+            "install 'slack' extra and set MHUB_SLACK_TOKEN to send messages to slack"
+        )
+        return
+    client = WebClient(token=mhub_settings.slack_token)  # pragma: no cover
+    for chunk in split_long_text(message):  # pragma: no cover
+        try:
+            logger.debug("announce on slack: %s", chunk)
+            client.chat_postMessage(channel=mhub_settings.slack_channel, text=chunk)
+        except SlackApiError as e:
+            logger.exception(e)
+
+
 def split_long_text(text: str, max_length: int = 4000) -> List[str]:
     out_chunks = []
     for line_chunk in chunk_by_newlines(text, max_length):
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from mapchete.commands.observer import ObserverProtocol
+from mapchete.enums import Status
+
+from mapchete_hub.metrics import OBSERVER_UPDATES
+from mapchete_hub.tracing import Span, tracer
+
+logger = logging.getLogger(__name__)
+
+# job statuses which are recorded as spans until the next status change
+TRACED_STATUSES = [
+    Status.parsing,
+    Status.initializing,
+    Status.running,
+    Status.post_processing,
+    Status.retrying,
+]
+
+
+class TraceRecorder(ObserverProtocol):
+    """Record a span for each processing stage of a job."""
+
+    traceparent: str
+    current_span: Optional[Span] = None
+
+    def __init__(self, traceparent: str):
+        self.traceparent = traceparent
+
+    def update(
+        self,
+        *_,
+        status: Optional[Status] = None,
+        exception: Optional[Exception] = None,
+        **__,
+    ):
+        OBSERVER_UPDATES.labels(observer=self.__class__.__name__).inc()
+        if status is None:
+            return
+        if self.current_span is not None:
+            tracer.end_span(self.current_span, exception=exception)
+            self.current_span = None
+        if status in TRACED_STATUSES:
+            self.current_span = tracer.start_span(
+                status.value, traceparent=self.traceparent
+            )
@@ -0,0 +1,77 @@
+"""
+Catalogue of registered mapchete processes.
+
+Collecting the registered processes imports all process modules, so the
+catalogue is built once and its JSON representations are kept in memory.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from mapchete.processes import process_names_docstrings
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogueDocument(NamedTuple):
+    """Serialized JSON document and its ETag."""
+
+    body: bytes
+    etag: str
+
+    @staticmethod
+    def from_obj(obj) -> "CatalogueDocument":
+        body = json.dumps(obj).encode()
+        return CatalogueDocument(
+            body=body,
+            etag=f'"{hashlib.sha1(body, usedforsecurity=False).hexdigest()}"',
+        )
+
+
+class ProcessCatalogue:
+    """
+    In-memory catalogue of registered processes.
+
+    The catalogue is rebuilt on refresh() or on first access after ttl seconds
+    have passed. If ttl is None, the catalogue never expires.
+    """
+
+    ttl: Optional[float]
+    processes: CatalogueDocument
+    _process: Dict[str, CatalogueDocument]
+    _built: Optional[float] = None
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @property
+    def expired(self) -> bool:
+        if self._built is None:
+            return True
+        elif self.ttl is None:
+            return False
+        return time.monotonic() - self._built > self.ttl
+
+    def refresh(self) -> None:
+        """Collect registered processes and serialize their descriptions."""
+        with self._lock:
+            descriptions: List[dict] = [
+                {"title": title, "description": description}
+                for title, description in process_names_docstrings()
+            ]
+            self._process = {
+                description["title"]: CatalogueDocument.from_obj(description)
+                for description in descriptions
+            }
+            self.processes = CatalogueDocument.from_obj({"processes": descriptions})
+            self._built = time.monotonic()
+        logger.debug("process catalogue contains %s processes", len(descriptions))
+
+    def process(self, process_id: str) -> CatalogueDocument:
+        """Return process description or raise a KeyError."""
+        return self._process[process_id]
@@ -0,0 +1,91 @@
+"""
+Fast JSON serialization of jobs.
+
+JobEntry.to_geojson_dict() builds a GeoJSON model from a full model dump and
+the result gets encoded again by FastAPI. The functions here dump each job
+once and encode the GeoJSON feature directly into bytes using orjson. The
+json module of the standard library is only used if orjson is not installed.
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Union
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+from mapchete_hub.models import JobEntry, JobSummary
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+FEATURE_EXCLUDE = {"job_id", "geometry", "bounds"}
+
+
+def _default(obj: Any) -> Any:
+    """Encode types not natively supported by the JSON encoder."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    elif isinstance(obj, Enum):
+        return obj.value
+    elif isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode object as JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(  # pragma: no cover
+        obj, default=_default, separators=(",", ":")
+    ).encode()
+
+
+def job_feature(job: Union[JobEntry, JobSummary]) -> dict:
+    """
+    Return GeoJSON feature of a job.
+
+    The output equals job.to_geojson_dict() but without building an intermediate
+    GeoJSON model. For a JobSummary, only the fields read from the backend are
+    set.
+    """
+    return {
+        "type": "Feature",
+        "id": job.job_id,
+        "geometry": getattr(job, "geometry", None),
+        "bounds": job.bounds,
+        "area": None,
+        "properties": job.model_dump(
+            exclude=FEATURE_EXCLUDE,
+            exclude_unset=isinstance(job, JobSummary),
+        ),
+    }
+
+
+def feature_collection(jobs: Iterable[Union[JobEntry, JobSummary]], **kwargs) -> dict:
+    """Return GeoJSON FeatureCollection of jobs plus additional members."""
+    features = [job_feature(job) for job in jobs]
+    return dict(
+        type="FeatureCollection",
+        features=features,
+        numberReturned=len(features),
+        **kwargs,
+    )
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response skipping FastAPI response validation and encoding.
+
+    Endpoints return this response directly, e.g. with content from
+    job_feature(), so FastAPI does not walk the content again.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
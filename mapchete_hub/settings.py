@@ -1,21 +1,25 @@
 """
 Settings.
+
+This module is imported by all command line tools, so dask, aiohttp and
+mapchete are only imported when required.
 """
 
+import functools
 import logging
 import os
-from typing import Dict, Literal, Optional, Tuple, Type, TypedDict, Union
-
-from aiohttp import (
-    ClientResponseError,
-    ServerConnectionError,
-    ServerDisconnectedError,
-    ServerTimeoutError,
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypedDict,
+    Union,
 )
-from dask.distributed import CancelledError, TimeoutError
-from dask_gateway.options import Options
-from distributed.comm.core import CommClosedError
-from mapchete.config.models import DaskAdaptOptions, DaskSpecs
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from mapchete_hub import __version__
@@ -29,6 +33,31 @@ JobWorkerResources = Dict[Literal["requests", "limits"], PodResources]
 
 LogLevels = Literal["notset", "debug", "info", "warning", "error", "critical"]
 
+if TYPE_CHECKING:  # pragma: no cover
+    from dask_gateway.options import Options
+    from mapchete.config.models import DaskSpecs
+
+
+def default_retry_exceptions() -> Tuple[Type[Exception], ...]:
+    from aiohttp import (
+        ClientResponseError,
+        ServerConnectionError,
+        ServerDisconnectedError,
+        ServerTimeoutError,
+    )
+    from dask.distributed import CancelledError, TimeoutError
+    from distributed.comm.core import CommClosedError
+
+    return (
+        CancelledError,
+        ClientResponseError,
+        CommClosedError,
+        ServerConnectionError,
+        ServerDisconnectedError,
+        ServerTimeoutError,
+        TimeoutError,
+    )
+
 
 class MHubSettings(BaseSettings):
     """
@@ -44,22 +73,44 @@ class MHubSettings(BaseSettings):
     add_mapchete_logger: bool = False
     backend_db: str = "memory"
     backend_db_event_rate_limit: float = 0.2
+    backend_db_cancel_check_interval: float = 1.0
+    # buffer progress updates for this many seconds, 0 writes immediately
+    backend_db_write_behind_interval: float = 1.0
     mongodb_timeout: float = 5
+    long_poll_max_wait: float = 60.0
+    event_stream_keepalive: float = 15.0
+    # read subscribed jobs from the database every this many seconds, as updates
+    # written by other processes, e.g. external workers, emit no events
+    event_poll_interval: float = 5.0
+    process_catalogue_ttl: Optional[float] = None
+    compression_minimum_size: int = 1000
+    compression_gzip_level: int = 6
+    compression_zstd_level: int = 3
     cancellederror_tries: int = 1  # this is deprecated!
     retries: int = 1
-    retry_on_exception: Union[Tuple[Type[Exception], ...], Type[Exception]] = (
-        CancelledError,
-        ClientResponseError,
-        CommClosedError,
-        ServerConnectionError,
-        ServerDisconnectedError,
-        ServerTimeoutError,
-        TimeoutError,
-    )
+    # None retries on default_retry_exceptions(), which are imported when used
+    retry_on_exception: Optional[
+        Union[Tuple[Type[Exception], ...], Type[Exception]]
+    ] = None
     job_handler: Literal[
-        "background-thread", "k8s-managed-worker", "k8s-job-worker"
+        "background-thread", "k8s-managed-worker", "k8s-job-worker", "queue"
     ] = "background-thread"
     max_parallel_jobs: int = 2
+    submission_threads: int = 4
+    queue_poll_interval: float = 1.0
+    # executors without heartbeat for this many seconds are considered dead
+    queue_executor_timeout: float = 30.0
+    idempotency_key_ttl: float = 60 * 60 * 24  # 24 hours
+    # keys not bound to a job within this many seconds can be claimed again
+    idempotency_claim_ttl: float = 60 * 5
+    admission_max_queued_jobs: Optional[int] = None
+    admission_max_queued_area: Optional[float] = None
+    admission_max_queued_jobs_per_client: Optional[int] = None
+    admission_client_header: str = "X-Client-ID"
+    admission_drain_rate_window: float = 60 * 60
+    admission_max_retry_after: int = 60 * 60
+    trace_file: Optional[str] = None
+    trace_max_traces: int = 1000
     max_parallel_jobs_interval_seconds: int = 10
     dask_gateway_url: Optional[str] = None
     dask_gateway_pass: Optional[str] = None
@@ -129,26 +180,39 @@ class MHubSettings(BaseSettings):
 mhub_settings: MHubSettings = MHubSettings()
 
 
-DASK_DEFAULT_SPECS = DaskSpecs(
-    worker_cores=0.87,
-    worker_cores_limit=2.0,
-    worker_memory=2.1,
-    worker_memory_limit=12.0,
-    worker_threads=2,
-    worker_environment={},
-    scheduler_cores=1,
-    scheduler_cores_limit=1.0,
-    scheduler_memory=1.0,
-    image=f"{mhub_settings.worker_default_image}:{mhub_settings.worker_image_tag}",
-    adapt_options=DaskAdaptOptions(
-        minimum=mhub_settings.dask_min_workers,
-        maximum=mhub_settings.dask_max_workers,
-        active=mhub_settings.dask_adaptive_scaling,
-    ),
-)
+@functools.cache
+def default_dask_specs() -> "DaskSpecs":
+    from mapchete.config.models import DaskAdaptOptions, DaskSpecs
+
+    return DaskSpecs(
+        worker_cores=0.87,
+        worker_cores_limit=2.0,
+        worker_memory=2.1,
+        worker_memory_limit=12.0,
+        worker_threads=2,
+        worker_environment={},
+        scheduler_cores=1,
+        scheduler_cores_limit=1.0,
+        scheduler_memory=1.0,
+        image=f"{mhub_settings.worker_default_image}:{mhub_settings.worker_image_tag}",
+        adapt_options=DaskAdaptOptions(
+            minimum=mhub_settings.dask_min_workers,
+            maximum=mhub_settings.dask_max_workers,
+            active=mhub_settings.dask_adaptive_scaling,
+        ),
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # DASK_DEFAULT_SPECS is only built when first used
+    if name == "DASK_DEFAULT_SPECS":
+        return default_dask_specs()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+def get_dask_specs(specs: Optional[Union["DaskSpecs", dict]] = None) -> "DaskSpecs":
+    from mapchete.config.models import DaskSpecs
 
-def get_dask_specs(specs: Optional[Union[DaskSpecs, dict]] = None) -> DaskSpecs:
     def _enforce_strings_for_worker_env(specs: dict) -> dict:
         if specs.get("worker_environment"):
             specs["worker_environment"] = {
@@ -157,24 +221,24 @@ def get_dask_specs(specs: Optional[Union[DaskSpecs, dict]] = None) -> DaskSpecs:
         return specs
 
     if specs is None:
-        return DASK_DEFAULT_SPECS
+        return default_dask_specs()
     elif isinstance(specs, DaskSpecs):
         specs_dict = {k: v for k, v in specs.model_dump().items() if v is not None}
         return DaskSpecs(
-            **dict(DASK_DEFAULT_SPECS, **_enforce_strings_for_worker_env(specs_dict))
+            **dict(default_dask_specs(), **_enforce_strings_for_worker_env(specs_dict))
         )
     elif isinstance(specs, dict):
         return DaskSpecs(
-            **dict(DASK_DEFAULT_SPECS, **_enforce_strings_for_worker_env(specs))
+            **dict(default_dask_specs(), **_enforce_strings_for_worker_env(specs))
         )
     else:  # pragma: no cover
         raise TypeError(f"unparsable dask specs: {specs}")
 
 
 def update_gateway_cluster_options(
-    options: Options, dask_specs: Optional[DaskSpecs] = None
-) -> Options:
-    dask_specs = dask_specs or DASK_DEFAULT_SPECS
+    options: "Options", dask_specs: Optional["DaskSpecs"] = None
+) -> "Options":
+    dask_specs = dask_specs or default_dask_specs()
 
     options.update(
         {
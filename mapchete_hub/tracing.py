@@ -0,0 +1,215 @@
+"""
+Trace job submission and execution.
+
+Spans are identified by W3C trace context ids, i.e. a span can be continued in
+another process by passing on its "traceparent" string. The traceparent of a
+job submission is stored on the job entry, so the process executing the job
+(e.g. a kubernetes job running mhub-worker) adds its spans to the same trace.
+
+Finished spans are kept in memory for the last MHUB_TRACE_MAX_TRACES traces and
+are appended as JSON lines to MHUB_TRACE_FILE if set.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generator, List, Optional, Protocol, Tuple
+
+from pydantic import AwareDatetime, BaseModel, Field, PrivateAttr
+
+from mapchete_hub.settings import mhub_settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(
+    r"^00-(?P<trace_id>[0-9a-f]{32})-(?P<span_id>[0-9a-f]{16})-[0-9a-f]{2}$"
+)
+
+
+class Span(BaseModel):
+    name: str
+    trace_id: str
+    span_id: str = Field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: Optional[str] = None
+    start: AwareDatetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    duration: Optional[float] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    error: Optional[str] = None
+    _perf_start: float = PrivateAttr(default_factory=time.perf_counter)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def parse_traceparent(traceparent: str) -> Tuple[str, str]:
+    """Return trace_id and span_id of a traceparent string."""
+    match = TRACEPARENT_PATTERN.match(traceparent)
+    if match is None:
+        raise ValueError(f"invalid traceparent: {traceparent}")
+    return match.group("trace_id"), match.group("span_id")
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def spans(self, trace_id: str) -> List[Span]: ...
+
+
+class InMemorySpanExporter:
+    """Keep spans of the most recent traces."""
+
+    def __init__(self, max_traces: int = 1000):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._traces.setdefault(span.trace_id, []).append(span)
+            self._traces.move_to_end(span.trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def spans(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id, []))
+
+
+class FileSpanExporter:
+    """Append spans as JSON lines to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            with open(self.path, "a") as dst:
+                dst.write(span.model_dump_json() + "\n")
+
+    def spans(self, trace_id: str) -> List[Span]:
+        if not os.path.exists(self.path):
+            return []
+        with self._lock:
+            with open(self.path) as src:
+                return [
+                    Span(**record)
+                    for record in map(json.loads, filter(str.strip, src))
+                    if record.get("trace_id") == trace_id
+                ]
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    def __init__(self, exporters: List[SpanExporter]):
+        self.exporters = exporters
+
+    def start_span(
+        self, name: str, traceparent: Optional[str] = None, **attributes
+    ) -> Span:
+        """
+        Start a span without making it the current span.
+
+        The parent is taken from traceparent or from the current span.
+        Without a parent, a new trace is started.
+        """
+        if traceparent:
+            trace_id, parent_id = parse_traceparent(traceparent)
+        elif _current_span.get() is not None:
+            parent = _current_span.get()
+            trace_id, parent_id = parent.trace_id, parent.span_id  # type: ignore
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(
+            name=name, trace_id=trace_id, parent_id=parent_id, attributes=attributes
+        )
+
+    def end_span(self, span: Span, exception: Optional[BaseException] = None) -> None:
+        """Set span duration and export span."""
+        span.duration = time.perf_counter() - span._perf_start
+        if exception is not None:
+            span.error = repr(exception)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as exc:  # pragma: no cover
+                logger.exception("cannot export span: %s", exc)
+
+    @contextmanager
+    def span(
+        self, name: str, traceparent: Optional[str] = None, **attributes
+    ) -> Generator[Span, None, None]:
+        """Run block within a new span which is the current span meanwhile."""
+        span = self.start_span(name, traceparent=traceparent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end_span(span, exception=exc)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            _current_span.reset(token)
+
+    def spans(self, trace_id: str) -> List[Span]:
+        """Return exported spans of a trace ordered by start time."""
+        spans: Dict[str, Span] = {}
+        for exporter in self.exporters:
+            for span in exporter.spans(trace_id):
+                spans.setdefault(span.span_id, span)
+        return sorted(spans.values(), key=lambda span: span.start)
+
+
+def current_traceparent() -> Optional[str]:
+    """Return traceparent of the current span if any."""
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Run decorated function within a span."""
+
+    def _decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def _async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+
+            return _async_wrapper
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return _wrapper
+
+    return _decorator
+
+
+def _exporters() -> List[SpanExporter]:
+    exporters: List[SpanExporter] = [
+        InMemorySpanExporter(max_traces=mhub_settings.trace_max_traces)
+    ]
+    if mhub_settings.trace_file:
+        exporters.append(FileSpanExporter(mhub_settings.trace_file))
+    return exporters
+
+
+tracer = Tracer(_exporters())
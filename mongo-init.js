@@ -1,9 +1,14 @@
-db.getSiblingDB("mhub")
-db.mhub.createIndex({ "job_id": 1 })
-db.mhub.createIndex({ "timestamp": 1, "state": 1 })
-db.mhub.createIndex({ "timestamp": 1, "output_path": 1 })
-db.mhub.createIndex({ "timestamp": 1, "geometry": "2dsphere" })
-db.mhub.createIndex({ "timestamp": 1 })
+// same indexes as mapchete_hub.db.mongodb.job_indexes(), which are also
+// ensured whenever MongoDBStatusHandler is opened
+var mhub = db.getSiblingDB("mhub")
+mhub.jobs.createIndex({ "job_id": 1 }, { "unique": true, "name": "job_id_unique_v1" })
+mhub.jobs.createIndex({ "status": 1, "updated": -1 }, { "name": "status_updated_v1" })
+mhub.jobs.createIndex({ "output_path": 1, "updated": -1 }, { "name": "output_path_updated_v1" })
+mhub.jobs.createIndex({ "job_name": 1, "updated": -1 }, { "name": "job_name_updated_v1" })
+mhub.jobs.createIndex({ "command": 1, "updated": -1 }, { "name": "command_updated_v1" })
+mhub.jobs.createIndex({ "updated": -1, "job_id": -1 }, { "name": "updated_job_id_v1" })
+mhub.jobs.createIndex({ "submitted": -1, "job_id": -1 }, { "name": "submitted_job_id_v1" })
+mhub.jobs.createIndex({ "geometry": "2dsphere" }, { "name": "geometry_2dsphere_v1" })
 db.createUser(
     {
         "user": "mhub",
@@ -5,6 +5,8 @@ from fastapi.testclient import TestClient
 from mapchete.path import MPath
 
 from mapchete_hub.app import app
+from mapchete_hub.db.memory import AsyncMemoryStatusHandler, MemoryStatusHandler
+from mapchete_hub.lifespan_resources import resources
 from mapchete_hub.models import MapcheteJob
 
 SCRIPT_DIR = MPath(os.path.dirname(os.path.realpath(__file__)))
@@ -16,6 +18,42 @@ def client():
         yield client
 
 
+@pytest.fixture
+def memory_backend_db(client, monkeypatch):
+    """
+    Isolated in-memory backend for the REST endpoints.
+
+    Jobs created directly in this backend are not passed on to the job handler.
+    """
+    with MemoryStatusHandler() as backend_db:
+        monkeypatch.setattr(
+            resources,
+            "async_backend_db",
+            AsyncMemoryStatusHandler(status_handler=backend_db),
+        )
+        backend_db.add_listener(resources.job_events)
+        yield backend_db
+
+
+@pytest.fixture
+def submitted_jobs(client, monkeypatch):
+    """
+    Job handler which only records submitted jobs instead of running them.
+    """
+    submitted = []
+
+    class _RecordingJobHandler:
+        def submit(self, job_entry):
+            submitted.append(job_entry)
+            return job_entry
+
+        def submit_many(self, job_entries):
+            return [self.submit(job_entry) for job_entry in job_entries]
+
+    monkeypatch.setattr(resources, "job_handler", _RecordingJobHandler())
+    return submitted
+
+
 @pytest.fixture
 def test_process_id():
     return "mapchete.processes.convert"
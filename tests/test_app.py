@@ -1,9 +1,27 @@
+import asyncio
 import datetime
+import hashlib
 import json
+import threading
 import time
 from copy import deepcopy
 
+import httpx
+import mapbox_vector_tile
 import pytest
+from fiona.io import MemoryFile
+from mapchete.enums import Status
+from mapchete.geometry import reproject_geometry
+from mapchete.tile import BufferedTilePyramid
+from mapchete.types import Progress
+from shapely.geometry import shape
+
+from mapchete_hub.app import app, get_events
+from mapchete_hub.db.memory import AsyncMemoryStatusHandler
+from mapchete_hub.events import JobEvents
+from mapchete_hub.lifespan_resources import resources
+from mapchete_hub.models import MapcheteJob
+from mapchete_hub.settings import mhub_settings
 
 
 def wait_for_job(
@@ -54,6 +72,42 @@ def test_get_process(client):
     assert response.status_code == 404
 
 
+def test_process_catalogue(client, monkeypatch):
+    response = client.get("/processes")
+    etag = response.headers["ETag"]
+    response = client.get("/processes", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/processes/mapchete.processes.convert")
+    process_etag = response.headers["ETag"]
+    assert process_etag != etag
+    response = client.get(
+        "/processes/mapchete.processes.convert",
+        headers={"If-None-Match": process_etag},
+    )
+    assert response.status_code == 304
+
+    # processes are not collected again on every request
+    calls = []
+    monkeypatch.setattr(
+        "mapchete_hub.processes.process_names_docstrings",
+        lambda: calls.append(1) or [("foo", "bar")],
+    )
+    assert client.get("/processes").headers["ETag"] == etag
+    assert not calls
+
+    # expired catalogue gets rebuilt
+    monkeypatch.setattr(resources.process_catalogue, "ttl", 0)
+    response = client.get("/processes")
+    assert calls
+    assert response.json() == {"processes": [{"title": "foo", "description": "bar"}]}
+
+    monkeypatch.undo()
+    response = client.post("/processes:refresh")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
 def test_post_process(client, test_process_id):
     # TODO
     with pytest.raises(NotImplementedError):
@@ -77,6 +131,9 @@ def test_post_job(client, test_process_id, example_config_json):
         headers={"Content-Type": "application/json"},
     )
     assert response.status_code == 201
+    assert [
+        metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")
+    ] == ["area", "db", "submit"]
     assert client.get("/jobs/").json()
 
     # check if job is submitted
@@ -108,6 +165,9 @@ def test_post_job_custom_dask_specs(client, test_process_id, example_config_json
         headers={"Content-Type": "application/json"},
     )
     assert response.status_code == 201
+    assert [
+        metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")
+    ] == ["area", "db", "submit"]
     assert client.get("/jobs/").json()
 
     # check if job is submitted
@@ -133,6 +193,9 @@ def test_post_job_custom_process(
         headers={"Content-Type": "application/json"},
     )
     assert response.status_code == 201
+    assert [
+        metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")
+    ] == ["area", "db", "submit"]
     assert client.get("/jobs/").json()
 
     # check if job is submitted
@@ -166,6 +229,921 @@ def test_list_jobs(client, test_process_id, example_config_json):
     assert after > before
 
 
+def test_list_jobs_pagination(client, test_process_id, example_config_json):
+    job_ids = []
+    for _ in range(3):
+        response = client.post(
+            f"/processes/{test_process_id}/execution",
+            content=json.dumps(
+                dict(
+                    example_config_json,
+                    params=dict(
+                        example_config_json["params"], zoom=2, job_name="paginated"
+                    ),
+                )
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 201
+        job_ids.append(response.json()["id"])
+
+    response = client.get("/jobs", params={"job_name": "paginated", "limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert first_page["numberReturned"] == 2
+    next_links = [link for link in first_page["links"] if link["rel"] == "next"]
+    assert len(next_links) == 1
+    # filters are kept in next link
+    assert "job_name=paginated" in next_links[0]["href"]
+
+    response = client.get(next_links[0]["href"])
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page["numberReturned"] == 1
+    assert not [link for link in second_page["links"] if link["rel"] == "next"]
+
+    # newest jobs come first by default
+    paged = [job["id"] for job in first_page["features"] + second_page["features"]]
+    assert paged == list(reversed(job_ids))
+
+    response = client.get(
+        "/jobs", params={"job_name": "paginated", "sort": "submitted", "limit": 5}
+    )
+    assert [job["id"] for job in response.json()["features"]] == job_ids
+
+    # invalid parameters
+    assert client.get("/jobs", params={"sort": "foo"}).status_code == 400
+    assert client.get("/jobs", params={"next": "foo"}).status_code == 400
+    assert client.get("/jobs", params={"limit": 0}).status_code == 422
+
+
+def test_list_jobs_stream(client, test_process_id, example_config_json):
+    job_ids = []
+    for _ in range(3):
+        response = client.post(
+            f"/processes/{test_process_id}/execution",
+            content=json.dumps(
+                dict(
+                    example_config_json,
+                    params=dict(
+                        example_config_json["params"], zoom=2, job_name="streamed"
+                    ),
+                )
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 201
+        job_ids.append(response.json()["id"])
+
+    # chunked FeatureCollection
+    response = client.get(
+        "/jobs", params={"job_name": "streamed", "limit": 2, "stream": True}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/geo+json"
+    streamed = response.json()
+    assert streamed["numberReturned"] == 2
+    assert [job["id"] for job in streamed["features"]] == job_ids[:0:-1]
+    next_links = [link for link in streamed["links"] if link["rel"] == "next"]
+    assert len(next_links) == 1
+    response = client.get(next_links[0]["href"])
+    assert [job["id"] for job in response.json()["features"]] == job_ids[:1]
+
+    # newline-delimited GeoJSON features
+    response = client.get(
+        "/jobs",
+        params={"job_name": "streamed", "fields": "summary"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    features = [json.loads(line) for line in response.text.splitlines()]
+    assert [feature["id"] for feature in features] == job_ids
+    assert all(feature["properties"]["job_name"] == "streamed" for feature in features)
+
+    # empty result
+    response = client.get("/jobs", params={"job_name": "foo", "stream": True})
+    assert response.json()["features"] == []
+
+
+def test_list_jobs_fields(client, test_process_id, example_config_json):
+    response = client.post(
+        f"/processes/{test_process_id}/execution",
+        content=json.dumps(
+            dict(
+                example_config_json,
+                params=dict(example_config_json["params"], zoom=2, job_name="fields"),
+            )
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+
+    response = client.get("/jobs", params={"job_name": "fields", "fields": "summary"})
+    assert response.status_code == 200
+    (feature,) = response.json()["features"]
+    assert feature["id"] == job_id
+    assert feature["bounds"]
+    assert feature["properties"]["job_name"] == "fields"
+    assert "status" in feature["properties"]
+    assert "mapchete" not in feature["properties"]
+
+    response = client.get(f"/jobs/{job_id}", params={"fields": "status,geometry"})
+    assert response.status_code == 200
+    assert response.json()["geometry"]
+    assert list(response.json()["properties"].keys()) == ["status"]
+
+    assert client.get("/jobs", params={"fields": "foo"}).status_code == 400
+    assert client.get(f"/jobs/{job_id}", params={"fields": "foo"}).status_code == 400
+
+
+def test_conditional_requests(client, memory_backend_db, example_config_json):
+    job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+    memory_backend_db.new(MapcheteJob(**example_config_json))
+
+    for url, params in [
+        (f"/jobs/{job_id}", {}),
+        (f"/jobs/{job_id}", {"fields": "status,updated"}),
+        ("/jobs", {}),
+        ("/jobs", {"fields": "summary", "limit": 1}),
+    ]:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        response = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.content
+        response = client.get(
+            url, params=params, headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+        response = client.get(url, params=params, headers={"If-None-Match": '"foo"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == etag
+
+    # representations differ
+    assert (
+        client.get(f"/jobs/{job_id}").headers["ETag"]
+        != client.get(f"/jobs/{job_id}", params={"fields": "status,updated"}).headers[
+            "ETag"
+        ]
+    )
+    # validators are derived from "updated" and not queried separately
+    for url in [f"/jobs/{job_id}", "/jobs"]:
+        response = client.get(url, params={"fields": "status"})
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+        assert "Last-Modified" not in response.headers
+
+    etag = client.get(f"/jobs/{job_id}").headers["ETag"]
+    list_etag = client.get("/jobs").headers["ETag"]
+    memory_backend_db.set(job_id, status="running")
+    response = client.get(f"/jobs/{job_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["properties"]["status"] == "running"
+    response = client.get("/jobs", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+
+    # results
+    memory_backend_db.set(job_id, status="done", result={"foo": "bar"})
+    response = client.get(f"/jobs/{job_id}/results")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    response = client.get(f"/jobs/{job_id}/results", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    assert client.get("/jobs/foo", headers={"If-None-Match": etag}).status_code == 404
+
+    # legacy jobs without updated timestamp have no validators
+    memory_backend_db._jobs[job_id].updated = None
+    for headers in [{}, {"If-None-Match": etag}, {"If-Modified-Since": last_modified}]:
+        response = client.get(f"/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+
+def test_get_job_wait(client, memory_backend_db, example_config_json):
+    job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+
+    # return as soon as the job status changes
+    threading.Timer(
+        0.2, memory_backend_db.set, (job_id,), dict(status="running")
+    ).start()
+    start = time.time()
+    response = client.get(f"/jobs/{job_id}", params={"wait": "5s"})
+    assert response.status_code == 200
+    assert response.json()["properties"]["status"] == "running"
+    assert time.time() - start < 4
+
+    # progress updates do not end waiting for a status other than running
+    def _finish():
+        memory_backend_db.set(job_id, progress=Progress(current=1, total=2))
+        time.sleep(0.2)
+        memory_backend_db.set(job_id, status="done")
+
+    threading.Timer(0.2, _finish).start()
+    response = client.get(
+        f"/jobs/{job_id}", params={"wait": "5s", "status_not": "pending,running"}
+    )
+    assert response.json()["properties"]["status"] == "done"
+    assert response.json()["properties"]["current_progress"] == 1
+
+    # return immediately if status already differs
+    start = time.time()
+    response = client.get(
+        f"/jobs/{job_id}", params={"wait": 5, "status_not": "running"}
+    )
+    assert response.json()["properties"]["status"] == "done"
+    assert time.time() - start < 4
+
+    # return current job after timeout
+    response = client.get(f"/jobs/{job_id}", headers={"Prefer": "wait=0.2"})
+    assert response.status_code == 200
+    assert response.headers["Preference-Applied"] == "wait=0.2"
+    assert response.json()["properties"]["status"] == "done"
+
+    assert client.get(f"/jobs/{job_id}", params={"wait": "foo"}).status_code == 400
+    assert (
+        client.get(
+            f"/jobs/{job_id}", params={"wait": 1, "status_not": "foo"}
+        ).status_code
+        == 400
+    )
+    assert client.get("/jobs/foo", params={"wait": 1}).status_code == 404
+
+
+def test_job_updates_without_events(
+    client, memory_backend_db, example_config_json, monkeypatch
+):
+    monkeypatch.setattr(mhub_settings, "event_poll_interval", 0.05)
+    job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+    # jobs updated by other processes do not emit events in this process
+    memory_backend_db.remove_listener(resources.job_events)
+
+    threading.Timer(
+        0.2, memory_backend_db.set, (job_id,), dict(status="running")
+    ).start()
+    start = time.time()
+    response = client.get(f"/jobs/{job_id}", params={"wait": "5s"})
+    assert response.json()["properties"]["status"] == "running"
+    assert time.time() - start < 4
+
+    def _finish():
+        memory_backend_db.set(job_id, progress=Progress(current=1, total=2))
+        time.sleep(0.2)
+        memory_backend_db.set(job_id, status="done")
+
+    threading.Timer(0.2, _finish).start()
+    start = time.time()
+    response = client.get(f"/jobs/{job_id}/events", timeout=10)
+    events = _parse_events(response.text)
+    assert events[0] == ("status", {"job_id": job_id, "status": "running"})
+    assert (
+        "progress",
+        {"job_id": job_id, "current_progress": 1, "total_progress": 2},
+    ) in events
+    assert events[-1] == ("status", {"job_id": job_id, "status": "done"})
+    assert time.time() - start < 4
+
+
+def _parse_events(text):
+    events = []
+    for message in text.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in message.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_job_events(client, memory_backend_db, example_config_json):
+    job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+
+    def _run_job():
+        memory_backend_db.set(job_id, status="running")
+        for current in range(1, 4):
+            memory_backend_db.set(job_id, progress=Progress(current=current, total=3))
+        memory_backend_db.set(job_id, status="done", result={"foo": "bar"})
+
+    threading.Timer(0.3, _run_job).start()
+    response = client.get(f"/jobs/{job_id}/events", timeout=10)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    # current state is sent first
+    assert events[0] == ("status", {"job_id": job_id, "status": "pending"})
+    # stream ends after job has finished
+    assert events[-1] == ("status", {"job_id": job_id, "status": "done"})
+    assert ("result", {"job_id": job_id, "result": {"foo": "bar"}}) in events
+    # progress updates can be merged but the latest one is always sent
+    progress = [data for event, data in events if event == "progress"]
+    assert progress[-1] == {
+        "job_id": job_id,
+        "current_progress": 3,
+        "total_progress": 3,
+    }
+
+    # finished job only yields current state
+    response = client.get(f"/jobs/{job_id}/events", timeout=10)
+    assert [event for event, _ in _parse_events(response.text)] == [
+        "progress",
+        "status",
+    ]
+
+    assert client.get("/jobs/foo/events").status_code == 404
+
+
+def test_events(memory_backend_db, example_config_json, monkeypatch):
+    async def _run():
+        job_events = JobEvents()
+        monkeypatch.setattr(resources, "job_events", job_events)
+        memory_backend_db.add_listener(job_events)
+        monkeypatch.setattr(mhub_settings, "event_stream_keepalive", 0.01)
+
+        events = (await get_events()).body_iterator
+        # first keepalive message means client is subscribed
+        assert await anext(events) == ": keepalive\n\n"
+        job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+        while (message := await anext(events)) == ": keepalive\n\n":
+            pass
+        assert _parse_events(message) == [
+            ("status", {"job_id": job_id, "status": "pending"})
+        ]
+        await events.aclose()
+        assert not job_events._subscriptions
+
+    asyncio.run(_run())
+
+
+def test_events_updated_by_other_process(
+    memory_backend_db, example_config_json, monkeypatch
+):
+    monkeypatch.setattr(mhub_settings, "event_poll_interval", 0.01)
+    monkeypatch.setattr(mhub_settings, "event_stream_keepalive", 0.01)
+
+    async def _run():
+        job_events = JobEvents()
+        monkeypatch.setattr(resources, "job_events", job_events)
+        poller = asyncio.create_task(job_events.poll(resources.async_backend_db.jobs))
+        job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+        # status handler of another process, this process gets no events
+        other_backend_db = AsyncMemoryStatusHandler(status_handler=memory_backend_db)
+
+        events = (await get_events()).body_iterator
+        # first keepalive message means client is subscribed
+        assert await anext(events) == ": keepalive\n\n"
+        await other_backend_db.set(job_id, status=Status.running)
+        while (message := await anext(events)) == ": keepalive\n\n":
+            pass
+        assert _parse_events(message) == [
+            ("status", {"job_id": job_id, "status": "running"})
+        ]
+        # polling the same update again does not send another event
+        for _ in range(10):
+            assert await anext(events) == ": keepalive\n\n"
+        await events.aclose()
+        poller.cancel()
+
+    asyncio.run(_run())
+
+
+def test_post_job_idempotency_key(
+    client, memory_backend_db, submitted_jobs, test_process_id, example_config_json
+):
+    url = f"/processes/{test_process_id}/execution"
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+    )
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+    assert "Idempotent-Replayed" not in response.headers
+
+    # retry returns the same job without submitting it again
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+    )
+    assert response.status_code == 201
+    assert response.json()["id"] == job_id
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert [job.job_id for job in submitted_jobs] == [job_id]
+    assert len(memory_backend_db.jobs()) == 1
+
+    # same key with another job configuration
+    response = client.post(
+        url,
+        json=dict(
+            example_config_json, params=dict(example_config_json["params"], zoom=2)
+        ),
+        headers={"Idempotency-Key": "foo"},
+    )
+    assert response.status_code == 422
+
+    # first request with this key is still in progress
+    memory_backend_db.claim_idempotency_key(
+        "bar",
+        fingerprint=hashlib.sha1(
+            MapcheteJob(**example_config_json).model_dump_json().encode()
+        ).hexdigest(),
+    )
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "bar"}
+    )
+    assert response.status_code == 409
+
+    # other keys create new jobs
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "baz"}
+    )
+    assert response.json()["id"] != job_id
+    assert len(submitted_jobs) == 2
+
+
+def test_post_job_idempotency_key_released(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    async_backend_db = resources.async_backend_db
+    new = async_backend_db.new
+
+    async def _failing_new(**kwargs):
+        raise RuntimeError("database unavailable")
+
+    # failed submissions can be retried with the same key
+    monkeypatch.setattr(async_backend_db, "new", _failing_new)
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+    )
+    assert response.status_code == 400
+    assert memory_backend_db.claim_idempotency_key("foo") is None
+    memory_backend_db.release_idempotency_key("foo")
+
+    # so can submissions cancelled by a disconnecting client
+    created = asyncio.Event()
+
+    async def _slow_new(**kwargs):
+        created.set()
+        await asyncio.sleep(10)
+        return await new(**kwargs)
+
+    monkeypatch.setattr(async_backend_db, "new", _slow_new)
+
+    async def _run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as async_client:
+            request = asyncio.create_task(
+                async_client.post(
+                    url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+                )
+            )
+            await created.wait()
+            request.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await request
+
+    asyncio.run(_run())
+    assert memory_backend_db.claim_idempotency_key("foo") is None
+    assert not submitted_jobs
+
+
+def test_post_job_idempotency_key_submit_failed(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    job_handler = resources.job_handler
+
+    class _FailingJobHandler:
+        def submit(self, job_entry):
+            raise RuntimeError("cluster unavailable")
+
+    monkeypatch.setattr(resources, "job_handler", _FailingJobHandler())
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+    )
+    assert response.status_code == 400
+    (failed_job,) = memory_backend_db.jobs()
+    assert failed_job.status == Status.failed
+    assert "cluster unavailable" in failed_job.exception
+
+    # retry submits a new job instead of replaying the failed one
+    monkeypatch.setattr(resources, "job_handler", job_handler)
+    response = client.post(
+        url, json=example_config_json, headers={"Idempotency-Key": "foo"}
+    )
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert response.json()["id"] != failed_job.job_id
+    assert [job.job_id for job in submitted_jobs] == [response.json()["id"]]
+
+
+def test_post_job_admission_limits(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    monkeypatch.setattr(mhub_settings, "admission_max_queued_jobs", 2)
+    for _ in range(2):
+        assert client.post(url, json=example_config_json).status_code == 201
+
+    response = client.post(url, json=example_config_json)
+    assert response.status_code == 429
+    assert "2 jobs queued" in response.json()["detail"]
+    assert response.headers["Retry-After"] == "60"
+    assert len(submitted_jobs) == 2
+
+    # finished jobs free the queue and determine when to retry
+    job_id = submitted_jobs[0].job_id
+    memory_backend_db.set(job_id, status=Status.done)
+    assert client.post(url, json=example_config_json).status_code == 201
+    response = client.post(url, json=example_config_json)
+    assert response.status_code == 429
+    # one job finished within the last hour
+    assert response.headers["Retry-After"] == str(
+        int(mhub_settings.admission_drain_rate_window)
+    )
+
+    # batch submissions are rejected as a whole
+    response = client.post(
+        f"{url}:batch",
+        content=json.dumps([example_config_json] * 2),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 429
+    assert len(submitted_jobs) == 3
+
+
+def test_post_job_admission_limits_per_client(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    monkeypatch.setattr(mhub_settings, "admission_max_queued_jobs_per_client", 1)
+    response = client.post(url, json=example_config_json, headers={"X-Client-ID": "a"})
+    assert response.status_code == 201
+    response = client.post(url, json=example_config_json, headers={"X-Client-ID": "a"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    response = client.post(url, json=example_config_json, headers={"X-Client-ID": "b"})
+    assert response.status_code == 201
+    assert [job.client_id for job in submitted_jobs] == ["a", "b"]
+
+
+def test_post_job_admission_limits_area(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    monkeypatch.setattr(mhub_settings, "admission_max_queued_area", 1e-6)
+    # queue is empty, so the first job is admitted if it fits
+    response = client.post(url, json=example_config_json)
+    assert response.status_code == 429
+    assert "queued area" in response.json()["detail"]
+
+    monkeypatch.setattr(mhub_settings, "admission_max_queued_area", 1e12)
+    assert client.post(url, json=example_config_json).status_code == 201
+
+
+def test_post_job_admission_limits_concurrent(
+    client,
+    memory_backend_db,
+    submitted_jobs,
+    monkeypatch,
+    test_process_id,
+    example_config_json,
+):
+    url = f"/processes/{test_process_id}/execution"
+    monkeypatch.setattr(mhub_settings, "admission_max_queued_jobs", 2)
+    async_backend_db = resources.async_backend_db
+    new = async_backend_db.new
+
+    async def _slow_new(**kwargs):
+        # give other submissions the chance to run their admission check
+        await asyncio.sleep(0.01)
+        return await new(**kwargs)
+
+    monkeypatch.setattr(async_backend_db, "new", _slow_new)
+
+    async def _run():
+        monkeypatch.setattr(resources, "admission_lock", asyncio.Lock())
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as async_client:
+            return await asyncio.gather(
+                *[async_client.post(url, json=example_config_json) for _ in range(4)]
+            )
+
+    responses = asyncio.run(_run())
+    assert sorted(response.status_code for response in responses) == [
+        201,
+        201,
+        429,
+        429,
+    ]
+    assert len(submitted_jobs) == 2
+
+
+def test_post_jobs_batch(
+    client, test_process_id, example_config_json, example_config_json_area
+):
+    job_configs = [
+        dict(
+            example_config,
+            params=dict(example_config["params"], zoom=2, job_name="batch"),
+        )
+        for example_config in [example_config_json, example_config_json_area]
+    ]
+    response = client.post(
+        f"/processes/{test_process_id}/execution:batch",
+        content=json.dumps(job_configs),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 201
+    features = response.json()["features"]
+    assert response.json()["numberReturned"] == 2
+    assert [
+        feature["properties"]["mapchete"]["params"]["zoom"] for feature in features
+    ] == [2, 2]
+    assert features[0]["bounds"] == [0, 1, 2, 3]
+    assert features[1]["properties"]["area"]
+
+    response = client.get("/jobs", params={"job_name": "batch"})
+    assert {feature["id"] for feature in response.json()["features"]} == {
+        feature["id"] for feature in features
+    }
+
+    # invalid job configuration
+    response = client.post(
+        f"/processes/{test_process_id}/execution:batch",
+        content=json.dumps([{"foo": "bar"}]),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 400
+
+
+def test_get_jobs_stats(
+    client, memory_backend_db, submitted_jobs, test_process_id, example_config_json
+):
+    for _ in range(2):
+        response = client.post(
+            f"/processes/{test_process_id}/execution", json=example_config_json
+        )
+        assert response.status_code == 201
+
+    response = client.get("/jobs/stats", params={"bucket_size": 60})
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["jobs"] == 2
+    assert stats["queue_depth"] == 2
+    assert stats["status"] == {"pending": 2}
+    assert stats["processes"][test_process_id]["jobs"] == 2
+    assert stats["bucket_size"] == 60
+    assert sum(bucket["jobs"] for bucket in stats["buckets"]) == 2
+
+    # same filters as GET /jobs
+    assert client.get("/jobs/stats", params={"status": "done"}).json()["jobs"] == 0
+    assert client.get("/jobs/stats", params={"status": "foo"}).status_code == 400
+    assert client.get("/jobs/stats", params={"bucket_size": 0}).status_code == 422
+
+
+def test_get_jobs_tile(client, memory_backend_db, example_config_json):
+    job = memory_backend_db.new(job_config=MapcheteJob(**example_config_json))
+    centroid = reproject_geometry(
+        shape(job.geometry).centroid, src_crs="EPSG:4326", dst_crs="EPSG:3857"
+    )
+    tile = BufferedTilePyramid("mercator").tile_from_xy(centroid.x, centroid.y, 5)
+
+    url = f"/jobs/tiles/{tile.zoom}/{tile.col}/{tile.row}.mvt"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    features = mapbox_vector_tile.decode(response.content)["jobs"]["features"]
+    assert [feature["properties"] for feature in features] == [
+        dict(job_id=job.job_id, job_name=job.job_name, status="pending")
+    ]
+    # geometry is clipped to the tile buffer
+    for ring in features[0]["geometry"]["coordinates"]:
+        for x, y in ring:
+            assert -64 <= x <= 4096 + 64
+            assert -64 <= y <= 4096 + 64
+
+    # tiles not intersecting the job and filters
+    tile = BufferedTilePyramid("mercator").tile(5, tile.row, (tile.col + 16) % 32)
+    response = client.get(f"/jobs/tiles/{tile.zoom}/{tile.col}/{tile.row}.mvt")
+    assert mapbox_vector_tile.decode(response.content)["jobs"]["features"] == []
+    response = client.get(url, params=dict(status="done"))
+    assert mapbox_vector_tile.decode(response.content)["jobs"]["features"] == []
+
+    # invalid tiles
+    assert client.get("/jobs/tiles/1/2/0.mvt").status_code == 404
+    assert client.get("/jobs/tiles/25/0/0.mvt").status_code == 422
+
+
+def test_get_jobs_flatgeobuf(client, memory_backend_db, example_config_json):
+    job = memory_backend_db.new(job_config=MapcheteJob(**example_config_json))
+    memory_backend_db.set(job.job_id, status=Status.running)
+
+    response = client.get("/jobs.fgb")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/flatgeobuf"
+    with MemoryFile(response.content) as memfile:
+        with memfile.open() as src:
+            assert src.driver == "FlatGeobuf"
+            assert src.crs == "EPSG:4326"
+            features = list(src)
+    assert len(features) == 1
+    assert features[0].properties["job_id"] == job.job_id
+    assert features[0].properties["status"] == "running"
+    assert shape(features[0].geometry).equals(shape(job.geometry))
+
+    with MemoryFile(client.get("/jobs.fgb?status=done").content) as memfile:
+        with memfile.open() as src:
+            assert list(src) == []
+
+
+def test_metrics(client, memory_backend_db, example_config_json):
+    job = memory_backend_db.new(job_config=MapcheteJob(**example_config_json))
+    assert client.get(f"/jobs/{job.job_id}").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    metrics = {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in response.text.splitlines()
+        if line and not line.startswith("#")
+    }
+    # requests are labelled by route template instead of path
+    assert (
+        metrics[
+            'mhub_http_request_duration_seconds_count{method="GET",'
+            'route="/jobs/{job_id}",status_code="200"}'
+        ]
+        >= 1
+    )
+    assert (
+        metrics[
+            'mhub_db_call_duration_seconds_count{handler="MemoryStatusHandler",'
+            'method="job"}'
+        ]
+        >= 1
+    )
+    assert metrics["mhub_jobs_queued"] == 1
+    assert metrics["mhub_jobs_running"] == 0
+
+
+def test_get_job_trace(
+    client, memory_backend_db, submitted_jobs, test_process_id, example_config_json
+):
+    response = client.post(
+        f"/processes/{test_process_id}/execution", json=example_config_json
+    )
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+    assert submitted_jobs[0].trace_context
+
+    response = client.get(f"/jobs/{job_id}/trace")
+    assert response.status_code == 200
+    spans = {span["name"]: span for span in response.json()}
+    assert {
+        "post_job",
+        "area",
+        "process_area_from_config",
+        "db",
+        "submit",
+    }.issubset(spans)
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+    # stages are children of the request span
+    root = spans["post_job"]
+    assert root["parent_id"] is None
+    for stage in ["area", "db", "submit"]:
+        assert spans[stage]["parent_id"] == root["span_id"]
+    # spans in the submission thread pool are nested
+    assert spans["process_area_from_config"]["parent_id"] == spans["area"]["span_id"]
+
+    # job not traced
+    job = memory_backend_db.new(job_config=MapcheteJob(**example_config_json))
+    assert client.get(f"/jobs/{job.job_id}/trace").status_code == 404
+    assert client.get("/jobs/unknown/trace").status_code == 404
+
+
+def test_lookup_jobs(client, memory_backend_db, example_config_json):
+    job_ids = [
+        memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+        for _ in range(3)
+    ]
+    response = client.post(
+        "/jobs:lookup",
+        json={"job_ids": [job_ids[2], "foo", job_ids[0]], "fields": "status"},
+    )
+    assert response.status_code == 200
+    features = response.json()["features"]
+    # unknown jobs are omitted, order is kept
+    assert [feature["id"] for feature in features] == [job_ids[2], job_ids[0]]
+    assert features[0]["properties"] == {"status": "pending"}
+
+    response = client.post("/jobs:lookup", json={"job_ids": job_ids})
+    assert response.json()["numberReturned"] == 3
+    assert "mapchete" in response.json()["features"][0]["properties"]
+
+    response = client.post("/jobs:lookup", json={"job_ids": job_ids, "fields": "foo"})
+    assert response.status_code == 400
+
+
+def test_cancel_jobs(client, memory_backend_db, example_config_json):
+    job_ids = [
+        memory_backend_db.new(
+            MapcheteJob(
+                **dict(
+                    example_config_json,
+                    params=dict(example_config_json["params"], job_name=job_name),
+                )
+            )
+        ).job_id
+        for job_name in ["foo", "foo", "foo", "bar"]
+    ]
+    memory_backend_db.set(job_ids[0], status="done")
+    memory_backend_db.set(job_ids[1], status="running")
+
+    response = client.post("/jobs:cancel", json={"job_name": "foo"})
+    assert response.status_code == 200
+    assert {feature["id"] for feature in response.json()["features"]} == set(
+        job_ids[1:3]
+    )
+    assert {
+        feature["properties"]["status"] for feature in response.json()["features"]
+    } == {"cancelled"}
+    assert [memory_backend_db.job(job_id).status for job_id in job_ids] == [
+        Status.done,
+        Status.cancelled,
+        Status.cancelled,
+        Status.pending,
+    ]
+
+    # nothing left to cancel
+    response = client.post("/jobs:cancel", json={"job_ids": job_ids[:3]})
+    assert response.json()["numberReturned"] == 0
+
+    response = client.post("/jobs:cancel", json={"job_ids": job_ids, "status": "done"})
+    assert response.json()["numberReturned"] == 0
+
+    # a filter is required
+    assert client.post("/jobs:cancel", json={}).status_code == 400
+    assert client.post("/jobs:cancel", json={"status": "foo"}).status_code == 400
+
+
+def test_cancel_jobs_finished_meanwhile(
+    client, memory_backend_db, example_config_json, monkeypatch
+):
+    job_ids = [
+        memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+        for _ in range(2)
+    ]
+    messages = []
+    monkeypatch.setattr("mapchete_hub.app.send_slack_message", messages.append)
+    async_backend_db = resources.async_backend_db
+    set_many = async_backend_db.set_many
+
+    async def _set_many(job_ids, **kwargs):
+        # job finishes after it was selected for cancellation
+        memory_backend_db.set(job_ids[0], status="done")
+        return await set_many(job_ids, **kwargs)
+
+    monkeypatch.setattr(async_backend_db, "set_many", _set_many)
+    response = client.post("/jobs:cancel", json={"job_ids": job_ids})
+    assert [feature["id"] for feature in response.json()["features"]] == job_ids[1:]
+    assert memory_backend_db.job(job_ids[0]).status == Status.done
+    assert "cancelling 1 job(s)" in messages[0]
+
+
 def test_list_jobs_bounds(client, test_process_id, example_config_json):
     response = client.get("/jobs")
     assert response.status_code == 200
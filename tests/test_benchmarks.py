@@ -0,0 +1,215 @@
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+import mapchete_hub.app
+from mapchete_hub.app import app
+from mapchete_hub.db.memory import AsyncMemoryStatusHandler, MemoryStatusHandler
+from mapchete_hub.lifespan_resources import resources
+from mapchete_hub.models import MapcheteJob
+from mapchete_hub.serialization import dumps, feature_collection
+
+
+def _p99(latencies):
+    return statistics.quantiles(latencies, n=100)[98]
+
+
+def test_get_job_latency_during_slow_list_jobs(example_mapchete_job, monkeypatch):
+    """
+    GET /jobs/{job_id} must not be stalled by a slow GET /jobs running in parallel.
+    """
+    slow_round_trip = 1.0
+
+    class SlowListingStatusHandler(AsyncMemoryStatusHandler):
+        async def jobs(self, **kwargs):
+            # simulate a slow database round-trip
+            await asyncio.sleep(slow_round_trip)
+            return await super().jobs(**kwargs)
+
+    async def _benchmark():
+        async with (
+            SlowListingStatusHandler() as backend_db,
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as async_client,
+        ):
+            monkeypatch.setattr(
+                resources, "async_backend_db", backend_db, raising=False
+            )
+            job_id = (await backend_db.new(example_mapchete_job)).job_id
+            slow_request = asyncio.create_task(async_client.get("/jobs"))
+            latencies = []
+            while not slow_request.done():
+                start = time.perf_counter()
+                response = await async_client.get(f"/jobs/{job_id}")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                # polling interval of the client
+                await asyncio.sleep(0.005)
+            assert (await slow_request).status_code == 200
+        return latencies
+
+    latencies = asyncio.run(_benchmark())
+    p99 = _p99(latencies)
+    print(
+        f"GET /jobs/{{job_id}}: {len(latencies)} requests during slow GET /jobs, "
+        f"p99 latency {p99 * 1000:.2f}ms"
+    )
+    assert len(latencies) > 10
+    assert p99 < slow_round_trip / 2
+
+
+def test_get_job_latency_during_slow_post_job(
+    client, memory_backend_db, submitted_jobs, example_config_json, monkeypatch
+):
+    """
+    GET /jobs/{job_id} must not be stalled by a job submission with a slow
+    process area calculation.
+    """
+    slow_area = 1.0
+    backend_process_area = mapchete_hub.app.backend_process_area
+
+    def _slow_backend_process_area(job_config):
+        # simulate reading and reprojecting a large area file
+        time.sleep(slow_area)
+        return backend_process_area(job_config)
+
+    monkeypatch.setattr(
+        mapchete_hub.app, "backend_process_area", _slow_backend_process_area
+    )
+    job_id = memory_backend_db.new(MapcheteJob(**example_config_json)).job_id
+
+    async def _benchmark():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as async_client:
+            slow_request = asyncio.create_task(
+                async_client.post(
+                    "/processes/mapchete.processes.convert/execution",
+                    json=example_config_json,
+                )
+            )
+            latencies = []
+            while not slow_request.done():
+                start = time.perf_counter()
+                response = await async_client.get(f"/jobs/{job_id}")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(0.005)
+            response = await slow_request
+            assert response.status_code == 201
+            assert submitted_jobs
+        return latencies, response.headers["Server-Timing"]
+
+    latencies, server_timing = asyncio.run(_benchmark())
+    p99 = _p99(latencies)
+    print(
+        f"GET /jobs/{{job_id}}: {len(latencies)} requests during slow job submission "
+        f"({server_timing}), p99 latency {p99 * 1000:.2f}ms"
+    )
+    assert len(latencies) > 10
+    assert p99 < slow_area / 2
+
+
+@pytest.mark.benchmark
+def test_feature_collection_serialization(example_mapchete_job):
+    """
+    Compare serializing jobs via serialization.feature_collection() with
+    JobEntry.to_geojson_dict() and FastAPI's jsonable_encoder().
+    """
+    with MemoryStatusHandler() as backend_db:
+        job = backend_db.new(example_mapchete_job)
+    jobs = [job.model_copy(update={"job_id": uuid.uuid4().hex}) for _ in range(10_000)]
+
+    def _current():
+        return json.dumps(
+            jsonable_encoder(
+                {
+                    "type": "FeatureCollection",
+                    "features": [job.to_geojson_dict() for job in jobs],
+                    "numberReturned": len(jobs),
+                }
+            ),
+            separators=(",", ":"),
+        ).encode()
+
+    def _fast():
+        return dumps(feature_collection(jobs))
+
+    def _best_of(func, rounds=3):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            out = func()
+            timings.append(time.perf_counter() - start)
+        return min(timings), out
+
+    current, current_out = _best_of(_current, rounds=1)
+    fast, fast_out = _best_of(_fast)
+    print(
+        f"serializing {len(jobs)} jobs: current {current * 1000:.0f}ms, "
+        f"fast {fast * 1000:.0f}ms ({current / fast:.1f}x)"
+    )
+    assert fast_out == current_out
+
+
+# packages which must not be imported just to start a command line tool
+CLI_LAZY_PACKAGES = [
+    "aiohttp",
+    "dask",
+    "dask_gateway",
+    "distributed",
+    "fastapi",
+    "fiona",
+    "mapchete",
+    "mongomock",
+    "pymongo",
+    "rasterio",
+    "slack_sdk",
+    "uvicorn",
+]
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$")
+
+
+@pytest.mark.parametrize("cli", ["manager", "server", "worker"])
+def test_cli_import_time(cli):
+    """
+    Command line tools only import the modules a command needs when it runs.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"from mapchete_hub.cli.{cli} import main; "
+            "main(['--help'], standalone_mode=False)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # cumulative import time in microseconds per module
+    imports = {
+        match.group(2): int(match.group(1))
+        for match in map(IMPORT_TIME_PATTERN.match, result.stderr.splitlines())
+        if match
+    }
+    import_time = imports[f"mapchete_hub.cli.{cli}"] / 1e6
+    print(f"mhub-{cli}: imported {len(imports)} modules in {import_time:.3f}s")
+    assert not {
+        package
+        for package in CLI_LAZY_PACKAGES
+        if package in imports
+        or any(module.startswith(f"{package}.") for module in imports)
+    }
+    assert import_time < 1.0
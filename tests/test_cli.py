@@ -6,3 +6,11 @@ from mapchete_hub.cli.server import main as mhub_server
 def test_mhub_server():
     result = CliRunner(env=dict(MAPCHETE_TEST="TRUE")).invoke(mhub_server, ["--help"])
     assert result.exit_code == 0
+
+
+def test_mhub_server_workers_memory_db():
+    result = CliRunner(env=dict(MAPCHETE_TEST="TRUE")).invoke(
+        mhub_server, ["start", "--workers", "2"]
+    )
+    assert result.exit_code == 2
+    assert "MHUB_BACKEND_DB" in result.output
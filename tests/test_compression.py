@@ -0,0 +1,143 @@
+import gzip
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mapchete_hub import compression
+from mapchete_hub.compression import (
+    CompressionMiddleware,
+    GzipCompressor,
+    negotiate_encoding,
+)
+from mapchete_hub.models import MapcheteJob
+
+
+def test_negotiate_encoding():
+    encodings = ["zstd", "gzip"]
+    assert negotiate_encoding("gzip, deflate, br, zstd", encodings) == "zstd"
+    assert negotiate_encoding("gzip, zstd;q=0.5", encodings) == "gzip"
+    assert negotiate_encoding("zstd;q=0, *", encodings) == "gzip"
+    assert negotiate_encoding("identity", encodings) is None
+    assert negotiate_encoding("", encodings) is None
+    assert negotiate_encoding("gzip;q=foo", encodings) is None
+    assert negotiate_encoding("zstd", ["gzip"]) is None
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_gzip(client, memory_backend_db, example_config_json, stream):
+    for _ in range(10):
+        memory_backend_db.new(MapcheteJob(**example_config_json))
+
+    response = client.get(
+        "/jobs", params={"stream": stream}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers.get("Content-Length", 0)) < len(response.content)
+    assert response.json()["numberReturned"] == 10
+
+    # small responses are not compressed
+    response = client.get(
+        "/jobs",
+        params={"limit": 1, "fields": "status"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/jobs", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_gzip_ndjson(client, memory_backend_db, example_config_json):
+    for _ in range(10):
+        memory_backend_db.new(MapcheteJob(**example_config_json))
+
+    with client.stream(
+        "GET",
+        "/jobs",
+        headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+    ) as response:
+        assert response.headers["Content-Encoding"] == "gzip"
+        lines = gzip.decompress(b"".join(response.iter_raw())).splitlines()
+    assert len([json.loads(line) for line in lines]) == 10
+
+
+def test_zstd(client, memory_backend_db, example_config_json):
+    zstandard = pytest.importorskip("zstandard")
+    for _ in range(10):
+        memory_backend_db.new(MapcheteJob(**example_config_json))
+
+    for stream in [False, True]:
+        with client.stream(
+            "GET",
+            "/jobs",
+            params={"stream": stream},
+            headers={"Accept-Encoding": "zstd"},
+        ) as response:
+            assert response.headers["Content-Encoding"] == "zstd"
+            content = (
+                zstandard.ZstdDecompressor()
+                .decompressobj()
+                .decompress(b"".join(response.iter_raw()))
+            )
+        assert json.loads(content)["numberReturned"] == 10
+
+
+def test_compressed_etag(client, memory_backend_db, example_config_json):
+    for _ in range(10):
+        memory_backend_db.new(MapcheteJob(**example_config_json))
+
+    response = client.get("/jobs", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    response = client.get(
+        "/jobs", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    # uncompressed responses are another representation
+    response = client.get(
+        "/jobs", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag.replace('-gzip"', '"')
+
+
+def test_compression_thread(monkeypatch):
+    threads = {}
+
+    async def _app(scope, receive, send):
+        threads["app"] = threading.get_ident()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        for chunk in [b"a" * 100, b"b" * 10, b""]:
+            await send(
+                {"type": "http.response.body", "body": chunk, "more_body": bool(chunk)}
+            )
+
+    class _Compressor(GzipCompressor):
+        def compress(self, body, more_body):
+            threads.setdefault("compress", set()).add(threading.get_ident())
+            return super().compress(body, more_body)
+
+    monkeypatch.setattr(compression, "GzipCompressor", _Compressor)
+    client = TestClient(
+        CompressionMiddleware(_app, minimum_size=10, thread_minimum_size=50)
+    )
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == b"a" * 100 + b"b" * 10
+    # only the large chunk was compressed outside the event loop
+    assert threads["app"] in threads["compress"]
+    assert len(threads["compress"]) == 2
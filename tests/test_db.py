@@ -1,4 +1,7 @@
+import asyncio
 import datetime
+import itertools
+import os
 import time
 
 import pytest
@@ -8,6 +11,18 @@ from shapely.geometry import shape
 
 from mapchete_hub import models
 from mapchete_hub.db import init_backenddb
+from mapchete_hub.db.memory import AsyncMemoryStatusHandler
+from mapchete_hub.db.mongodb import (
+    AsyncMongoDBStatusHandler,
+    MongoDBStatusHandler,
+    job_indexes,
+    jobs_query,
+    paged_jobs_query,
+)
+from mapchete_hub.settings import mhub_settings
+
+# some tests require a real MongoDB, e.g. the one from docker-compose.yml
+MONGODB_TEST_URI = os.environ.get("MHUB_TEST_MONGODB_URI")
 
 
 @pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
@@ -124,3 +139,507 @@ def test_mongodb_backend_job(example_config_json, backend_db, mongodb):
         else:
             assert len(db.jobs(bounds=[1, 2, 3, 4])) == 2
             assert len(db.jobs(bounds=[11, 12, 13, 14])) == 0
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_async_backend_job(example_config_json, backend_db):
+    job_config = models.MapcheteJob(**example_config_json)
+
+    async def _run():
+        if backend_db == "mongodb":
+            mongomock_motor = pytest.importorskip("mongomock_motor")
+            db = AsyncMongoDBStatusHandler(
+                database=mongomock_motor.AsyncMongoMockClient()["mhub"]
+            )
+        else:
+            db = AsyncMemoryStatusHandler()
+        async with db:
+            job = await db.new(job_config=job_config)
+            job_id = job.job_id
+
+            current = await db.job(job_id)
+            assert current.status == Status.pending
+            assert not shape(current).is_empty
+
+            await db.set(job_id, status="initializing")
+            await db.set(
+                job_id, status="running", progress=Progress(current=0, total=10)
+            )
+            current = await db.set(job_id, progress=Progress(current=5))
+            assert current.status == Status.running
+            assert current.current_progress == 5
+            assert current.total_progress == 10
+
+            assert await db.update_job(job_id, progress=Progress(current=10)) is None
+            current = await db.set(job_id, status="done")
+            assert current.status == Status.done
+            assert current.current_progress == 10
+            assert current.runtime is not None
+            assert current.finished
+            assert await db.status(job_id) == Status.done
+
+            another_job = await db.new(job_config=job_config)
+            assert len(await db.jobs()) == 2
+            more_jobs = await db.new_many([job_config, job_config])
+            for more_job in more_jobs:
+                assert more_job.model_dump(mode="json") == (
+                    await db.job(more_job.job_id)
+                ).model_dump(mode="json")
+                await db.set(more_job.job_id, status="cancelled")
+                assert await db.is_cancelled(more_job.job_id)
+            assert len(await db.jobs(status="done")) == 1
+            assert len(await db.jobs(status="cancelled")) == 2
+            assert await db.count(status=["cancelled", "done"]) == 3
+            assert [j.job_id for j in await db.jobs(status="pending")] == [
+                another_job.job_id
+            ]
+            iterated = [
+                j.job_id
+                async for j in db.iter_jobs(sort="submitted", fields=["status"])
+            ]
+            assert iterated[:2] == [job_id, another_job.job_id]
+            # jobs inserted at once share the same submitted timestamp
+            assert sorted(iterated[2:]) == sorted(j.job_id for j in more_jobs)
+
+            with pytest.raises(KeyError):
+                await db.job("foo")
+
+    asyncio.run(_run())
+
+
+def test_async_memory_backend_shared(example_config_json):
+    job_config = models.MapcheteJob(**example_config_json)
+
+    async def _run(status_handler):
+        async with AsyncMemoryStatusHandler(status_handler=status_handler) as db:
+            return await db.new(job_config=job_config)
+
+    with init_backenddb(src="memory") as db:
+        job = asyncio.run(_run(db))
+        # jobs created asynchronously are visible to the synchronous handler
+        assert db.job(job.job_id).job_id == job.job_id
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_new_many(
+    example_config_json, example_config_json_area, backend_db, mongodb
+):
+    job_configs = [
+        models.MapcheteJob(**example_config_json),
+        models.MapcheteJob(**example_config_json_area),
+    ]
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        updates = []
+        db.add_listener(lambda job_id, attributes: updates.append(job_id))
+        jobs = db.new_many(job_configs)
+        assert [job.status for job in jobs] == [Status.pending, Status.pending]
+        assert updates == [job.job_id for job in jobs]
+        for job, job_config in zip(jobs, job_configs):
+            # new_many returns the same as reading the job
+            assert job.model_dump(mode="json") == db.job(job.job_id).model_dump(
+                mode="json"
+            )
+            assert job.mapchete.params == job_config.params
+        assert jobs[0].bounds == [0, 1, 2, 3]
+        assert db.new_many([]) == []
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_set_many(example_config_json, backend_db, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        job_ids = [db.new(job_config=job_config).job_id for _ in range(3)]
+        db.set(job_ids[0], status="done")
+
+        assert {job.job_id for job in db.jobs(job_ids=job_ids[1:])} == set(job_ids[1:])
+        assert db.jobs(job_ids=["foo"]) == []
+
+        updates = []
+        db.add_listener(lambda job_id, attributes: updates.append(job_id))
+        # finished job is not updated
+        updated = db.set_many(
+            job_ids, status=Status.cancelled, if_status=[Status.pending]
+        )
+        assert sorted(updated) == sorted(job_ids[1:])
+        assert sorted(updates) == sorted(job_ids[1:])
+        assert [db.job(job_id).status for job_id in job_ids] == [
+            Status.done,
+            Status.cancelled,
+            Status.cancelled,
+        ]
+        assert db.set_many([], status=Status.cancelled) == []
+        assert (
+            db.set_many(job_ids, status=Status.running, if_status=[Status.pending])
+            == []
+        )
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_stats(example_config_json, backend_db, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        assert db.stats() == models.JobStats()
+
+        job_ids = [db.new(job_config=job_config).job_id for _ in range(5)]
+        for job_id in job_ids[:3]:
+            db.set(job_id, status=Status.initializing)
+            time.sleep(0.01)
+            db.set(job_id, status=Status.done)
+        db.set(job_ids[3], status=Status.failed)
+
+        stats = db.stats(bucket_size=60)
+        assert stats.jobs == 5
+        assert stats.queue_depth == 1
+        assert stats.status == {Status.done: 3, Status.failed: 1, Status.pending: 1}
+        process_stats = stats.processes[example_config_json["config"]["process"]]
+        assert process_stats.jobs == 5
+        runtimes = sorted(db.job(job_id).runtime for job_id in job_ids[:3])
+        assert process_stats.runtime.count == 3
+        assert process_stats.runtime.p50 == runtimes[1]
+        assert process_stats.runtime.p90 == runtimes[1]
+        assert process_stats.runtime.p99 == runtimes[1]
+        # jobs which never started have no queue wait
+        queue_waits = sorted(
+            (job.started - job.submitted).total_seconds()
+            for job in db.jobs(job_ids=job_ids[:3])
+        )
+        assert process_stats.queue_wait.count == 3
+        assert process_stats.queue_wait.p50 == pytest.approx(queue_waits[1], abs=1e-3)
+        assert stats.bucket_size == 60
+        assert sum(bucket.jobs for bucket in stats.buckets) == 5
+        for bucket in stats.buckets:
+            assert bucket.start.timestamp() % 60 == 0
+
+        # filters
+        stats = db.stats(status="done")
+        assert stats.jobs == 3
+        assert stats.queue_depth == 0
+        assert db.stats(job_name="foo") == models.JobStats()
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_idempotency_keys(backend_db, mongodb, monkeypatch):
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        assert db.claim_idempotency_key("foo", fingerprint="abc") is None
+
+        # key is in use but not yet bound to a job
+        existing = db.claim_idempotency_key("foo", fingerprint="def")
+        assert existing.fingerprint == "abc"
+        assert existing.job_id is None
+
+        db.bind_idempotency_key("foo", "some_job_id")
+        assert db.claim_idempotency_key("foo").job_id == "some_job_id"
+
+        # released keys can be claimed again
+        db.release_idempotency_key("foo")
+        assert db.claim_idempotency_key("foo") is None
+
+        # keys which did not get bound to a job expire earlier
+        monkeypatch.setattr(mhub_settings, "idempotency_claim_ttl", -1)
+        assert db.claim_idempotency_key("foo") is None
+        db.bind_idempotency_key("foo", "some_job_id")
+        assert db.claim_idempotency_key("foo").job_id == "some_job_id"
+
+        # so can expired keys
+        monkeypatch.setattr(mhub_settings, "idempotency_key_ttl", -1)
+        assert db.claim_idempotency_key("foo") is None
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_job_status(example_config_json, backend_db, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        job_id = db.new(job_config=job_config).job_id
+        assert db.status(job_id) == Status.pending
+        assert not db.is_cancelled(job_id)
+
+        db.set(job_id, status="cancelled")
+        assert db.status(job_id) == Status.cancelled
+        assert db.is_cancelled(job_id)
+
+        db.new(job_config=job_config, client_id="foo")
+        assert db.count(status=[Status.pending]) == 1
+        assert db.count(status=[Status.pending], client_id="bar") == 0
+        assert db.count() == 2
+        assert db.status_counts() == {Status.pending: 1, Status.cancelled: 1}
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_update_job(example_config_json, backend_db, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        job_id = db.new(job_config=job_config).job_id
+        assert db.update_job(job_id, status="initializing") is None
+        db.update_job(job_id, status="running", progress=Progress(current=1, total=4))
+        # values are not interpreted as field paths or operators
+        db.update_job(job_id, exception="$status", result={"$foo": "bar"})
+        current = db.job(job_id)
+        assert current.status == Status.running
+        assert current.current_progress == 1
+        assert current.exception == "$status"
+        assert current.result == {"$foo": "bar"}
+        assert current.runtime is None
+
+        db.update_job(job_id, status="done")
+        current = db.job(job_id)
+        assert current.finished == current.updated
+        assert current.runtime == pytest.approx(
+            (current.finished - current.started).total_seconds()
+        )
+
+
+def test_write_behind_progress(example_config_json):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src="memory") as db:
+        job_id = db.new(job_config=job_config).job_id
+        other_job_id = db.new(job_config=job_config).job_id
+        updates = []
+        db.add_listener(lambda job_id, attributes: updates.append(job_id))
+        db.enable_write_behind(60)
+
+        db.update_job(job_id, status="running")
+        for i in range(1, 4):
+            db.update_job(
+                job_id, progress=Progress(current=i, total=4 if i == 1 else None)
+            )
+            db.update_job(other_job_id, progress=Progress(current=i, total=10))
+        # only the status transition has been written yet
+        assert updates == [job_id]
+        assert db.job(job_id).current_progress is None
+
+        # latest progress per job is written on flush
+        db.flush()
+        assert updates == [job_id, job_id, other_job_id]
+        assert db.job(job_id).current_progress == 3
+        assert db.job(job_id).total_progress == 4
+        assert db.job(other_job_id).current_progress == 3
+
+        # status transitions are written immediately with buffered progress
+        db.update_job(job_id, progress=Progress(current=4))
+        db.update_job(job_id, status="done")
+        current = db.job(job_id)
+        assert current.status == Status.done
+        assert current.current_progress == 4
+        db.flush()
+        assert len(updates) == 4
+
+        # buffered progress is written when the status handler is closed
+        db.update_job(other_job_id, progress=Progress(current=10))
+    assert db.job(other_job_id).current_progress == 10
+
+
+def test_write_behind_thread(example_config_json):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src="memory") as db:
+        job_id = db.new(job_config=job_config).job_id
+        db.enable_write_behind(0.01)
+        db.update_job(job_id, progress=Progress(current=1, total=2))
+        for _ in range(100):
+            if db.job(job_id).current_progress == 1:
+                break
+            time.sleep(0.01)
+        assert db.job(job_id).current_progress == 1
+
+
+@pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="requires MongoDB at MHUB_TEST_MONGODB_URI"
+)
+def test_mongodb_write_behind_progress(example_config_json):
+    import pymongo
+
+    job_config = models.MapcheteJob(**example_config_json)
+    client = pymongo.MongoClient(MONGODB_TEST_URI)
+    database = client["mhub_test_write_behind"]
+    try:
+        with MongoDBStatusHandler(database=database) as db:
+            db.enable_write_behind(60)
+            job_ids = [db.new(job_config=job_config).job_id for _ in range(3)]
+            for job_id in job_ids:
+                db.update_job(job_id, progress=Progress(current=5, total=10))
+            assert all(db.job(job_id).current_progress is None for job_id in job_ids)
+            db.flush()
+            assert all(db.job(job_id).current_progress == 5 for job_id in job_ids)
+    finally:
+        client.drop_database(database)
+        client.close()
+
+
+@pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="requires MongoDB at MHUB_TEST_MONGODB_URI"
+)
+def test_mongodb_async_status_counts(example_config_json):
+    from pymongo import AsyncMongoClient
+
+    job_config = models.MapcheteJob(**example_config_json)
+
+    async def _run():
+        client = AsyncMongoClient(MONGODB_TEST_URI)
+        database = client["mhub_test_status_counts"]
+        try:
+            async with AsyncMongoDBStatusHandler(database=database) as db:
+                job_ids = [
+                    (await db.new(job_config=job_config)).job_id for _ in range(3)
+                ]
+                await db.set(job_ids[0], status="running")
+                assert await db.status_counts() == {
+                    Status.pending: 2,
+                    Status.running: 1,
+                }
+                assert await db.count(status="pending") == 2
+        finally:
+            await client.drop_database(database)
+            await client.close()
+
+    asyncio.run(_run())
+
+
+def test_mongodb_invalid_process_area(example_config_json, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    # self-intersecting polygons cannot be indexed
+    bowtie = {
+        "type": "Polygon",
+        "coordinates": [[(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)]],
+    }
+    with MongoDBStatusHandler(database=mongodb) as db:
+        job = db.new(job_config=job_config, process_area=bowtie)
+        geometry = shape(db.job(job.job_id))
+        assert geometry.is_valid
+        assert geometry.bounds == (0, 0, 2, 2)
+
+
+def test_mongodb_job_indexes(mongodb):
+    mongodb["jobs"].create_index("status", name="status_updated_v0")
+    mongodb["jobs"].create_index(
+        [("status", 1), ("submitted", 1)], name="status_submitted_v2"
+    )
+    mongodb["jobs"].create_index("job_name", name="job_name_updated_v2")
+    mongodb["jobs"].create_index("foo", name="custom_v0")
+    with MongoDBStatusHandler(database=mongodb):
+        indexes = mongodb["jobs"].index_information()
+    for index in job_indexes():
+        assert index.document["name"] in indexes
+    # indexes of older versions are dropped
+    assert "status_updated_v0" not in indexes
+    # indexes of newer versions and other indexes are kept
+    assert "job_name_updated_v2" in indexes
+    assert "status_submitted_v2" in indexes
+    assert "custom_v0" in indexes
+
+
+JOBS_FILTERS = dict(
+    job_ids=["foo"],
+    status="running",
+    output_path="s3://bucket/output",
+    command="execute",
+    job_name="foo",
+    bounds=(0, 1, 2, 3),
+    from_date="2024-01-01T00:00:00Z",
+    to_date="2024-12-31T00:00:00Z",
+)
+
+
+def _stages(plan):
+    yield plan["stage"]
+    children = plan.get("inputStages", [])
+    if "inputStage" in plan:
+        children = [plan["inputStage"], *children]
+    for child in children:
+        yield from _stages(child)
+
+
+@pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="requires MongoDB at MHUB_TEST_MONGODB_URI"
+)
+@pytest.mark.parametrize("sort", [None, "-updated", "submitted"])
+def test_mongodb_jobs_queries_use_indexes(sort):
+    import pymongo
+
+    client = pymongo.MongoClient(MONGODB_TEST_URI)
+    database = client["mhub_test_indexes"]
+    try:
+        with MongoDBStatusHandler(database=database):
+            for size in range(1, len(JOBS_FILTERS) + 1):
+                for keys in itertools.combinations(JOBS_FILTERS, size):
+                    query, sort_spec = paged_jobs_query(
+                        jobs_query(**{key: JOBS_FILTERS[key] for key in keys}),
+                        sort=sort,
+                    )
+                    entries = database["jobs"].find(query)
+                    if sort_spec:
+                        entries = entries.sort(sort_spec)
+                    plan = entries.explain()["queryPlanner"]["winningPlan"]
+                    assert "COLLSCAN" not in set(_stages(plan)), keys
+    finally:
+        client.drop_database(database)
+        client.close()
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+@pytest.mark.parametrize("sort", ["-submitted", "submitted", "-updated"])
+def test_backend_jobs_pagination(example_config_json, backend_db, sort, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        job_ids = [db.new(job_config=job_config).job_id for _ in range(5)]
+        db.set(job_ids[0], status="parsing")
+
+        all_jobs = db.jobs(sort=sort)
+        assert sorted([job.job_id for job in all_jobs]) == sorted(job_ids)
+
+        # walk through all pages
+        field, descending = models.parse_sort(sort)
+        paged, cursor = [], None
+        while True:
+            page = db.jobs(limit=2, sort=sort, cursor=cursor)
+            paged.extend(page)
+            if len(page) < 2:
+                break
+            cursor = models.JobsCursor.from_job(page[-1], sort=sort)
+        assert [job.job_id for job in paged] == [job.job_id for job in all_jobs]
+        timestamps = [getattr(job, field.value) for job in paged]
+        assert timestamps == sorted(timestamps, reverse=descending)
+
+        # filters still apply
+        assert len(db.jobs(limit=2, sort=sort, status="pending")) == 2
+        assert len(db.jobs(limit=10, status="parsing")) == 1
+
+        # cursor has to match sort order
+        with pytest.raises(ValueError):
+            db.jobs(sort="updated", cursor=models.JobsCursor.from_job(paged[0], sort))
+
+
+@pytest.mark.parametrize("backend_db", ["mongodb", "memory"])
+def test_backend_jobs_fields(example_config_json, backend_db, mongodb):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src=mongodb if backend_db == "mongodb" else "memory") as db:
+        job_id = db.new(job_config=job_config).job_id
+        db.set(job_id, status="running", progress=Progress(current=1, total=4))
+
+        summary = db.job(job_id, fields=models.parse_fields("summary"))
+        assert isinstance(summary, models.JobSummary)
+        assert summary.status == Status.running
+        assert summary.current_progress == 1
+        assert summary.total_progress == 4
+        assert summary.updated
+        feature = summary.to_geojson_dict()
+        assert feature["id"] == job_id
+        assert feature["geometry"] is None
+        assert "mapchete" not in feature["properties"]
+
+        summary = db.job(job_id, fields=models.parse_fields("status,output_path"))
+        assert summary.model_dump(exclude_unset=True) == {
+            "job_id": job_id,
+            "status": Status.running,
+            "output_path": example_config_json["config"]["output"]["path"],
+        }
+
+        (summary,) = db.jobs(fields=["job_id", "geometry"], limit=1, sort="-updated")
+        assert summary.to_geojson_dict()["geometry"]["type"] == "Polygon"
+        # sort field is always included for pagination
+        assert summary.updated
+
+
+def test_parse_fields():
+    assert models.parse_fields("status") == ["job_id", "status"]
+    assert models.parse_fields("summary,status") == models.SUMMARY_FIELDS
+    with pytest.raises(ValueError):
+        models.parse_fields("foo")
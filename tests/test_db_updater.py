@@ -0,0 +1,41 @@
+import pytest
+from mapchete.enums import Status
+from mapchete.errors import JobCancelledError
+from mapchete.types import Progress
+
+from mapchete_hub import models
+from mapchete_hub.db import init_backenddb
+from mapchete_hub.observers import DBUpdater
+
+
+def test_db_updater_caches_cancel_check(example_config_json, monkeypatch):
+    job_config = models.MapcheteJob(**example_config_json)
+    with init_backenddb(src="memory") as db:
+        job_entry = db.new(job_config=job_config)
+        checks = []
+        is_cancelled = db.is_cancelled
+        monkeypatch.setattr(
+            db,
+            "is_cancelled",
+            lambda job_id: checks.append(job_id) or is_cancelled(job_id),
+        )
+        db_updater = DBUpdater(
+            backend_db=db,
+            job_entry=job_entry,
+            event_rate_limit=0,
+            cancel_check_interval=60,
+        )
+
+        db_updater.update(status=Status.running)
+        for i in range(10):
+            db_updater.update(progress=Progress(current=i, total=10))
+        # status is read only once per interval
+        assert checks == [job_entry.job_id]
+
+        # cancellation is noticed after the interval has passed
+        db.set(job_entry.job_id, status=Status.cancelled)
+        db_updater.update(progress=Progress(current=10, total=10))
+        db_updater.cancel_check_interval = 0
+        with pytest.raises(JobCancelledError):
+            db_updater.update(progress=Progress(current=10, total=10))
+        assert len(checks) == 2
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from mapchete.enums import Status
+
+from mapchete_hub.db.memory import MemoryStatusHandler
+from mapchete_hub.events import JobEvents
+from mapchete_hub.models import MapcheteJob
+from mapchete_hub.settings import mhub_settings
+
+
+def test_job_events_coalesce():
+    async def _run():
+        job_events = JobEvents()
+        with (
+            job_events.subscribe(["foo"]) as subscription,
+            job_events.subscribe() as all_jobs,
+        ):
+            for current in range(1000):
+                job_events("foo", dict(status=Status.running, current_progress=current))
+            job_events("bar", dict(status=Status.pending))
+            # updates are published within the event loop
+            await asyncio.sleep(0)
+            assert await subscription.get(timeout=1) == {
+                "foo": {"status": Status.running, "current_progress": 999}
+            }
+            assert set(await all_jobs.get(timeout=1)) == {"foo", "bar"}
+            assert await subscription.get(timeout=0.01) == {}
+        assert not job_events._subscriptions
+
+    asyncio.run(_run())
+
+
+def test_job_events_from_status_handler(example_config_json):
+    async def _run():
+        job_events = JobEvents()
+        with MemoryStatusHandler() as backend_db:
+            backend_db.add_listener(job_events)
+            # adding the same listener again does not duplicate events
+            backend_db.add_listener(job_events)
+            job_id = backend_db.new(MapcheteJob(**example_config_json)).job_id
+            with job_events.subscribe([job_id]) as subscription:
+                # update written from another thread
+                thread = threading.Thread(
+                    target=backend_db.set, args=(job_id,), kwargs=dict(status="running")
+                )
+                thread.start()
+                updates = await subscription.get(timeout=5)
+                thread.join()
+            assert updates[job_id]["status"] == Status.running
+            assert updates[job_id]["updated"]
+            backend_db.remove_listener(job_events)
+            assert not backend_db._listeners
+
+    asyncio.run(_run())
+
+
+def test_job_events_poll(example_config_json, monkeypatch):
+    monkeypatch.setattr(mhub_settings, "event_poll_interval", 0.01)
+
+    async def _run():
+        job_events = JobEvents()
+        with MemoryStatusHandler() as backend_db:
+            job_ids = [
+                backend_db.new(MapcheteJob(**example_config_json)).job_id
+                for _ in range(2)
+            ]
+            queries = []
+
+            async def _read_jobs(**kwargs):
+                queries.append(kwargs["job_ids"])
+                return backend_db.jobs(**kwargs)
+
+            poller = asyncio.create_task(job_events.poll(_read_jobs))
+            with (
+                job_events.subscribe(job_ids[:1]) as first,
+                job_events.subscribe(job_ids) as second,
+            ):
+                # current state of jobs seen for the first time is published
+                assert set(await second.get(timeout=1)) == set(job_ids)
+                # updates written without listener, e.g. by other processes
+                backend_db.set(job_ids[0], status="running")
+                while (
+                    not (updates := await first.get(timeout=1))
+                    .get(job_ids[0], {})
+                    .get("status")
+                    == Status.running
+                ):
+                    pass
+                # unchanged attributes are not published again
+                assert updates[job_ids[0]] == {"status": Status.running}
+            # both subscriptions are served by one query per interval
+            assert sorted(job_ids) in queries
+            assert all(len(query) == 2 for query in queries)
+            poller.cancel()
+
+    asyncio.run(_run())
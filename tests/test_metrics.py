@@ -0,0 +1,45 @@
+import asyncio
+
+from mapchete.enums import Status
+from prometheus_client import REGISTRY
+
+from mapchete_hub.metrics import instrument_status_handler, set_job_counts
+
+
+def _db_calls(handler: str, method: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "mhub_db_call_duration_seconds_count",
+            dict(handler=handler, method=method),
+        )
+        or 0
+    )
+
+
+def test_instrument_status_handler():
+    class _StatusHandler:
+        def job(self, job_id):
+            return job_id
+
+        async def jobs(self):
+            return []
+
+        def other(self):
+            return None
+
+    instrument_status_handler(_StatusHandler)
+    handler = _StatusHandler()
+
+    assert handler.job("foo") == "foo"
+    assert asyncio.run(handler.jobs()) == []
+    handler.other()
+    assert _db_calls("_StatusHandler", "job") == 1
+    assert _db_calls("_StatusHandler", "jobs") == 1
+    assert _db_calls("_StatusHandler", "other") == 0
+    assert asyncio.iscoroutinefunction(_StatusHandler.jobs)
+
+
+def test_set_job_counts():
+    set_job_counts({Status.pending: 3, Status.running: 2, Status.initializing: 1})
+    assert REGISTRY.get_sample_value("mhub_jobs_queued") == 3
+    assert REGISTRY.get_sample_value("mhub_jobs_running") == 3
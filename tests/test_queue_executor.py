@@ -0,0 +1,137 @@
+from mapchete.enums import Status
+
+from mapchete_hub.db import init_backenddb
+from mapchete_hub.job_handler import init_job_handler
+from mapchete_hub.job_handler.mhub_worker import MHubWorkerJobHandler
+from mapchete_hub.job_handler.queue_executor import QueueExecutor
+from mapchete_hub.settings import MHubSettings
+
+
+class _RecordingJobHandler:
+    """Only records submitted jobs instead of running them."""
+
+    def __init__(self):
+        self.submitted = []
+        self.finished = set()
+
+    def submit(self, job_entry):
+        self.submitted.append(job_entry.job_id)
+        return job_entry
+
+    def active_jobs(self):
+        return set(self.submitted) - self.finished
+
+
+def test_queue_job_handler():
+    with init_backenddb("memory") as backend_db:
+        with init_job_handler(
+            backend_db, mhub_settings=MHubSettings(job_handler="queue")
+        ) as job_handler:
+            assert isinstance(job_handler, MHubWorkerJobHandler)
+
+
+def test_queue_executor_submit_pending_jobs(example_mapchete_job):
+    with init_backenddb("memory") as backend_db:
+        job_ids = [backend_db.new(example_mapchete_job).job_id for _ in range(4)]
+        backend_db.set(job_ids[3], status=Status.cancelled)
+        job_handler = _RecordingJobHandler()
+        executor = QueueExecutor(
+            status_handler=backend_db, job_handler=job_handler, max_parallel_jobs=2
+        )
+
+        # oldest jobs first
+        submitted = executor.submit_pending_jobs()
+        assert [job.job_id for job in submitted] == job_ids[:2]
+        # submitted jobs are claimed
+        for job_id in job_ids[:2]:
+            assert backend_db.job(job_id).status == Status.parsing
+            assert backend_db.job(job_id).executor_id == executor.executor_id
+
+        # no capacity left
+        assert executor.submit_pending_jobs() == []
+
+        job_handler.finished.add(job_ids[0])
+        backend_db.set(job_ids[0], status=Status.done)
+        submitted = executor.submit_pending_jobs()
+        assert [job.job_id for job in submitted] == [job_ids[2]]
+
+        # cancelled jobs are never submitted
+        job_handler.finished.update(job_ids)
+        for job_id in job_ids[1:3]:
+            backend_db.set(job_id, status=Status.done)
+        assert executor.submit_pending_jobs() == []
+        assert job_handler.submitted == job_ids[:3]
+
+
+def test_queue_executor_reads_only_claimable_jobs(example_mapchete_job, monkeypatch):
+    with init_backenddb("memory") as backend_db:
+        job_ids = [backend_db.new(example_mapchete_job).job_id for _ in range(10)]
+        queried = []
+        jobs = backend_db.jobs
+
+        def _jobs(**kwargs):
+            result = jobs(**kwargs)
+            queried.extend(result)
+            return result
+
+        monkeypatch.setattr(backend_db, "jobs", _jobs)
+        executor = QueueExecutor(
+            status_handler=backend_db,
+            job_handler=_RecordingJobHandler(),
+            max_parallel_jobs=1,
+        )
+        (submitted,) = executor.submit_pending_jobs()
+        assert submitted.job_id == job_ids[0]
+        assert submitted.mapchete
+        # pending jobs are queried without loading their configuration
+        assert len(queried) == 2
+        assert all(not hasattr(job, "mapchete") for job in queried)
+
+
+def test_queue_executor_claim(example_mapchete_job):
+    with init_backenddb("memory") as backend_db:
+        job_id = backend_db.new(example_mapchete_job).job_id
+        executors = [
+            QueueExecutor(status_handler=backend_db, job_handler=_RecordingJobHandler())
+            for _ in range(2)
+        ]
+        assert executors[0].claim(job_id)
+        assert not executors[1].claim(job_id)
+        assert [executor.submit_pending_jobs() for executor in executors] == [[], []]
+
+
+def test_queue_executor_requeue_orphaned_jobs(example_mapchete_job):
+    with init_backenddb("memory") as backend_db:
+        executor = QueueExecutor(
+            status_handler=backend_db, job_handler=_RecordingJobHandler()
+        )
+        other_executor = QueueExecutor(
+            status_handler=backend_db, job_handler=_RecordingJobHandler()
+        )
+        # job of another job handler or of an executor of a previous version
+        unowned = backend_db.new(example_mapchete_job).job_id
+        backend_db.set(unowned, status=Status.running)
+        # job of an executor which is still alive
+        other_executor.heartbeat()
+        owned = backend_db.new(example_mapchete_job).job_id
+        assert other_executor.submit_pending_jobs()[0].job_id == owned
+        backend_db.set(owned, status=Status.running)
+        finished = backend_db.new(example_mapchete_job).job_id
+        backend_db.set(finished, status=Status.done)
+
+        executor.heartbeat()
+        assert executor.requeue_orphaned_jobs() == []
+        assert backend_db.job(unowned).status == Status.running
+        assert backend_db.job(owned).status == Status.running
+        assert backend_db.job(finished).status == Status.done
+
+        # other executor stopped sending heartbeats
+        executor.executor_timeout = 0
+        assert executor.requeue_orphaned_jobs() == [owned]
+        assert backend_db.job(owned).status == Status.pending
+        assert backend_db.job(unowned).status == Status.running
+
+        # unowned jobs are only requeued on request
+        assert executor.requeue_unowned_jobs() == [unowned]
+        assert backend_db.job(unowned).status == Status.pending
+        assert backend_db.job(finished).status == Status.done
@@ -0,0 +1,32 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+from mapchete.types import Progress
+
+from mapchete_hub.db import init_backenddb
+from mapchete_hub.models import parse_fields
+from mapchete_hub.serialization import dumps, feature_collection, job_feature
+
+
+def _legacy(obj) -> bytes:
+    return json.dumps(jsonable_encoder(obj), separators=(",", ":")).encode()
+
+
+def test_job_feature(example_mapchete_job):
+    with init_backenddb(src="memory") as db:
+        job_id = db.new(job_config=example_mapchete_job).job_id
+        db.set(job_id, status="running", progress=Progress(current=1, total=4))
+
+        job = db.job(job_id)
+        assert dumps(job_feature(job)) == _legacy(job.to_geojson_dict())
+
+        summary = db.job(job_id, fields=parse_fields("summary"))
+        assert dumps(job_feature(summary)) == _legacy(summary.to_geojson_dict())
+
+        collection = json.loads(dumps(feature_collection([job, summary], links=[])))
+        assert collection["numberReturned"] == 2
+        assert collection["links"] == []
+        assert [feature["id"] for feature in collection["features"]] == [
+            job_id,
+            job_id,
+        ]
@@ -0,0 +1,120 @@
+import pytest
+from mapchete.enums import Status
+
+from mapchete_hub.geometry import backend_process_areas
+from mapchete_hub.models import MapcheteJob
+from mapchete_hub.observers import TraceRecorder
+
+from mapchete_hub.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Tracer,
+    current_traceparent,
+    tracer,
+    parse_traceparent,
+)
+
+
+def test_tracer_nested_spans():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer([exporter])
+
+    with tracer.span("parent", foo="bar") as parent:
+        assert current_traceparent() == parent.traceparent
+        with tracer.span("child") as child:
+            pass
+    assert current_traceparent() is None
+
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+    assert parent.attributes == dict(foo="bar")
+    assert parent.duration >= child.duration
+    assert [span.name for span in tracer.spans(parent.trace_id)] == [
+        "parent",
+        "child",
+    ]
+
+
+def test_tracer_continue_trace():
+    tracer = Tracer([InMemorySpanExporter()])
+    with tracer.span("submission") as submission:
+        traceparent = submission.traceparent
+
+    # e.g. in another process
+    with tracer.span("execution", traceparent=traceparent) as execution:
+        pass
+    assert parse_traceparent(traceparent) == (
+        execution.trace_id,
+        execution.parent_id,
+    )
+
+    with pytest.raises(ValueError):
+        parse_traceparent("invalid")
+
+
+def test_tracer_error():
+    tracer = Tracer([InMemorySpanExporter()])
+    with pytest.raises(RuntimeError):
+        with tracer.span("failing") as span:
+            raise RuntimeError("foo")
+    assert "foo" in span.error
+    assert tracer.spans(span.trace_id) == [span]
+
+
+def test_in_memory_exporter_max_traces():
+    tracer = Tracer([InMemorySpanExporter(max_traces=2)])
+    trace_ids = []
+    for _ in range(3):
+        with tracer.span("foo") as span:
+            trace_ids.append(span.trace_id)
+    assert tracer.spans(trace_ids[0]) == []
+    assert len(tracer.spans(trace_ids[2])) == 1
+
+
+def test_file_exporter(tmp_path):
+    path = str(tmp_path / "spans.jsonl")
+    tracer = Tracer([FileSpanExporter(path)])
+    with tracer.span("parent") as parent:
+        with tracer.span("child"):
+            pass
+    with tracer.span("other"):
+        pass
+
+    # read by another tracer, e.g. of another process
+    spans = Tracer([FileSpanExporter(path)]).spans(parent.trace_id)
+    assert [span.name for span in spans] == ["parent", "child"]
+    assert spans[0].model_dump() == parent.model_dump()
+
+
+def test_trace_recorder():
+    with tracer.span("execute_job") as job_span:
+        recorder = TraceRecorder(job_span.traceparent)
+        for status in [Status.parsing, Status.initializing, Status.running]:
+            recorder.update(status=status)
+        recorder.update(progress=None)
+        recorder.update(status=Status.done)
+
+    spans = tracer.spans(job_span.trace_id)
+    assert [span.name for span in spans] == [
+        "execute_job",
+        "parsing",
+        "initializing",
+        "running",
+    ]
+    assert all(span.parent_id == job_span.span_id for span in spans[1:])
+    assert all(span.duration is not None for span in spans)
+
+
+def test_backend_process_areas_spans(example_config_json):
+    job_config = MapcheteJob(**example_config_json)
+    with tracer.span("submission") as submission:
+        backend_process_areas([job_config, job_config])
+    spans = [
+        span
+        for span in tracer.spans(submission.trace_id)
+        if span.name == "process_area_from_config"
+    ]
+    assert len(spans) == 2
+    for span in spans:
+        assert span.parent_id == submission.span_id